@@ -1,3 +1,4 @@
+import asyncio
 from lib.arguments.args_parser import ArgsParser
 from lib.client.download_config import DownloadConfig
 from lib.client.download_client_sw import DownloadClientSW
@@ -16,7 +17,14 @@ def main():
         case "sack":
             client: DownloadClientSACK = DownloadClientSACK(config)
 
-    client.run()
+    try:
+        match config.ENGINE:
+            case "selector":
+                client.run()
+            case "asyncio":
+                asyncio.run(client.run_async())
+    except BrokenPipeError:
+        exit()  # The client printed why it gave up
 
 
 if __name__ == "__main__":
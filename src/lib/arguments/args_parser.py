@@ -26,7 +26,7 @@ class ArgsParser:
 
     def __show_help_download(self) -> None:
         print(
-            """usage: download [-h] [-v | -q] [-H ADDR] [-p PORT] [-d FILEPATH] [-n FILENAME] [-a ALGORITHM] # noqa
+            """usage: download [-h] [-v | -q] [-H ADDR] [-p PORT] [-d FILEPATH] [-n FILENAME] [-a ALGORITHM] [-e ENGINE] [-f ACKS] [-r] # noqa
 <command description> # noqa
 optional arguments: # noqa
     -h, --help show this help message and exit # noqa
@@ -37,13 +37,16 @@ optional arguments: # noqa
     -d, --dst destination file path # noqa
     -n, --name file name # noqa
     -a, --algorithm data transfer algorithm [sw | sack] # noqa
-    -t --timeout timeout in miliseconds"""  # noqa
+    -t --timeout timeout in miliseconds # noqa
+    -e, --engine event loop engine [selector | asyncio] # noqa
+    -f, --ack-frequency data packets acknowledged per ACK (sack) # noqa
+    -r, --resume continue a download cut short (sack)"""  # noqa
         )
         exit()
 
     def __show_help_upload(self) -> None:
         print(
-            """usage: upload [-h] [-v | -q] [-H ADDR] [-p PORT] [-s FILEPATH] [-n FILENAME] [-a ALGORITHM] # noqa
+            """usage: upload [-h] [-v | -q] [-H ADDR] [-p PORT] [-s FILEPATH] [-n FILENAME] [-a ALGORITHM] [-e ENGINE] [-r] # noqa
 <command description> # noqa
 optional arguments: # noqa
     -h, --help show this help message and exit # noqa
@@ -54,13 +57,15 @@ optional arguments: # noqa
     -s, --src source file path # noqa
     -n, --name file name # noqa
     -a, --algorithm data transfer algorithm [sw | sack] # noqa
-    -t --timeout timeout in miliseconds"""  # noqa
+    -t --timeout timeout in miliseconds # noqa
+    -e, --engine event loop engine [selector | asyncio] # noqa
+    -r, --resume continue an upload cut short (sack)"""  # noqa
         )
         exit()
 
     def __show_help_server(self) -> None:
         print(
-            """usage: start-server [-h] [-v | -q] [-H ADDR] [-p PORT] [-s DIRPATH] [-a ALGORITHM] # noqa
+            """usage: start-server [-h] [-v | -q] [-H ADDR] [-p PORT] [-s DIRPATH] [-a ALGORITHM] [-e ENGINE] [-P PROCESSES] [-f ACKS] [-c MB] # noqa
 <command description> # noqa
 optional arguments: # noqa
     -h, --help show this help message and exit # noqa
@@ -70,7 +75,11 @@ optional arguments: # noqa
     -p, --port service port # noqa
     -s, --storage storage dir path # noqa
     -a, --algorithm data transfer algorithm [sw | sack] # noqa
-    -t --timeout timeout in miliseconds"""  # noqa
+    -t --timeout timeout in miliseconds # noqa
+    -e, --engine event loop engine [selector | asyncio] # noqa
+    -P, --processes worker processes sharing the port # noqa
+    -f, --ack-frequency data packets acknowledged per ACK (sack) # noqa
+    -c, --cache-size MB of file chunks cached per process, 0 to disable"""  # noqa
         )
         exit()
 
@@ -193,6 +202,66 @@ optional arguments: # noqa
             print(str(e))
             exit()
 
+    def __get_engine(self, argv: list[str]) -> str:
+        try:
+            idx = self.__get_argv_index(("-e", "--engine"), argv)
+            return self.validator.validate_engine(argv[idx + 1])
+
+        except IndexError:
+            print(
+                "The engine must be specified after -e or --engine, e.g: -e asyncio"  # noqa
+            )
+            exit()
+
+        except Exception as e:
+            print(str(e))
+            exit()
+
+    def __get_processes(self, argv: list[str]) -> int:
+        try:
+            idx = self.__get_argv_index(("-P", "--processes"), argv)
+            return self.validator.validate_processes(argv[idx + 1])
+
+        except IndexError:
+            print(
+                "The processes must be specified after -P or --processes, e.g: -P 4"  # noqa
+            )
+            exit()
+
+        except Exception as e:
+            print(str(e))
+            exit()
+
+    def __get_ack_frequency(self, argv: list[str]) -> int:
+        try:
+            idx = self.__get_argv_index(("-f", "--ack-frequency"), argv)
+            return self.validator.validate_ack_frequency(argv[idx + 1])
+
+        except IndexError:
+            print(
+                "The ACK frequency must be specified after -f or --ack-frequency, e.g: -f 2"  # noqa
+            )
+            exit()
+
+        except Exception as e:
+            print(str(e))
+            exit()
+
+    def __get_cache_size(self, argv: list[str]) -> int:
+        try:
+            idx = self.__get_argv_index(("-c", "--cache-size"), argv)
+            return self.validator.validate_cache_size(argv[idx + 1])
+
+        except IndexError:
+            print(
+                "The cache size must be specified after -c or --cache-size, e.g: -c 64"  # noqa
+            )
+            exit()
+
+        except Exception as e:
+            print(str(e))
+            exit()
+
     def __load_server_args(self, argv: list[str]) -> ServerConfig:
         if "-h" in argv or "--help" in argv:
             self.__show_help_server()
@@ -203,6 +272,10 @@ optional arguments: # noqa
         storage_dir_path = constants.DEFAULT_SERVER_STORAGE_DIR_PATH
         algorithm = constants.DEFAULT_ALGORITHM
         timeout = constants.DEFAULT_TIMEOUT
+        engine = constants.DEFAULT_ENGINE
+        processes = constants.DEFAULT_SERVER_PROCESSES
+        ack_frequency = constants.DEFAULT_ACK_FREQUENCY
+        cache_size = constants.DEFAULT_SERVER_CACHE_SIZE
 
         if "-v" in argv or "--verbose" in argv:
             verbose = Verbose.VERBOSE
@@ -225,7 +298,32 @@ optional arguments: # noqa
         if "-t" in argv or "--timeout" in argv:
             timeout = self.__get_timeout(argv)
 
-        return ServerConfig([verbose, host, port, algorithm, timeout, storage_dir_path])
+        if "-e" in argv or "--engine" in argv:
+            engine = self.__get_engine(argv)
+
+        if "-P" in argv or "--processes" in argv:
+            processes = self.__get_processes(argv)
+
+        if "-f" in argv or "--ack-frequency" in argv:
+            ack_frequency = self.__get_ack_frequency(argv)
+
+        if "-c" in argv or "--cache-size" in argv:
+            cache_size = self.__get_cache_size(argv)
+
+        return ServerConfig(
+            [
+                verbose,
+                host,
+                port,
+                algorithm,
+                timeout,
+                engine,
+                storage_dir_path,
+                processes,
+                ack_frequency,
+                cache_size,
+            ]
+        )
 
     def __load_upload_client_args(self, argv: list[str]) -> UploadConfig:
         if "-h" in argv or "--help" in argv:
@@ -238,6 +336,8 @@ optional arguments: # noqa
         source_path = None
         algorithm = constants.DEFAULT_ALGORITHM
         timeout = constants.DEFAULT_TIMEOUT
+        engine = constants.DEFAULT_ENGINE
+        resume = "-r" in argv or "--resume" in argv
 
         if "-v" in argv or "--verbose" in argv:
             verbose = Verbose.VERBOSE
@@ -263,8 +363,21 @@ optional arguments: # noqa
         if "-t" in argv or "--timeout" in argv:
             timeout = self.__get_timeout(argv)
 
+        if "-e" in argv or "--engine" in argv:
+            engine = self.__get_engine(argv)
+
         return UploadConfig(
-            [verbose, host, port, algorithm, timeout, source_path, file_name]
+            [
+                verbose,
+                host,
+                port,
+                algorithm,
+                timeout,
+                engine,
+                source_path,
+                file_name,
+                resume,
+            ]
         )
 
     def __load_download_client_args(self, argv: list[str]) -> DownloadConfig:
@@ -278,6 +391,9 @@ optional arguments: # noqa
         file_name = None
         algorithm = constants.DEFAULT_ALGORITHM
         timeout = constants.DEFAULT_TIMEOUT
+        engine = constants.DEFAULT_ENGINE
+        ack_frequency = constants.DEFAULT_ACK_FREQUENCY
+        resume = "-r" in argv or "--resume" in argv
 
         if "-v" in argv or "--verbose" in argv:
             verbose = Verbose.VERBOSE
@@ -303,8 +419,25 @@ optional arguments: # noqa
         if "-t" in argv or "--timeout" in argv:
             timeout = self.__get_timeout(argv)
 
+        if "-e" in argv or "--engine" in argv:
+            engine = self.__get_engine(argv)
+
+        if "-f" in argv or "--ack-frequency" in argv:
+            ack_frequency = self.__get_ack_frequency(argv)
+
         return DownloadConfig(
-            [verbose, host, port, algorithm, timeout, destination_path, file_name]
+            [
+                verbose,
+                host,
+                port,
+                algorithm,
+                timeout,
+                engine,
+                destination_path,
+                file_name,
+                ack_frequency,
+                resume,
+            ]
         )
 
     def __get_binary(self, path: str) -> str:
@@ -34,3 +34,37 @@ class ArgsValidator:
             return timeout
 
         raise ValueError("Timeout must be a positive integer")
+
+    def validate_engine(self, engine: str) -> str:
+        if engine != "selector" and engine != "asyncio":
+            raise ValueError("Engine must be 'selector' or 'asyncio'")
+
+        return engine
+
+    def validate_processes(self, processes: str) -> int:
+        if not processes.isnumeric():
+            raise ValueError("Processes must be an unsigned integer")
+
+        processes = int(processes)
+
+        if processes >= 1:
+            return processes
+
+        raise ValueError("Processes must be at least 1")
+
+    def validate_ack_frequency(self, ack_frequency: str) -> int:
+        if not ack_frequency.isnumeric():
+            raise ValueError("ACK frequency must be an unsigned integer")
+
+        ack_frequency = int(ack_frequency)
+
+        if ack_frequency >= 1:
+            return ack_frequency
+
+        raise ValueError("ACK frequency must be at least 1")
+
+    def validate_cache_size(self, cache_size: str) -> int:
+        if not cache_size.isnumeric():
+            raise ValueError("Cache size must be an unsigned integer")
+
+        return int(cache_size)
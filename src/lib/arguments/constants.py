@@ -7,10 +7,14 @@ SERVER: str = "start-server.py"
 DEFAULT_VERBOSE: bool = Verbose.DEFAULT
 DEFAULT_ALGORITHM: str = "sw"
 DEFAULT_TIMEOUT: int = 1000
+DEFAULT_ENGINE: str = "selector"
 
 DEFAULT_SERVER_HOST: str = "127.0.0.1"
 DEFAULT_SERVER_PORT: int = 8080
 DEFAULT_SERVER_STORAGE_DIR_PATH: str = "~/server-storage"
+DEFAULT_SERVER_PROCESSES: int = 1
+DEFAULT_ACK_FREQUENCY: int = 2  # ACK every second segment, as in TCP
+DEFAULT_SERVER_CACHE_SIZE: int = 64  # MB of file chunks cached per process
 
 DEFAULT_DOWNLOAD_DESTINATION_PATH: str = "~/Downloads"
 
@@ -19,12 +23,34 @@ MAX_PAYLOAD_SIZE = (2**10) * 5
 
 MAX_PACKET_SIZE_SW = HEADER_SIZE_SW + MAX_PAYLOAD_SIZE
 
+CACHE_CHUNK_SIZE = MAX_PAYLOAD_SIZE * 64  # Whole payloads, none spans two chunks
+
 FIXED_HEADER_SIZE_SACK = 16
-MAX_VARIABLE_HEADER_SIZE_SACK = 4 * 2**16
+MAX_SACK_BLOCKS = 255  # The Blocks field takes 1B
+MAX_VARIABLE_HEADER_SIZE_SACK = MAX_SACK_BLOCKS * 8  # Blocks of two 4B edges
 MAX_PAYLOAD_SIZE_SACK = (2**10) * 5
 
 MAX_PACKET_SIZE_SACK = (
     FIXED_HEADER_SIZE_SACK + MAX_VARIABLE_HEADER_SIZE_SACK + MAX_PAYLOAD_SIZE_SACK
 )
 
+RECEIVE_BUFFER_SIZE_SACK = MAX_PACKET_SIZE_SACK * 256  # Reassembly buffer
+# Kernel buffer of the sockets, a full window in flight fits in it
+SOCKET_RECEIVE_BUFFER_SIZE = RECEIVE_BUFFER_SIZE_SACK
+MAX_RWND = 2**16 - 1  # Largest value of the 2B Receiver Window
+MAX_WINDOW_SCALE = 14  # As in TCP (RFC 7323), windows up to 1 GB
+# Smallest shift that lets the 2B Receiver Window cover the reassembly buffer,
+# the only limit on what a sender keeps in flight besides its cwnd
+WINDOW_SCALE_SACK = min(
+    (RECEIVE_BUFFER_SIZE_SACK // (MAX_RWND + 1)).bit_length(), MAX_WINDOW_SCALE
+)
+
+FILE_WRITE_BUFFER_SIZE = 2**20  # Received data is written to disk in 1 MB chunks
+RESUME_COMMIT_INTERVAL = 2**22  # Data received in order between resume markers
+
 MAX_TIMEOUT_COUNT: int = 60
+
+ACK_DELAY: float = 0.02  # seconds, kept under MIN_RTO so senders never time out
+
+MIN_RTO: float = 0.05  # seconds
+MAX_RTO: float = 2.0  # seconds, backoff limit unless the initial timeout is longer
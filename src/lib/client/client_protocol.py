@@ -0,0 +1,73 @@
+import asyncio
+from typing import Callable
+
+from lib.session import Flow, Session
+
+
+class ClientProtocol(asyncio.DatagramProtocol):
+    """Drive a client flow from an asyncio datagram endpoint."""
+
+    def __init__(self, open_flow: Callable[[asyncio.DatagramTransport], Flow]):
+        self.__open_flow = open_flow
+        self.__session: Session | None = None
+        self.__timer: asyncio.TimerHandle | None = None
+        self.done: asyncio.Future = asyncio.get_running_loop().create_future()
+
+    def __step(self, resume, *args):
+        """Resume the flow and arm its timer, resolving `done` once it ends."""
+        if self.__timer is not None:
+            self.__timer.cancel()
+            self.__timer = None
+
+        try:
+            resume(*args)
+        except Exception as e:
+            if not self.done.done():
+                self.done.set_exception(e)
+            return
+
+        if self.__session.finished:
+            if not self.done.done():
+                self.done.set_result(None)
+            return
+
+        loop = asyncio.get_running_loop()
+        self.__timer = loop.call_at(
+            self.__session.deadline, self.__step, self.__session.expire
+        )
+
+    def connection_made(self, transport: asyncio.DatagramTransport):
+        self.__session = Session(self.__open_flow(transport))
+        self.__step(self.__session.start)
+
+    def datagram_received(self, data: bytes, address: tuple[str, int]):
+        self.__step(self.__session.deliver, data)
+
+    def error_received(self, exc: Exception):
+        # ICMP errors are handled like losses, the flow retransmits on timeout
+        pass
+
+    def connection_lost(self, exc: Exception | None):
+        if self.__timer is not None:
+            self.__timer.cancel()
+
+        if not self.done.done():
+            self.__session.close()
+            self.done.set_exception(
+                exc or BrokenPipeError("Connection closed before the transfer ended")
+            )
+
+
+async def run_flow(
+    open_flow: Callable[[asyncio.DatagramTransport], Flow], socket
+) -> None:
+    """Drive a client flow over an asyncio datagram endpoint until it ends."""
+    loop = asyncio.get_running_loop()
+    transport, protocol = await loop.create_datagram_endpoint(
+        lambda: ClientProtocol(open_flow), sock=socket
+    )
+
+    try:
+        await protocol.done
+    finally:
+        transport.close()
@@ -1,33 +1,66 @@
 from collections import deque
 from lib.packets.sack_packet import SACKPacket
+from lib.net.socket_buffers import size_receive_buffer
+from lib.rtt_estimator import RTTEstimator
+from lib.sack.reassembly import ReassemblyWindow
+from lib.sack.async_writer import AsyncWriter
+from lib.sack.resume_marker import (
+    commit_file,
+    read_marker,
+    remove_marker,
+    write_marker,
+)
+from lib.sack.segment_writer import PWRITE_SUPPORTED, SegmentWriter, preallocate
+from lib.packets.handshake_options import HandshakeOptions
 from lib.client.download_config import DownloadConfig
+from lib.client.client_protocol import run_flow
+from lib.session import run_blocking
+from lib.errors.disk_full import DiskFull
 from lib.errors.invalid_file_name import InvalidFileName
 from lib.arguments.constants import (
+    ACK_DELAY,
+    FILE_WRITE_BUFFER_SIZE,
     MAX_PACKET_SIZE_SACK,
-    MAX_PAYLOAD_SIZE,
+    MAX_RWND,
     MAX_TIMEOUT_COUNT,
+    RECEIVE_BUFFER_SIZE_SACK,
+    RESUME_COMMIT_INTERVAL,
+    WINDOW_SCALE_SACK,
 )
+import os
+import struct
 import socket
 
 SEQUENCE_NUMBER_LIMIT = 2**32
-RWND = MAX_PAYLOAD_SIZE * 2
 
 
 class DownloadClientSACK:
     def __init__(self, config: DownloadConfig):
         self.__config = config
         self.__socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        size_receive_buffer(self.__socket)
+        self.__channel = self.__socket  # socket or asyncio transport to send through
         self.__address = (self.__config.HOST, self.__config.PORT)
         self.__last_packet_created = None
+        self.__last_packet_sent = None
         self.__last_packet_received = None
         self.__timeout_count: int = 0
-        self.__timeout = self.__config.TIMEOUT / 1000
+        self.__rtt = RTTEstimator(self.__config.TIMEOUT / 1000)
 
         # Reciever
         self.__in_order_packets = deque()  # [packets]
-        self.__out_of_order_packets = {}  # {seq_number: packets}
-        self.__received_blocks_edges = []  # [(start, end)]
+        self.__reassembly = ReassemblyWindow()  # out of order packets
+        self.__writer: AsyncWriter | None = None  # Writes data by file offset
         self.__last_ordered_packet_received = None
+        self.__window_scale: int = 0  # Shift of the rwnd advertised, once agreed
+        self.__ack_frequency: int = (
+            config.ACK_FREQUENCY
+        )  # In-order data packets per ACK
+        self.__packets_to_ack: int = 0  # In-order data packets not ACKed yet
+        self.__file_size_announced: bool = False  # The server agreed in the SYN-ACK
+        self.__file_size: int = 0  # Of the file requested, preallocated if announced
+        self.__resume_offset: int = 0  # Bytes of the file kept from a previous try
+        self.__committed_seq_number: int = 0  # End of the data last made durable
 
     def __start_of_next_seq(self, packet):
         """Get the start of the next sequence number."""
@@ -43,7 +76,7 @@ class DownloadClientSACK:
         """Get the next expected sequence number."""
         if self.__last_ordered_packet_received is None:
             return 0
-        return self.__start_of_next_seq(self.__last_ordered_packet_received)
+        return self.__reassembly.base
 
     def __last_packet_is_ordered(self):
         """Check if the last packet received is in order."""
@@ -54,115 +87,110 @@ class DownloadClientSACK:
             self.__last_packet_received.seq_number == self.__next_expected_seq_number()
         )
 
-    def __reorder_blocks(self):
-        while self.__next_expected_seq_number() in self.__out_of_order_packets:
-            self.__last_ordered_packet_received = self.__out_of_order_packets.pop(
-                self.__next_expected_seq_number()
-            )
-            self.__in_order_packets.append(self.__last_ordered_packet_received)
-
-            _, first_block_end = self.__received_blocks_edges[0]
-
-            if first_block_end == self.__next_expected_seq_number():
-                self.__received_blocks_edges.pop(0)
-            else:
-                self.__received_blocks_edges[0] = (
-                    self.__next_expected_seq_number(),
-                    first_block_end,
-                )
+    def __file_offset(self, packet):
+        """Get where a data packet goes in the file, None if it must wait its turn."""
+        if self.__writer is None:
+            return None
+        return self.__writer.offset(packet)
 
     def __add_in_order_packet(self):
-        """Add the in order packet to the queue."""
-        self.__last_ordered_packet_received = self.__last_packet_received
-        self.__in_order_packets.append(self.__last_ordered_packet_received)
-
-        # Try to reorder the buffered packets
-        self.__reorder_blocks()
-
-    def __add_out_of_order_packet(self):
-        """Add the out of order packet to the queue."""
-        start = self.__last_packet_received.seq_number
-        end = start + self.__last_packet_received.length()
-
-        self.__out_of_order_packets[start] = self.__last_packet_received
+        """Add the in order packet to the queue, or write it right away."""
+        packet = self.__last_packet_received
+        self.__last_ordered_packet_received = packet
 
-        for block_index in range(len(self.__received_blocks_edges)):
-            block_start, block_end = self.__received_blocks_edges[block_index]
-
-            if end == block_start:
-                self.__received_blocks_edges[block_index] = (start, block_end)
-                return
-
-            if start == block_end:
-                self.__received_blocks_edges[block_index] = (block_start, end)
-
-                if block_index + 1 < len(self.__received_blocks_edges):
-                    next_block_start, _ = self.__received_blocks_edges[block_index + 1]
-                    if next_block_start == end:
-                        _, next_block_end = self.__received_blocks_edges.pop(
-                            block_index + 1
-                        )
-                        self.__received_blocks_edges[block_index] = (
-                            block_start,
-                            next_block_end,
-                        )
-                return
-
-            if end < block_start:
-                self.__received_blocks_edges.insert(block_index, (start, end))
-                return
+        offset = self.__file_offset(packet)
+        if offset is None:
+            self.__in_order_packets.append(packet)
+        else:
+            self.__writer.write(packet, offset)
 
-        if (start, end) not in self.__received_blocks_edges:
-            self.__received_blocks_edges.append((start, end))
+        # Along with the buffered packets it puts in order, the ones already
+        # written only move the window
+        end = self.__start_of_next_seq(packet)
+        for packet in self.__reassembly.advance(end):
+            self.__last_ordered_packet_received = packet
+            self.__in_order_packets.append(packet)
 
     def __end_of_last_ordered_packet(self):
         """Get the last received sequence number."""
         if self.__last_ordered_packet_received is None:
             return 0
-        return self.__start_of_next_seq(self.__last_ordered_packet_received)
+        return self.__reassembly.base
+
+    def __free_buffer_space(self):
+        """Get the free space of the receive buffer, with the writes queued."""
+        buffered = self.__reassembly.buffered_bytes + sum(
+            packet.length() for packet in self.__in_order_packets
+        )
+        if self.__writer is not None:
+            buffered += self.__writer.pending_bytes  # Closes as the disk falls behind
+        return max(0, RECEIVE_BUFFER_SIZE_SACK - buffered)
+
+    def __fits_receive_buffer(self, packet):
+        """Check if the receive buffer has room for the data of a packet."""
+        return not packet.payload or packet.length() <= self.__free_buffer_space()
+
+    def __rwnd(self):
+        """Get the Receiver Window advertised to the peer, scaled if negotiated."""
+        return min(self.__free_buffer_space() >> self.__window_scale, MAX_RWND)
 
     def __create_new_packet(self, syn, fin, ack, upl, dwl, payload):
         packet = SACKPacket(
             self.__next_seq_number(),
             self.__end_of_last_ordered_packet(),
-            RWND,
+            self.__rwnd(),
             upl,
             dwl,
             ack,
             syn,
             fin,
-            self.__received_blocks_edges,
+            self.__reassembly.blocks(),
             payload,
         )
 
         self.__last_packet_created = packet
+        self.__packets_to_ack = 0  # Every packet carries the cumulative ACK
         return packet
 
     def __get_packet(self):
-        """Get the next packet from the queue."""
+        """Wait for the next packet from the server."""
+        data = yield self.__rtt.rto()  # None when the timeout expires
+
         try:
-            self.__socket.settimeout(self.__timeout)
-            data = self.__socket.recv(MAX_PACKET_SIZE_SACK)
+            if data is None:
+                raise TimeoutError("No packet received")
+
             packet = SACKPacket.decode(data)
             self.__last_packet_received = packet
             self.__timeout_count = 0
+            self.__rtt.answered()
+            self.__rtt.stop_timing()
 
         # socket timeout
-        except (socket.timeout, Exception):
+        except Exception:
             self.__timeout_count += 1
-            if self.__timeout_count >= MAX_TIMEOUT_COUNT:
+            if self.__timeout_count >= MAX_TIMEOUT_COUNT or self.__rtt.gave_up():
                 raise BrokenPipeError(
                     f"Max timeouts reached. Closing connection {self.__address}"  # noqa
                 )
 
+            self.__rtt.backoff()
             self.__send_packet(self.__last_packet_created)
-            self.__get_packet()
+            yield from self.__get_packet()
 
     def __send_packet(self, packet: SACKPacket):
         """Send a packet to the client."""
-        self.__socket.sendto(packet.encode(), self.__address)
+        if packet is self.__last_packet_sent:
+            # Karn's rule: the answer could belong to either copy
+            self.__rtt.cancel_timing()
+        elif not packet.ack:
+            # Only requests are answered right away, data keeps flowing past ACKs
+            self.__rtt.start_timing()
+
+        self.__channel.sendto(packet.encode(), self.__address)
 
         self.__last_packet_created = packet
+        self.__last_packet_sent = packet
 
     def __send_ack(self):
         """Send an acknowledgment to the client."""
@@ -198,50 +226,142 @@ class DownloadClientSACK:
         )
 
     def __wait_for_ack(self):  # TODO: Acomodar esto
-        self.__get_packet()
+        yield from self.__get_packet()
 
         while not self.__last_packet_sent_was_ack():
             self.__send_packet(self.__last_packet_created)
-            self.__get_packet()
+            yield from self.__get_packet()
 
         self.__add_in_order_packet()
 
+    def __acknowledge_data(self):
+        """Count an in-order data packet, ACKing it now or leaving it to the timer."""
+        self.__packets_to_ack += 1
+
+        filled_a_hole = self.__reassembly.base != self.__start_of_next_seq(
+            self.__last_packet_received
+        )
+        if (
+            self.__packets_to_ack >= self.__ack_frequency
+            or filled_a_hole
+            or len(self.__reassembly) > 0
+        ):
+            self.__send_ack()
+
+    def __delay_ack(self):
+        """Wait up to the delayed ACK timer for a packet, then send the ACK."""
+        data = yield ACK_DELAY  # None when the timer expires
+
+        packet = None
+        if data is not None:
+            try:
+                packet = SACKPacket.decode(data)
+            except struct.error:
+                pass  # Malformed, handled as if the timer expired
+
+        if packet is None:
+            self.__send_ack()
+            yield from self.__get_packet()
+            return
+
+        self.__last_packet_received = packet
+        self.__timeout_count = 0
+        self.__rtt.answered()
+
     def __wait_for_data(self):
         """Wait for data from the client."""
         while True:
-            self.__get_packet()
-
-            if self.__last_packet_received.dwl and self.__last_packet_is_ordered():
-                break
+            if self.__packets_to_ack > 0:
+                yield from self.__delay_ack()
+            else:
+                yield from self.__get_packet()
 
+            # In order or not, data the buffer has no room for is dropped
+            # unacknowledged, rather than wait for the disk
             if (
-                self.__last_packet_received.seq_number
-                >= self.__next_expected_seq_number()
+                self.__last_packet_received.dwl
+                and self.__last_packet_is_ordered()
+                and self.__fits_receive_buffer(self.__last_packet_received)
             ):
-                self.__add_out_of_order_packet()
+                break
+
+            if self.__reassembly.is_duplicate(self.__last_packet_received):
+                # The ACK that covered it may have been lost
                 self.__send_sack()
+                continue
+
+            offset = self.__file_offset(self.__last_packet_received)
+            if not self.__fits_receive_buffer(self.__last_packet_received):
+                pass  # Dropped, the SACK below advertises the window left
+            elif offset is not None and self.__reassembly.mark(
+                self.__last_packet_received
+            ):
+                # Queued to be written, only its range waits for the hole before it
+                self.__writer.write(self.__last_packet_received, offset)
+            else:
+                self.__reassembly.store(self.__last_packet_received)
+            self.__send_sack()
 
         # The last packet received is ordered
         self.__add_in_order_packet()
 
+    def __handle_syn_ack(self):
+        """Apply the options the server sent along with the SYN-ACK."""
+        # The SYN-ACK is not file data
+        syn_ack = self.__in_order_packets.popleft()
+        options = HandshakeOptions.decode(syn_ack.payload)
+
+        if options.session_port is not None:
+            # The server moved the session to a socket dedicated to this client
+            self.__address = (self.__config.HOST, options.session_port)
+
+        if options.window_scale is not None:
+            # The server agreed, from now on the rwnd advertised is scaled
+            self.__window_scale = WINDOW_SCALE_SACK
+
+        if options.file_size is not None:
+            # The server acknowledges the file name with the size of the file
+            self.__file_size_announced = True
+
+        if options.resume_offset is not None:
+            # The server agreed to send the file from there on
+            self.__resume_offset = options.resume_offset
+
+    def __file_path(self):
+        return f"{self.__config.DESTINATION_PATH}/{self.__config.FILE_NAME}"
+
     def __send_comm_start(self):
+        # A file size of 0, there is none to send, asks for the server's
+        options = HandshakeOptions(window_scale=WINDOW_SCALE_SACK, file_size=0)
+        marker = read_marker(self.__file_path()) if self.__config.RESUME else None
+        if (
+            marker is not None
+            and os.path.isfile(self.__file_path())
+            and marker[0] <= os.path.getsize(self.__file_path())
+        ):
+            # Ask for the file past what a previous download committed, the
+            # server checks it is still the same size
+            options.file_name = self.__config.FILE_NAME
+            options.resume_offset, options.file_size = marker
+
         start_package = self.__create_new_packet(
             True,
             False,
             False,
             False,
             True,
-            b"",
+            options.encode(),
         )
 
         self.__send_packet(start_package)
         print("Download start packet sent")
 
-        self.__wait_for_ack()
+        yield from self.__wait_for_ack()
+        self.__handle_syn_ack()
         print("Start ack received")
 
     def __file_name_acknowledged(self):
-        self.__get_packet()
+        yield from self.__get_packet()
 
         file_name_acknowledged = True
         while (
@@ -249,7 +369,7 @@ class DownloadClientSACK:
             and not self.__last_packet_sent_was_ack()
         ):
             self.__send_packet(self.__last_packet_created)
-            self.__get_packet()
+            yield from self.__get_packet()
 
         if self.__last_packet_received.fin:
             self.__send_ack()
@@ -269,57 +389,177 @@ class DownloadClientSACK:
         self.__send_packet(file_name_package)
         print(f"File name request sent: {self.__config.FILE_NAME}")
 
-        if self.__file_name_acknowledged():
+        if (yield from self.__file_name_acknowledged()):
             print("File name ack received")
 
             self.__add_in_order_packet()
 
-            file_path = f"{self.__config.DESTINATION_PATH}/{self.__config.FILE_NAME}"
+            if self.__file_size_announced:
+                # The file name ACK is not file data
+                file_name_ack = self.__in_order_packets.popleft()
+                options = HandshakeOptions.decode(file_name_ack.payload)
+                self.__file_size = options.file_size or 0
 
-            # Create an empty file or clear the existing file
-            with open(file_path, "wb") as _:
-                pass
+            if self.__resume_offset == 0:
+                # Create an empty file or clear the existing file
+                with open(self.__file_path(), "wb") as _:
+                    pass
         else:
             raise InvalidFileName(
                 f"File name: {self.__config.FILE_NAME} was not found by server"
             )
 
-    def __save_file_data(self, file_path):
+    def __save_file_data(self, file):
         """Save file data received from the client."""
-        with open(file_path, "ab") as file:
+        if self.__writer is not None:
             while self.__in_order_packets:
                 packet = self.__in_order_packets.popleft()
                 print(f"Received packet of size {len(packet.payload)}")
-                file.write(packet.payload)
+                self.__writer.append(packet)
+            return
+
+        while self.__in_order_packets:
+            packet = self.__in_order_packets.popleft()
+            print(f"Received packet of size {len(packet.payload)}")
+            file.write(packet.payload)
+
+    def __abort_download(self):
+        """Send a FIN in the middle of the data, so the server stops sending it."""
+        fin_packet = self.__create_new_packet(False, True, False, False, True, b"")
+        self.__rtt.closing()
+        self.__send_packet(fin_packet)
+
+        yield from self.__get_packet()
+        while not (
+            self.__last_packet_sent_was_ack() or self.__last_packet_received.fin
+        ):
+            # Data still on its way, the FIN may have been lost. Servers that
+            # do not know it send the whole file, up to their own FIN
+            self.__send_packet(fin_packet)
+            yield from self.__get_packet()
+
+    def __open_destination(self, file_path):
+        """Open the file to download to, None if written by the writer thread."""
+        file = None
+        if PWRITE_SUPPORTED:
+            # Data is written by offset on its own thread, from the first packet
+            # queued or the next one if the file name ACK carried no data
+            data_start = self.__end_of_last_ordered_packet()
+            if self.__in_order_packets:
+                data_start = self.__in_order_packets[0].seq_number
+            self.__writer = AsyncWriter(
+                SegmentWriter(
+                    file_path, data_start, self.__file_size, self.__resume_offset
+                )
+            )
+        else:
+            # Open once for the whole transfer, appended to in order
+            write_marker(file_path, self.__resume_offset, self.__file_size)
+            mode = "r+b" if self.__resume_offset > 0 else "wb"
+            file = open(file_path, mode, buffering=FILE_WRITE_BUFFER_SIZE)
+            try:
+                file.truncate(self.__resume_offset)
+                file.seek(self.__resume_offset)
+                preallocate(file.fileno(), self.__file_size)
+            except Exception:
+                file.close()
+                raise
+        self.__committed_seq_number = self.__end_of_last_ordered_packet()
+        if self.__in_order_packets:
+            self.__committed_seq_number = self.__in_order_packets[0].seq_number
+
+        return file
+
+    def __commit_file_data(self, file, file_path):
+        """Commit the data received in order every RESUME_COMMIT_INTERVAL bytes."""
+        end = self.__end_of_last_ordered_packet()
+        received = (end - self.__committed_seq_number) % SEQUENCE_NUMBER_LIMIT
+        if received < RESUME_COMMIT_INTERVAL:
+            return
+
+        self.__committed_seq_number = end
+        if self.__writer is not None:
+            self.__writer.commit(end)
+        else:
+            commit_file(file, file_path, self.__file_size)
+
+    def __close_file(self, file, file_path):
+        """Close the file received, whole or cut short and committed."""
+        whole = self.__last_ordered_packet_received.fin
+        if self.__writer is not None:
+            end = self.__end_of_last_ordered_packet()
+            self.__writer.close(None if whole else end)
+        if file is not None:
+            try:
+                file.truncate()  # Blocks reserved past the data, if cut short
+                if not whole:
+                    commit_file(file, file_path, self.__file_size)
+            finally:
+                file.close()
+            if whole:
+                remove_marker(file_path)
 
     def __receive_file_data(self):
         print("Receiving file data")
-        file_path = f"{self.__config.DESTINATION_PATH}/{self.__config.FILE_NAME}"
+        file_path = self.__file_path()
+        if self.__resume_offset > 0:
+            print(f"Resuming download at {self.__resume_offset}/{self.__file_size}")
 
-        # To create / overwrite the file
-        with open(file_path, "wb") as _:
-            pass
+        try:
+            file = self.__open_destination(file_path)
+        except DiskFull:
+            if self.__resume_offset == 0:
+                os.remove(file_path)  # Left empty, there was no room for it
+                remove_marker(file_path)
+            yield from self.__abort_download()
+            raise
 
-        while not self.__last_ordered_packet_received.fin:
-            self.__save_file_data(file_path)
-            self.__send_ack()
-            self.__wait_for_data()
+        try:
+            while not self.__last_ordered_packet_received.fin:
+                self.__save_file_data(file)
+                self.__commit_file_data(file, file_path)
+                self.__acknowledge_data()
+                yield from self.__wait_for_data()
+        finally:
+            # Closing flushes the buffered data before the FIN is acknowledged,
+            # and leaves a download cut short with no holes, to be resumed
+            try:
+                self.__save_file_data(file)
+            finally:
+                self.__close_file(file, file_path)
 
         self.__send_ack()
 
-    def run(self):
+    def __transfer(self):
+        """Download the file, yielding whenever it waits for a packet."""
         try:
             print("Starting file download")
-            self.__send_comm_start()
-            self.__send_file_name_request()
-            self.__receive_file_data()
+            yield from self.__send_comm_start()
+            yield from self.__send_file_name_request()
+            yield from self.__receive_file_data()
             print(f"File received: {self.__config.FILE_NAME}")
-            self.__socket.close()
-        except InvalidFileName as e:
+        except (InvalidFileName, DiskFull) as e:
             print("Failed with error:", e)
             print("Closing communication")
+
+    def __open_flow(self, transport):
+        """Start the download sending through an asyncio transport."""
+        self.__channel = transport
+        return self.__transfer()
+
+    def run(self):
+        try:
+            run_blocking(self.__transfer(), self.__socket, MAX_PACKET_SIZE_SACK)
             self.__socket.close()
         except BrokenPipeError as e:
             print(str(e))
             self.__socket.close()
-            exit()
+            raise
+
+    async def run_async(self):
+        """Download the file from within a running asyncio event loop."""
+        try:
+            await run_flow(self.__open_flow, self.__socket)
+        except BrokenPipeError as e:
+            print(str(e))
+            raise
@@ -1,6 +1,11 @@
 from lib.packets.sw_packet import SWPacket
+from lib.rtt_estimator import RTTEstimator
+from lib.packets.handshake_options import HandshakeOptions
 from lib.client.download_config import DownloadConfig
+from lib.client.client_protocol import run_flow
+from lib.session import run_blocking
 from lib.arguments.constants import (
+    FILE_WRITE_BUFFER_SIZE,
     MAX_PACKET_SIZE_SW,
     MAX_TIMEOUT_COUNT,
 )
@@ -12,11 +17,12 @@ class DownloadClientSW:
     def __init__(self, config: DownloadConfig):
         self.__config = config
         self.__socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.__channel = self.__socket  # socket or asyncio transport to send through
         self.__address = (self.__config.HOST, self.__config.PORT)
         self.__last_packet_sent = None
         self.__last_packet_received = None
         self.__timeout_count: int = 0
-        self.__timeout = self.__config.TIMEOUT / 1000
+        self.__rtt = RTTEstimator(self.__config.TIMEOUT / 1000)
 
     def __next_seq_number(self):
         """Get the next sequence number."""
@@ -57,29 +63,39 @@ class DownloadClientSW:
         )
 
     def __get_packet(self):
-        """Get the next packet from the queue."""
-        self.__socket.settimeout(self.__timeout)
+        """Wait for the next packet from the server."""
+        data = yield self.__rtt.rto()  # None when the timeout expires
 
         try:
-            data = self.__socket.recv(MAX_PACKET_SIZE_SW)
+            if data is None:
+                raise TimeoutError("No packet received")
+
             packet = SWPacket.decode(data)
             self.__last_packet_received = packet
             self.__timeout_count = 0
+            self.__rtt.answered()
+            self.__rtt.stop_timing()
 
-        except socket.timeout:
+        except TimeoutError:
             self.__timeout_count += 1
-            if self.__timeout_count >= MAX_TIMEOUT_COUNT:
+            if self.__timeout_count >= MAX_TIMEOUT_COUNT or self.__rtt.gave_up():
                 raise BrokenPipeError(
                     "Max timeouts reached. Closing connection"  # noqa
                 )
 
+            self.__rtt.backoff()
             self.__send_packet(self.__last_packet_sent)
-            self.__get_packet()
+            yield from self.__get_packet()
 
     def __send_packet(self, packet):
         """Send a packet to the client."""
+        if packet is self.__last_packet_sent:
+            # Karn's rule: the answer could belong to either copy
+            self.__rtt.cancel_timing()
+        else:
+            self.__rtt.start_timing()
 
-        self.__socket.sendto(packet.encode(), self.__address)
+        self.__channel.sendto(packet.encode(), self.__address)
         self.__last_packet_sent = packet
 
     def __send_ack(self):
@@ -95,18 +111,27 @@ class DownloadClientSW:
         self.__send_packet(ack_packet)
 
     def __wait_for_ack(self):
-        self.__get_packet()
+        yield from self.__get_packet()
 
         while not self.__last_packet_sent_was_ack():
             self.__send_packet(self.__last_packet_sent)
-            self.__get_packet()
+            yield from self.__get_packet()
 
     def __wait_for_data(self):
-        self.__get_packet()
+        yield from self.__get_packet()
 
         while not (self.__last_packet_received.dwl and self.__last_packet_is_new()):
             self.__send_packet(self.__last_packet_sent)
-            self.__get_packet()
+            yield from self.__get_packet()
+
+    def __handle_syn_ack(self):
+        """Apply the options the server sent along with the SYN-ACK."""
+        syn_ack = self.__last_packet_received
+        options = HandshakeOptions.decode(syn_ack.payload)
+
+        if options.session_port is not None:
+            # The server moved the session to a socket dedicated to this client
+            self.__address = (self.__config.HOST, options.session_port)
 
     def __send_comm_start(self):
         start_package = self.__create_new_packet(
@@ -120,18 +145,19 @@ class DownloadClientSW:
         self.__send_packet(start_package)
         print("Download start packet sent")
 
-        self.__wait_for_ack()
+        yield from self.__wait_for_ack()
+        self.__handle_syn_ack()
         print("Start ack received")
 
     def __file_name_acknowledged(self):
-        self.__get_packet()
+        yield from self.__get_packet()
         file_name_acknowledged = True
         while (
             not self.__last_packet_received.fin
             and not self.__last_packet_sent_was_ack()
         ):
             self.__send_packet(self.__last_packet_sent)
-            self.__get_packet()
+            yield from self.__get_packet()
 
         if self.__last_packet_received.fin:
             self.__send_ack()
@@ -150,7 +176,7 @@ class DownloadClientSW:
         self.__send_packet(file_name_package)
         print(f"File name request sent: {self.__config.FILE_NAME}")
 
-        if self.__file_name_acknowledged():
+        if (yield from self.__file_name_acknowledged()):
             print("File name ack received")
 
             file_path = f"{self.__config.DESTINATION_PATH}/{self.__config.FILE_NAME}"
@@ -163,39 +189,57 @@ class DownloadClientSW:
                 f"File name: {self.__config.FILE_NAME} was not found by server"
             )
 
-    def __save_file_data(self, file_path):
-        with open(file_path, "ab") as file:
-            file.write(self.__last_packet_received.payload)
+    def __save_file_data(self, file):
+        file.write(self.__last_packet_received.payload)
 
     def __receive_file_data(self):
         print("Receiving file data")
         file_path = f"{self.__config.DESTINATION_PATH}/{self.__config.FILE_NAME}"
 
-        while not self.__last_packet_received.fin:
-            print(
-                f"Received packet of size {len(self.__last_packet_received.payload)}"  # noqa
-            )
+        # Open once for the whole transfer, closing flushes it before the FIN ack
+        with open(file_path, "wb", buffering=FILE_WRITE_BUFFER_SIZE) as file:
+            while not self.__last_packet_received.fin:
+                print(
+                    f"Received packet of size {len(self.__last_packet_received.payload)}"  # noqa
+                )
 
-            self.__save_file_data(file_path)
-            self.__send_ack()
-            self.__wait_for_data()
+                self.__save_file_data(file)
+                self.__send_ack()
+                yield from self.__wait_for_data()
 
         self.__send_ack()
 
-    def run(self):
+    def __transfer(self):
+        """Download the file, yielding whenever it waits for a packet."""
         print("Starting file download")
-        self.__send_comm_start()
+        yield from self.__send_comm_start()
 
         try:
-            self.__send_file_name_request()
-            self.__receive_file_data()
+            yield from self.__send_file_name_request()
+            yield from self.__receive_file_data()
             print(f"File received: {self.__config.FILE_NAME}")
-            self.__socket.close()
         except InvalidFileName as e:
             print("Failed with error:", e)
             print("Closing communication")
+
+    def __open_flow(self, transport):
+        """Start the download sending through an asyncio transport."""
+        self.__channel = transport
+        return self.__transfer()
+
+    def run(self):
+        try:
+            run_blocking(self.__transfer(), self.__socket, MAX_PACKET_SIZE_SW)
             self.__socket.close()
         except BrokenPipeError as e:
             print(str(e))
             self.__socket.close()
-            exit()
+            raise
+
+    async def run_async(self):
+        """Download the file from within a running asyncio event loop."""
+        try:
+            await run_flow(self.__open_flow, self.__socket)
+        except BrokenPipeError as e:
+            print(str(e))
+            raise
@@ -1,14 +1,20 @@
 from lib.config import Config
 
-DESTINATION_PATH_INDEX = 5
-FILE_NAME_INDEX = 6
+DESTINATION_PATH_INDEX = 6
+FILE_NAME_INDEX = 7
+ACK_FREQUENCY_INDEX = 8
+RESUME_INDEX = 9
 
 
 class DownloadConfig(Config):
     DESTINATION_PATH: str
     FILE_NAME: str
+    ACK_FREQUENCY: int
+    RESUME: bool
 
     def __init__(self, args: list):
         super().__init__(args)
         self.DESTINATION_PATH = args[DESTINATION_PATH_INDEX]
         self.FILE_NAME = args[FILE_NAME_INDEX]
+        self.ACK_FREQUENCY = args[ACK_FREQUENCY_INDEX]
+        self.RESUME = args[RESUME_INDEX]
@@ -1,34 +1,52 @@
 import os
-from collections import deque
+import struct
 import time
 from lib.packets.sack_packet import SACKPacket
+from lib.packets.handshake_options import HandshakeOptions
+from lib.net.batch_io import send_batch
+from lib.net.socket_buffers import size_receive_buffer
+from lib.rtt_estimator import RTTEstimator
+from lib.sack.mapped_file import MappedFile
+from lib.errors.disk_full import DiskFull
+from lib.sack.scoreboard import Scoreboard
+from lib.states.fast_recovery import FastRecovery
+from lib.states.slow_start import SlowStart
+from lib.states.state import State
 from lib.client.upload_config import UploadConfig
+from lib.client.client_protocol import run_flow
+from lib.session import run_blocking
 from lib.arguments.constants import (
+    FIXED_HEADER_SIZE_SACK,
     MAX_PACKET_SIZE_SACK,
     MAX_PAYLOAD_SIZE,
+    MAX_RTO,
     MAX_TIMEOUT_COUNT,
+    MAX_WINDOW_SCALE,
+    WINDOW_SCALE_SACK,
 )
 import socket
 
 SEQUENCE_NUMBER_LIMIT = 2**32
-WINDOW_SIZE = MAX_PAYLOAD_SIZE * 2
 
 
 class UploadClientSACK:
     def __init__(self, config: UploadConfig):
         self.__config = config
         self.__socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        size_receive_buffer(self.__socket)
+        self.__channel = self.__socket  # socket or asyncio transport to send through
         self.__address = (self.__config.HOST, self.__config.PORT)
 
         # Sender
-        self.__unacked_packets = (
-            deque()
-        )  # list of unacked packets (packet, time) # noqa
+        self.__scoreboard = Scoreboard()  # unacked packets
         self.__last_packet_received = None
-        self.__in_flight_bytes = 0
+        self.__congestion_state: State = SlowStart()
         self.__last_packet_created = None
         self.__timeout_count = 0
-        self.__timeout = self.__config.TIMEOUT / 1000
+        self.__rtt = RTTEstimator(self.__config.TIMEOUT / 1000)
+        self.__window_probes: int = 0  # Consecutive probes of a closed peer window
+        self.__peer_window_scale: int = 0  # Shift of the server's rwnd, once agreed
+        self.__resume_offset: int = 0  # Bytes of the file the server already has
 
     def __start_of_next_seq(self, packet):
         """Get the start of the next sequence number."""
@@ -48,49 +66,67 @@ class UploadClientSACK:
 
     def __time_to_first_unacked_packed_timeout(self):
         """Get the time to the first unacked packet timeout."""
-        if len(self.__unacked_packets) == 0:
+        if len(self.__scoreboard) == 0:
             return 0
 
-        elapsed_time = time.time() - self.__unacked_packets[0][1]
+        elapsed_time = time.time() - self.__scoreboard.oldest_sent_at()
 
-        if elapsed_time > self.__timeout:
+        if elapsed_time > self.__rtt.rto():
             return 0
 
-        return self.__timeout - elapsed_time
-
-    def __packet_was_acked(self, packet):
-        """Check if the packet was acked."""
-        ack_number = self.__last_packet_received.ack_number
-        end_of_packet = self.__start_of_next_seq(packet)
-
-        diference = abs(end_of_packet - ack_number)
-        if diference > SEQUENCE_NUMBER_LIMIT / 2:
-            if ack_number < end_of_packet:
-                ack_number += SEQUENCE_NUMBER_LIMIT
-            else:
-                end_of_packet += SEQUENCE_NUMBER_LIMIT
-
-        return end_of_packet <= ack_number
+        return self.__rtt.rto() - elapsed_time
 
     def __new_ack_received(self):
         """Check if the received packet acked the first unacked packet."""
-        if not self.__unacked_packets:
-            return False
-
-        first_packet = self.__unacked_packets[0][0]
-
-        return self.__packet_was_acked(first_packet)
+        return self.__scoreboard.acks_new_data(self.__last_packet_received.ack_number)
 
     def __sack_received(self):
         return (
             self.__last_packet_received.ack and self.__last_packet_received.block_edges
         )
 
+    def __peer_rwnd(self):
+        """Get the peer's receive window in bytes."""
+        return self.__last_packet_received.rwnd << self.__peer_window_scale
+
+    def __window_allows(self, window_bytes, payload_size):
+        """Check if one more packet fits the send window, always true if idle."""
+        if window_bytes == 0:
+            return True
+
+        return (
+            window_bytes < self.__congestion_state.cwnd()
+            and window_bytes + FIXED_HEADER_SIZE_SACK + payload_size
+            <= self.__peer_rwnd()
+        )
+
+    def __wait_for_window_update(self):
+        """Back off like a persist timer while the peer window is closed and idle."""
+        if self.__peer_rwnd() > 0:
+            self.__window_probes = 0
+            return
+
+        if self.__scoreboard:
+            return  # The ACK of what is in flight updates the window
+
+        persist_timeout = min(
+            self.__rtt.rto() * 2**self.__window_probes,
+            max(MAX_RTO, self.__rtt.rto()),
+        )
+        self.__window_probes += 1
+
+        data = yield persist_timeout  # None when the timeout expires
+        if data is not None:
+            try:
+                self.__last_packet_received = SACKPacket.decode(data)
+            except struct.error:
+                pass  # Malformed, the probe follows all the same
+
     def __create_new_packet(self, syn, fin, ack, upl, dwl, payload):
         packet = SACKPacket(
             self.__next_seq_number(),
             self.__last_received_seq_number(),
-            WINDOW_SIZE,
+            0,  # Only acknowledgments from the server are received
             upl,
             dwl,
             ack,
@@ -103,107 +139,148 @@ class UploadClientSACK:
         self.__last_packet_created = packet
         return packet
 
-    def __resend_window(self):
-        """Resend all packets in the window."""
+    def __retransmit_lost(self):
+        """Retransmit the holes the scoreboard deems lost, as far as cwnd allows."""
+        segments = []
+        pipe = self.__scoreboard.pipe()
+        for segment in self.__scoreboard.lost_segments():
+            if pipe >= self.__congestion_state.cwnd():
+                break
+            segments.append(segment)
+            pipe += segment.packet.length()
+
+        if not segments:
+            return
+
+        send_batch(
+            self.__channel,
+            [segment.packet.encode_parts() for segment in segments],
+            self.__address,
+        )
 
-        # Maybe shrink the window size here
-        size: int = len(self.__unacked_packets)
-        for _ in range(size):
-            packet, _ = self.__unacked_packets.popleft()
-            self.__in_flight_bytes -= packet.length()
-            self.__send_packet(packet)
+        sent_at = time.time()
+        for segment in segments:
+            self.__scoreboard.retransmitted(segment, sent_at)
 
     def __get_packet(self):
-        """Get the next packet from the queue."""
-        self.__socket.settimeout(self.__time_to_first_unacked_packed_timeout())
+        """Wait for the next packet from the server."""
+        # None when the timeout expires
+        data = yield self.__time_to_first_unacked_packed_timeout()
 
         try:
-            data = self.__socket.recv(MAX_PACKET_SIZE_SACK)
+            if data is None:
+                raise TimeoutError("No packet received")
+
             packet = SACKPacket.decode(data)
             self.__last_packet_received = packet
             self.__timeout_count = 0
+            self.__rtt.answered()
 
         # Cuando el tiempo de espera es 0 y no había nada en el socket o se excede el tiempo de espera # noqa
-        except (socket.timeout, BlockingIOError):
+        # A malformed packet counts as one that never arrived
+        except (TimeoutError, struct.error):
             self.__timeout_count += 1
-            if self.__timeout_count >= MAX_TIMEOUT_COUNT:
+            if self.__timeout_count >= MAX_TIMEOUT_COUNT or self.__rtt.gave_up():
                 raise BrokenPipeError(
                     "Max timeouts reached. Closing connection"  # noqa
                 )
 
-            self.__resend_window()
-            self.__get_packet()
+            self.__rtt.backoff()
+            self.__congestion_state = self.__congestion_state.timeout_event()
+            self.__scoreboard.timeout()
+            self.__retransmit_lost()
+            yield from self.__get_packet()
 
     def __send_packet(self, packet: SACKPacket):
-        """Send a packet to the client."""
-        self.__socket.sendto(packet.encode(), self.__address)
-        self.__unacked_packets.append((packet, time.time()))
-        self.__in_flight_bytes += packet.length()
-
-    def __handle_sack(self):
-        """
-        Handle the case when an out of order ack is received. # noqa
-        If it has a block edge, check if there is an unacked packet waiting for that block edge, # noqa
-        if so, remove it from the unacked packets. # noqa
-        """
-
-        # Use an stack to store the queue order
-        unacked_packets = []
-
-        for start, end in self.__last_packet_received.block_edges:
-            while self.__unacked_packets:
-                packet, time = self.__unacked_packets.popleft()
-
-                if packet.seq_number < start:
-                    # packet not in any block edge
-                    unacked_packets.append((packet, time))
-                    continue
+        """Send a packet to the server."""
+        self.__send_packets([packet])
+
+    def __send_packets(self, packets: list[SACKPacket]):
+        """Send a batch of new packets to the server."""
+        send_batch(
+            self.__channel,
+            [packet.encode_parts() for packet in packets],
+            self.__address,
+        )
 
-                elif self.__start_of_next_seq(packet) > end:
-                    # packet not in this block edge, add it back and try the next one # noqa
-                    self.__unacked_packets.appendleft((packet, time))
-                    break
+        sent_at = time.time()
+        for packet in packets:
+            self.__scoreboard.sent(packet, sent_at)
 
-                # packet was acked, no need to resend
-                self.__in_flight_bytes -= packet.length()
+    def __handle_ack(self):
+        """Update the congestion state, fast retransmitting on duplicate ACKs."""
+        previous_state = self.__congestion_state
+        self.__congestion_state = previous_state.ACK_event(
+            self.__last_packet_received.ack_number
+        )
 
-        while unacked_packets:
-            self.__unacked_packets.appendleft(unacked_packets.pop())
+        if isinstance(self.__congestion_state, FastRecovery) and not isinstance(
+            previous_state, FastRecovery
+        ):
+            self.__scoreboard.first_hole_lost()
 
     def __wait_for_ack(self):
         while True:
-            # TODO: follow a cumulative ack policy
-            self.__get_packet()
+            yield from self.__get_packet()
+
+            if self.__last_packet_received.ack:
+                self.__handle_ack()
 
             if self.__sack_received():
-                self.__handle_sack()
+                self.__scoreboard.sack(self.__last_packet_received.block_edges)
 
             if self.__new_ack_received():
                 break
 
-        # At least one packet was acked, remove all acked packets from the unacked packets # noqa
-        while self.__unacked_packets:
-            packet, time = self.__unacked_packets.popleft()
+            # Retransmit the holes found lost right away, not on the timeout
+            self.__retransmit_lost()
 
-            if not self.__packet_was_acked(packet):
-                self.__unacked_packets.appendleft((packet, time))
-                break
+        # At least one packet was acked, forget every packet acked
+        rtt_sample = self.__scoreboard.ack(
+            self.__last_packet_received.ack_number, time.time()
+        )
+        if rtt_sample is not None:
+            self.__rtt.sample(rtt_sample)
+
+    def __handle_syn_ack(self):
+        """Apply the options the server sent along with the SYN-ACK."""
+        syn_ack = self.__last_packet_received
+        options = HandshakeOptions.decode(syn_ack.payload)
+
+        if options.session_port is not None:
+            # The server moved the session to a socket dedicated to this client
+            self.__address = (self.__config.HOST, options.session_port)
+
+        if options.window_scale is not None:
+            self.__peer_window_scale = min(options.window_scale, MAX_WINDOW_SCALE)
 
-            self.__in_flight_bytes -= packet.length()
+        if options.resume_offset is not None:
+            # The server keeps what it has of the file, only the rest is sent
+            self.__resume_offset = options.resume_offset
 
     def __send_comm_start(self):
+        options = HandshakeOptions(
+            window_scale=WINDOW_SCALE_SACK,
+            file_size=os.path.getsize(self.__config.SOURCE_PATH),
+        )
+        if self.__config.RESUME:
+            # An offset of 0 asks the server how much of the file it has
+            options.file_name = self.__config.FILE_NAME
+            options.resume_offset = 0
+
         start_package = self.__create_new_packet(
             True,
             False,
             False,
             True,
             False,
-            b"",
+            options.encode(),
         )
         self.__send_packet(start_package)
         print("Download start packet sent")
 
-        self.__wait_for_ack()
+        yield from self.__wait_for_ack()
+        self.__handle_syn_ack()
         print("Start ack received")
 
     def __send_file_name(self):
@@ -218,20 +295,37 @@ class UploadClientSACK:
         self.__send_packet(file_name_package)
         print(f"File name request sent: {self.__config.FILE_NAME}")
 
-        self.__wait_for_ack()
+        yield from self.__wait_for_ack()
+
+        if self.__last_packet_received.fin:
+            # The server could not make room for the file announced in the SYN
+            fin_ack = self.__create_new_packet(False, False, True, True, False, b"")
+            self.__send_packet(fin_ack)
+            raise DiskFull("The server has no space left for the file")
+
         print("File name ack received")
 
     def __send_file_data(self):
         """Send the file data to the server."""
         file_length = os.path.getsize(self.__config.SOURCE_PATH)
 
-        with open(self.__config.SOURCE_PATH, "rb") as file:
-            data_sent = 0
+        # Payloads are slices of the mapping, retransmissions included
+        with MappedFile(self.__config.SOURCE_PATH) as file:
+            file.seek(self.__resume_offset)
+            data_sent = self.__resume_offset
+            if data_sent > 0:
+                print(f"Resuming upload at {data_sent}/{file_length}")
             data = file.read(MAX_PAYLOAD_SIZE)
-            while len(data) > 0 or self.__unacked_packets:
-                while (
-                    len(data) > 0 and self.__in_flight_bytes < WINDOW_SIZE
-                ):  # TODO: prevent to send more than the window size
+            while len(data) > 0 or self.__scoreboard:
+                # Holes first, then new data
+                self.__retransmit_lost()
+
+                if len(data) > 0:
+                    yield from self.__wait_for_window_update()
+
+                window = []
+                window_bytes = self.__scoreboard.pipe()
+                while len(data) > 0 and self.__window_allows(window_bytes, len(data)):
                     packet = self.__create_new_packet(
                         False,
                         False,
@@ -241,14 +335,16 @@ class UploadClientSACK:
                         data,
                     )
 
-                    self.__send_packet(packet)
+                    window.append(packet)
+                    window_bytes += packet.length()
                     data_sent += len(data)
 
                     print_sent_progress(data_sent, file_length)
 
                     data = file.read(MAX_PAYLOAD_SIZE)
 
-                self.__wait_for_ack()
+                self.__send_packets(window)
+                yield from self.__wait_for_ack()
 
     def __send_comm_fin(self):
         fin_packet = self.__create_new_packet(
@@ -259,9 +355,10 @@ class UploadClientSACK:
             False,
             b"",
         )
+        self.__rtt.closing()
         self.__send_packet(fin_packet)
         print(f"Fin packet sent {fin_packet.seq_number}")
-        self.__wait_for_ack()
+        yield from self.__wait_for_ack()
         print("Fin ack received")
 
     def __check_file_in_fs(self):
@@ -269,27 +366,47 @@ class UploadClientSACK:
         if not os.path.exists(self.__config.SOURCE_PATH):
             raise FileNotFoundError(f"File not found: {self.__config.SOURCE_PATH}")
 
-    def run(self):
+    def __transfer(self):
+        """Upload the file, yielding whenever it waits for a packet."""
         try:
             self.__check_file_in_fs()
             print("Starting file upload")
-            self.__send_comm_start()
-            self.__send_file_name()
-            self.__send_file_data()
-            self.__send_comm_fin()
+            yield from self.__send_comm_start()
+            yield from self.__send_file_name()
+            yield from self.__send_file_data()
+            yield from self.__send_comm_fin()
             print(f"File sent: {self.__config.FILE_NAME}")
-            self.__socket.close()
         except FileNotFoundError as e:
             print("Error: ", e)
             print(
                 "File not found or path is incorrect, please check the path and try again"
             )
             print("Closing connection")
+        except DiskFull as e:
+            print("Failed with error:", e)
+            print("Closing connection")
+
+    def __open_flow(self, transport):
+        """Start the upload sending through an asyncio transport."""
+        self.__channel = transport
+        return self.__transfer()
+
+    def run(self):
+        try:
+            run_blocking(self.__transfer(), self.__socket, MAX_PACKET_SIZE_SACK)
             self.__socket.close()
         except BrokenPipeError as e:
             print(str(e))
             self.__socket.close()
-            exit()
+            raise
+
+    async def run_async(self):
+        """Upload the file from within a running asyncio event loop."""
+        try:
+            await run_flow(self.__open_flow, self.__socket)
+        except BrokenPipeError as e:
+            print(str(e))
+            raise
 
 
 def print_sent_progress(data_sent, file_length):
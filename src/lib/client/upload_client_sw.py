@@ -1,6 +1,10 @@
 import os
 from lib.packets.sw_packet import SWPacket
+from lib.rtt_estimator import RTTEstimator
+from lib.packets.handshake_options import HandshakeOptions
 from lib.client.upload_config import UploadConfig
+from lib.client.client_protocol import run_flow
+from lib.session import run_blocking
 from lib.arguments.constants import (
     MAX_PACKET_SIZE_SW,
     MAX_PAYLOAD_SIZE,
@@ -13,11 +17,12 @@ class UploadClientSW:
     def __init__(self, config: UploadConfig):
         self.__config = config
         self.__socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.__channel = self.__socket  # socket or asyncio transport to send through
         self.__address = (self.__config.HOST, self.__config.PORT)
         self.__last_packet_sent = None
         self.__last_packet_received = None
         self.__timeout_count: int = 0
-        self.__timeout = self.__config.TIMEOUT / 1000
+        self.__rtt = RTTEstimator(self.__config.TIMEOUT / 1000)
 
     def __next_seq_number(self):
         """Get the next sequence number."""
@@ -52,36 +57,56 @@ class UploadClientSW:
         )
 
     def __get_packet(self):
-        """Get the next packet from the queue."""
-        self.__socket.settimeout(self.__timeout)
+        """Wait for the next packet from the server."""
+        data = yield self.__rtt.rto()  # None when the timeout expires
 
         try:
-            data = self.__socket.recv(MAX_PACKET_SIZE_SW)
+            if data is None:
+                raise TimeoutError("No packet received")
+
             packet = SWPacket.decode(data)
             self.__last_packet_received = packet
             self.__timeout_count = 0
+            self.__rtt.answered()
+            self.__rtt.stop_timing()
 
-        except socket.timeout:
+        except TimeoutError:
             self.__timeout_count += 1
-            if self.__timeout_count >= MAX_TIMEOUT_COUNT:
+            if self.__timeout_count >= MAX_TIMEOUT_COUNT or self.__rtt.gave_up():
                 raise BrokenPipeError(
                     "Max timeouts reached. Closing connection"  # noqa
                 )
 
+            self.__rtt.backoff()
             self.__send_packet(self.__last_packet_sent)
-            self.__get_packet()
+            yield from self.__get_packet()
 
     def __send_packet(self, packet):
         """Send a packet to the client."""
-        self.__socket.sendto(packet.encode(), self.__address)
+        if packet is self.__last_packet_sent:
+            # Karn's rule: the answer could belong to either copy
+            self.__rtt.cancel_timing()
+        else:
+            self.__rtt.start_timing()
+
+        self.__channel.sendto(packet.encode(), self.__address)
         self.__last_packet_sent = packet
 
     def __wait_for_ack(self):
-        self.__get_packet()
+        yield from self.__get_packet()
 
         while not self.__last_packet_sent_was_ack():
             self.__send_packet(self.__last_packet_sent)
-            self.__get_packet()
+            yield from self.__get_packet()
+
+    def __handle_syn_ack(self):
+        """Apply the options the server sent along with the SYN-ACK."""
+        syn_ack = self.__last_packet_received
+        options = HandshakeOptions.decode(syn_ack.payload)
+
+        if options.session_port is not None:
+            # The server moved the session to a socket dedicated to this client
+            self.__address = (self.__config.HOST, options.session_port)
 
     def __send_comm_start(self):
         start_package = self.__create_new_packet(
@@ -95,7 +120,8 @@ class UploadClientSW:
         self.__send_packet(start_package)
         print("Download start packet sent")
 
-        self.__wait_for_ack()
+        yield from self.__wait_for_ack()
+        self.__handle_syn_ack()
         print("Start ack received")
 
     def __send_file_name(self):
@@ -110,7 +136,7 @@ class UploadClientSW:
         self.__send_packet(file_name_package)
         print(f"File name request sent: {self.__config.FILE_NAME}")
 
-        self.__wait_for_ack()
+        yield from self.__wait_for_ack()
         print("File name ack received")
 
     def __send_file_data(self):
@@ -134,7 +160,7 @@ class UploadClientSW:
                 print(
                     f"Sent packet of size {round(data_sent / file_length * 100, 2)}% {data_sent}/{file_length}"  # noqa
                 )
-                self.__wait_for_ack()
+                yield from self.__wait_for_ack()
                 data = file.read(MAX_PAYLOAD_SIZE)
 
     def __send_comm_fin(self):
@@ -146,9 +172,10 @@ class UploadClientSW:
             False,
             b"",
         )
+        self.__rtt.closing()
         self.__send_packet(fin_packet)
         print("Fin packet sent")
-        self.__wait_for_ack()
+        yield from self.__wait_for_ack()
         print("Fin ack received")
 
     def __check_file_in_fs(self):
@@ -156,24 +183,41 @@ class UploadClientSW:
         if not os.path.exists(self.__config.SOURCE_PATH):
             raise FileNotFoundError(f"File not found: {self.__config.SOURCE_PATH}")
 
-    def run(self):
+    def __transfer(self):
+        """Upload the file, yielding whenever it waits for a packet."""
         try:
             self.__check_file_in_fs()
             print("Starting file upload")
-            self.__send_comm_start()
-            self.__send_file_name()
-            self.__send_file_data()
-            self.__send_comm_fin()
+            yield from self.__send_comm_start()
+            yield from self.__send_file_name()
+            yield from self.__send_file_data()
+            yield from self.__send_comm_fin()
             print(f"File sent: {self.__config.FILE_NAME}")
-            self.__socket.close()
-        except BrokenPipeError as e:
-            print(str(e))
-            self.__socket.close()
-            exit()
         except FileNotFoundError as e:
             print("Error: ", e)
             print(
                 "File not found or path is incorrect, please check the path and try again"
             )
             print("Closing connection")
-            self.__skt.close()
+
+    def __open_flow(self, transport):
+        """Start the upload sending through an asyncio transport."""
+        self.__channel = transport
+        return self.__transfer()
+
+    def run(self):
+        try:
+            run_blocking(self.__transfer(), self.__socket, MAX_PACKET_SIZE_SW)
+            self.__socket.close()
+        except BrokenPipeError as e:
+            print(str(e))
+            self.__socket.close()
+            raise
+
+    async def run_async(self):
+        """Upload the file from within a running asyncio event loop."""
+        try:
+            await run_flow(self.__open_flow, self.__socket)
+        except BrokenPipeError as e:
+            print(str(e))
+            raise
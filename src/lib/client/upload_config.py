@@ -1,14 +1,17 @@
 from lib.config import Config
 
-SOURCE_PATH_INDEX = 5
-FILE_NAME_INDEX = 6
+SOURCE_PATH_INDEX = 6
+FILE_NAME_INDEX = 7
+RESUME_INDEX = 8
 
 
 class UploadConfig(Config):
     SOURCE_PATH: str
     FILE_NAME: str
+    RESUME: bool
 
     def __init__(self, args: list):
         super().__init__(args)
         self.SOURCE_PATH = args[SOURCE_PATH_INDEX]
         self.FILE_NAME = args[FILE_NAME_INDEX]
+        self.RESUME = args[RESUME_INDEX]
@@ -3,6 +3,7 @@ HOST_INDEX = 1
 PORT_INDEX = 2
 ALGORITHM_INDEX = 3
 TIMEOUT_INDEX = 4
+ENGINE_INDEX = 5
 
 
 class Config:
@@ -11,6 +12,7 @@ class Config:
     PORT: int
     ALGORITHM: str
     TIMEOUT: int
+    ENGINE: str
 
     def __init__(self, args: list):
         self.VERBOSE = args[VERBOSE_INDEX]
@@ -18,3 +20,4 @@ class Config:
         self.PORT = args[PORT_INDEX]
         self.ALGORITHM = args[ALGORITHM_INDEX]
         self.TIMEOUT = args[TIMEOUT_INDEX]
+        self.ENGINE = args[ENGINE_INDEX]
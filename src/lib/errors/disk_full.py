@@ -0,0 +1,3 @@
+class DiskFull(Exception):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
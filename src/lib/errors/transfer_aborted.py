@@ -0,0 +1,3 @@
+class TransferAborted(Exception):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
@@ -0,0 +1,251 @@
+import ctypes
+import errno
+import os
+import socket
+import sys
+
+MAX_BATCH_SIZE: int = 64
+MAX_BATCH_BYTES: int = 2**20  # Receive buffers of a batch
+SOCKADDR_SIZE: int = 128  # sizeof(struct sockaddr_storage)
+
+
+class IOVec(ctypes.Structure):
+    _fields_ = [("iov_base", ctypes.c_void_p), ("iov_len", ctypes.c_size_t)]
+
+
+class MsgHdr(ctypes.Structure):
+    _fields_ = [
+        ("msg_name", ctypes.c_void_p),
+        ("msg_namelen", ctypes.c_uint32),
+        ("msg_iov", ctypes.POINTER(IOVec)),
+        ("msg_iovlen", ctypes.c_size_t),
+        ("msg_control", ctypes.c_void_p),
+        ("msg_controllen", ctypes.c_size_t),
+        ("msg_flags", ctypes.c_int),
+    ]
+
+
+class MMsgHdr(ctypes.Structure):
+    _fields_ = [("msg_hdr", MsgHdr), ("msg_len", ctypes.c_uint)]
+
+
+class PyBuffer(ctypes.Structure):
+    """The Py_buffer a buffer exporter fills, only its address is read."""
+
+    _fields_ = [
+        ("buf", ctypes.c_void_p),
+        ("obj", ctypes.c_void_p),
+        ("len", ctypes.c_ssize_t),
+        ("itemsize", ctypes.c_ssize_t),
+        ("readonly", ctypes.c_int),
+        ("ndim", ctypes.c_int),
+        ("format", ctypes.c_char_p),
+        ("shape", ctypes.c_void_p),
+        ("strides", ctypes.c_void_p),
+        ("suboffsets", ctypes.c_void_p),
+        ("internal", ctypes.c_void_p),
+    ]
+
+
+PyBUF_SIMPLE: int = 0  # A contiguous buffer, read-only or not
+
+
+def _load_libc():
+    """Load recvmmsg/sendmmsg from the C library, None if they are missing."""
+    if not sys.platform.startswith("linux"):
+        return None
+
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        recvmmsg, sendmmsg = libc.recvmmsg, libc.sendmmsg
+    except (OSError, AttributeError):
+        return None
+
+    recvmmsg.argtypes = [
+        ctypes.c_int,
+        ctypes.POINTER(MMsgHdr),
+        ctypes.c_uint,
+        ctypes.c_int,
+        ctypes.c_void_p,
+    ]
+    recvmmsg.restype = ctypes.c_int
+    sendmmsg.argtypes = [
+        ctypes.c_int,
+        ctypes.POINTER(MMsgHdr),
+        ctypes.c_uint,
+        ctypes.c_int,
+    ]
+    sendmmsg.restype = ctypes.c_int
+
+    return libc
+
+
+_libc = _load_libc()
+
+
+def _raise_errno():
+    err = ctypes.get_errno()
+    raise OSError(err, os.strerror(err))
+
+
+def _encode_address(address: tuple[str, int]) -> bytes:
+    """Build the struct sockaddr_in of an IPv4 address."""
+    host, port = address
+    return (
+        socket.AF_INET.to_bytes(2, sys.byteorder)
+        + port.to_bytes(2, "big")
+        + socket.inet_aton(host)
+        + bytes(8)
+    )
+
+
+def _decode_address(name) -> tuple[str, int]:
+    """Parse the struct sockaddr_in filled by the kernel."""
+    raw: bytes = bytes(name[:8])
+    return socket.inet_ntoa(raw[4:8]), int.from_bytes(raw[2:4], "big")
+
+
+class BatchReceiver:
+    """Receive the queued datagrams of a socket in batches, with recvmmsg on Linux."""
+
+    def __init__(self, max_packet_size: int):
+        self.__max_packet_size = max_packet_size
+        self.__batch_size = max(
+            1, min(MAX_BATCH_SIZE, MAX_BATCH_BYTES // max_packet_size)
+        )
+        self.__buffers = [bytearray(max_packet_size) for _ in range(self.__batch_size)]
+        self.__views = [memoryview(buffer) for buffer in self.__buffers]
+        self.__messages = None
+
+        if _libc is not None:
+            self.__prepare_messages()
+
+    def __prepare_messages(self):
+        """Preallocate the headers handed to recvmmsg, pointing to the buffer pool."""
+        size = self.__batch_size
+        self.__names = [ctypes.create_string_buffer(SOCKADDR_SIZE) for _ in range(size)]
+        self.__iovecs = (IOVec * size)()
+        self.__messages = (MMsgHdr * size)()
+
+        for i in range(size):
+            address = ctypes.addressof(
+                (ctypes.c_char * self.__max_packet_size).from_buffer(self.__buffers[i])
+            )
+            self.__iovecs[i].iov_base = address
+            self.__iovecs[i].iov_len = self.__max_packet_size
+            header = self.__messages[i].msg_hdr
+            header.msg_name = ctypes.addressof(self.__names[i])
+            header.msg_iov = ctypes.pointer(self.__iovecs[i])
+            header.msg_iovlen = 1
+
+    def __receive_fallback(self, sock: socket.socket) -> list:
+        datagrams = []
+
+        while len(datagrams) < self.__batch_size:
+            view = self.__views[len(datagrams)]
+            try:
+                size, address = sock.recvfrom_into(
+                    view, self.__max_packet_size, socket.MSG_DONTWAIT
+                )
+            except BlockingIOError:
+                break
+
+            datagrams.append((view[:size], address))
+
+        return datagrams
+
+    def receive(self, sock: socket.socket) -> list[tuple[memoryview, tuple[str, int]]]:
+        """Receive the queued datagrams without blocking, [] if there are none."""
+        if self.__messages is None or sock.family != socket.AF_INET:
+            return self.__receive_fallback(sock)
+
+        for i in range(self.__batch_size):
+            self.__messages[i].msg_hdr.msg_namelen = SOCKADDR_SIZE
+
+        count = _libc.recvmmsg(
+            sock.fileno(),
+            self.__messages,
+            self.__batch_size,
+            socket.MSG_DONTWAIT,
+            None,
+        )
+
+        if count < 0:
+            if ctypes.get_errno() in (errno.EAGAIN, errno.EWOULDBLOCK):
+                return []
+            _raise_errno()
+
+        # The views are over the buffer pool, valid until the next receive
+        return [
+            (
+                self.__views[i][: self.__messages[i].msg_len],
+                _decode_address(self.__names[i]),
+            )
+            for i in range(count)
+        ]
+
+
+def _buffer_address(data: bytes | memoryview) -> int | None:
+    """Get the address of a contiguous buffer to send, read-only or not."""
+    if len(data) == 0:
+        return None
+
+    view = PyBuffer()
+    ctypes.pythonapi.PyObject_GetBuffer(
+        ctypes.py_object(data), ctypes.byref(view), PyBUF_SIMPLE
+    )
+    # The buffer, referenced by the caller, keeps the memory alive
+    address = view.buf
+    ctypes.pythonapi.PyBuffer_Release(ctypes.byref(view))
+    return address
+
+
+def _send_one(sock, parts: list[bytes], address: tuple[str, int]):
+    if isinstance(sock, socket.socket):
+        sock.sendmsg(parts, (), 0, address)
+    else:
+        sock.sendto(b"".join(parts), address)
+
+
+def send_batch(sock, datagrams: list[list[bytes]], address: tuple[str, int]):
+    """Send datagrams given as lists of buffers, gathered with sendmmsg on Linux."""
+    if (
+        _libc is None
+        or len(datagrams) <= 1
+        or not isinstance(sock, socket.socket)
+        or sock.family != socket.AF_INET
+    ):
+        for parts in datagrams:
+            _send_one(sock, parts, address)
+        return
+
+    count = len(datagrams)
+    name = ctypes.create_string_buffer(_encode_address(address), SOCKADDR_SIZE)
+    iovecs = (IOVec * sum(len(parts) for parts in datagrams))()
+    messages = (MMsgHdr * count)()
+
+    iovec_index = 0
+    for i, parts in enumerate(datagrams):
+        header = messages[i].msg_hdr
+        header.msg_name = ctypes.addressof(name)
+        header.msg_namelen = 16  # sizeof(struct sockaddr_in)
+        header.msg_iov = ctypes.pointer(iovecs[iovec_index])
+        header.msg_iovlen = len(parts)
+
+        for data in parts:
+            iovecs[iovec_index].iov_base = _buffer_address(data)
+            iovecs[iovec_index].iov_len = len(data)
+            iovec_index += 1
+
+    sent = 0
+    while sent < count:
+        first = ctypes.cast(
+            ctypes.addressof(messages) + sent * ctypes.sizeof(MMsgHdr),
+            ctypes.POINTER(MMsgHdr),
+        )
+        result = _libc.sendmmsg(sock.fileno(), first, count - sent, 0)
+
+        if result < 0:
+            _raise_errno()
+
+        sent += result
@@ -0,0 +1,11 @@
+import socket
+
+from lib.arguments.constants import SOCKET_RECEIVE_BUFFER_SIZE
+
+
+def size_receive_buffer(sock, size: int = SOCKET_RECEIVE_BUFFER_SIZE):
+    """Ask for a receive buffer that holds a full advertised window, up to rmem_max."""
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, size)
+    except OSError:
+        pass  # The default buffer, congestion control backs off on the drops
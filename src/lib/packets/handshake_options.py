@@ -0,0 +1,90 @@
+from struct import pack, unpack
+
+OPTION_HEADER_SIZE: int = 2
+SESSION_PORT_KIND: int = 1
+WINDOW_SCALE_KIND: int = 2
+FILE_SIZE_KIND: int = 3
+RESUME_OFFSET_KIND: int = 4
+FILE_NAME_KIND: int = 5
+MAX_OPTION_LENGTH: int = 255  # The Length field takes 1B
+
+
+# Handshake packets carry a list of options in their payload. Unknown kinds
+# are skipped, so peers that do not know an option ignore it
+class HandshakeOptions:
+    """
+    +--------------------------+--------------------------+----------------------------------------------------+ # noqa
+    |        Kind (1B)         |       Length (1B)        |                  Value (Length B)                  | # noqa
+    +--------------------------+--------------------------+----------------------------------------------------+ # noqa
+    """
+
+    session_port: int | None
+    window_scale: int | None  # Shift applied to the sender's rwnd, if offered
+    file_size: int | None  # Bytes of the file sent, 0 if the peer has none to send
+    resume_offset: int | None  # Bytes of the file the receiver already has
+    file_name: str | None  # Of the file to resume, to find what the server has
+
+    def __init__(
+        self,
+        session_port: int | None = None,
+        window_scale: int | None = None,
+        file_size: int | None = None,
+        resume_offset: int | None = None,
+        file_name: str | None = None,
+    ):
+        self.session_port = session_port
+        self.window_scale = window_scale
+        self.file_size = file_size
+        self.resume_offset = resume_offset
+        self.file_name = file_name
+
+    def encode(self) -> bytes:
+        data: bytes = b""
+
+        if self.session_port is not None:
+            data += pack("!BBH", SESSION_PORT_KIND, 2, self.session_port)
+
+        if self.window_scale is not None:
+            data += pack("!BBB", WINDOW_SCALE_KIND, 1, self.window_scale)
+
+        if self.file_size is not None:
+            data += pack("!BBQ", FILE_SIZE_KIND, 8, self.file_size)
+
+        if self.resume_offset is not None:
+            data += pack("!BBQ", RESUME_OFFSET_KIND, 8, self.resume_offset)
+
+        if self.file_name is not None:
+            name = self.file_name.encode()
+            if len(name) > MAX_OPTION_LENGTH:
+                raise ValueError("File name too long for a handshake option")
+            data += pack("!BB", FILE_NAME_KIND, len(name)) + name
+
+        return data
+
+    @staticmethod
+    def decode(data: bytes) -> "HandshakeOptions":
+        options = HandshakeOptions()
+
+        offset: int = 0
+        while offset + OPTION_HEADER_SIZE <= len(data):
+            kind, length = unpack("!BB", data[offset : offset + OPTION_HEADER_SIZE])
+            value: bytes = data[
+                offset + OPTION_HEADER_SIZE : offset + OPTION_HEADER_SIZE + length
+            ]
+            offset += OPTION_HEADER_SIZE + length
+
+            if len(value) != length:
+                break  # Truncated option
+
+            if kind == SESSION_PORT_KIND and length == 2:
+                (options.session_port,) = unpack("!H", value)
+            elif kind == WINDOW_SCALE_KIND and length == 1:
+                options.window_scale = value[0]
+            elif kind == FILE_SIZE_KIND and length == 8:
+                (options.file_size,) = unpack("!Q", value)
+            elif kind == RESUME_OFFSET_KIND and length == 8:
+                (options.resume_offset,) = unpack("!Q", value)
+            elif kind == FILE_NAME_KIND:
+                options.file_name = bytes(value).decode()
+
+        return options
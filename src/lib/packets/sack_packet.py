@@ -1,4 +1,6 @@
-from struct import pack, unpack
+from functools import lru_cache
+from itertools import chain
+from struct import Struct, unpack_from
 
 HEADER_MIN_LENGTH_BYTES: int = 16
 BOTH_EDGE_SIZES: int = 8
@@ -6,6 +8,21 @@ LEFT_EDGE: int = 0
 RIGHT_EDGE: int = 1
 
 
+@lru_cache(maxsize=None)
+def header_struct(blocks: int) -> Struct:
+    """Get the precompiled struct of a header carrying `blocks` block edges."""
+    return Struct(f"!IIHBBBBBB{blocks * 2}I")
+
+
+FIXED_HEADER: Struct = header_struct(0)
+
+UPL_FLAG: int = 1 << 0
+DWL_FLAG: int = 1 << 1
+ACK_FLAG: int = 1 << 2
+SYN_FLAG: int = 1 << 3
+FIN_FLAG: int = 1 << 4
+
+
 class SACKPacket:
     """
     +--------------------------+--------------------------+--------------------------+--------------------------+ # noqa
@@ -33,14 +50,22 @@ class SACKPacket:
     +--------------------------+--------------------------+--------------------------+--------------------------+ # noqa
     """
 
+    # Windows keep thousands of packets alive, so they carry no __dict__ and
+    # their five flags are packed in a single int
+    __slots__ = (
+        "seq_number",
+        "ack_number",
+        "rwnd",
+        "flags",
+        "block_edges",
+        "payload",
+        "__header",
+    )
+
     seq_number: int
     ack_number: int
     rwnd: int
-    upl: bool
-    dwl: bool
-    ack: bool
-    syn: bool
-    fin: bool
+    flags: int
     block_edges: list[tuple[int]]
     payload: bytes
 
@@ -61,38 +86,83 @@ class SACKPacket:
         self.ack_number = ack_number
         self.payload = data
         self.rwnd = rwnd
-        self.upl = upl
-        self.dwl = dwl
-        self.ack = ack
-        self.syn = syn
-        self.fin = fin
-        self.block_edges = block_edges
+        self.flags = (
+            (UPL_FLAG if upl else 0)
+            | (DWL_FLAG if dwl else 0)
+            | (ACK_FLAG if ack else 0)
+            | (SYN_FLAG if syn else 0)
+            | (FIN_FLAG if fin else 0)
+        )
+        # Snapshot, receivers build packets from a block list they keep updating
+        self.block_edges = list(block_edges)
 
-    def encode(self) -> bytes:
-        data: bytes = b""
+        # Packets are not modified once built, so their header is cached
+        self.__header: bytes | None = None
+
+    @property
+    def upl(self) -> bool:
+        return bool(self.flags & UPL_FLAG)
+
+    @property
+    def dwl(self) -> bool:
+        return bool(self.flags & DWL_FLAG)
 
-        data += pack(
-            "!II",
+    @property
+    def ack(self) -> bool:
+        return bool(self.flags & ACK_FLAG)
+
+    @property
+    def syn(self) -> bool:
+        return bool(self.flags & SYN_FLAG)
+
+    @property
+    def fin(self) -> bool:
+        return bool(self.flags & FIN_FLAG)
+
+    def encode_header(self) -> bytes:
+        """Encode the fixed header and the block edges, without the payload."""
+        if self.__header is None:
+            self.__header = self.__pack_header()
+
+        return self.__header
+
+    def __pack_header(self) -> bytes:
+        fields = (
             self.seq_number,
             self.ack_number,
+            self.rwnd,
+            self.upl,
+            self.dwl,
+            self.ack,
+            self.syn,
+            self.fin,
+            len(self.block_edges),
         )
 
-        data += pack("!HBB", self.rwnd, self.upl, self.dwl)
+        if not self.block_edges:
+            return FIXED_HEADER.pack(*fields)
 
-        data += pack("!BBBB", self.ack, self.syn, self.fin, len(self.block_edges))
-
-        for edges in self.block_edges:
-            data += pack("!II", edges[LEFT_EDGE], edges[RIGHT_EDGE])
+        return header_struct(len(self.block_edges)).pack(
+            *fields, *chain.from_iterable(self.block_edges)
+        )
 
-        data += self.payload
+    def encode_parts(self) -> list[bytes]:
+        """Encode the packet as header and payload buffers, for scatter / gather I/O."""
+        return [self.encode_header(), self.payload]
 
-        return data
+    def encode(self) -> bytes:
+        return b"".join(self.encode_parts())
 
     def length(self) -> int:
-        return len(self.encode())
+        """Get the size of the packet on the wire, without encoding it."""
+        return (
+            HEADER_MIN_LENGTH_BYTES
+            + len(self.block_edges) * BOTH_EDGE_SIZES
+            + len(self.payload)
+        )
 
     @staticmethod
-    def decode(data: bytes) -> "SACKPacket":
+    def decode(data: bytes | memoryview) -> "SACKPacket":
         seq_number: int
         ack_number: int
         rwnd: int
@@ -105,17 +175,18 @@ class SACKPacket:
         payload: bytes
         block_edges: list[tuple[int]] = list()
 
-        seq_number, ack_number = unpack("!II", data[:8:])
+        seq_number, ack_number = unpack_from("!II", data, 0)
 
-        rwnd, upl, dwl = unpack("!HBB", data[8:12:])
+        rwnd, upl, dwl = unpack_from("!HBB", data, 8)
 
-        ack, syn, fin, blocks = unpack("!BBBB", data[12:16:])
+        ack, syn, fin, blocks = unpack_from("!BBBB", data, 12)
 
         for i in range(blocks):
-            block_edges.append(unpack("!II", data[16 + 8 * i : 24 + 8 * i :]))
+            block_edges.append(unpack_from("!II", data, 16 + 8 * i))
 
         header_length: int = HEADER_MIN_LENGTH_BYTES + blocks * BOTH_EDGE_SIZES
-        payload: bytes = data[header_length::]
+        # The only copy: data may be a view over a reused receive buffer
+        payload: bytes = bytes(data[header_length::])
 
         return SACKPacket(
             seq_number,
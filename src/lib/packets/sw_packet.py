@@ -1,4 +1,10 @@
-from struct import pack, unpack
+from struct import pack, unpack_from
+
+SYN_FLAG: int = 1 << 0
+FIN_FLAG: int = 1 << 1
+ACK_FLAG: int = 1 << 2
+UPL_FLAG: int = 1 << 3
+DWL_FLAG: int = 1 << 4
 
 
 class SWPacket:
@@ -14,13 +20,12 @@ class SWPacket:
     +------------------------+------------------------+------------------------+------------------------+ # noqa
     """
 
+    # No __dict__ and the five flags packed in a single int, as in SACKPacket
+    __slots__ = ("seq_number", "ack_number", "flags", "payload")
+
     seq_number: int
     ack_number: int
-    syn: bool
-    fin: bool
-    ack: bool
-    upl: bool
-    dwl: bool
+    flags: int
     payload: bytes
 
     def __init__(
@@ -37,11 +42,33 @@ class SWPacket:
         self.seq_number = seq_number
         self.payload = data
         self.ack_number = ack_number
-        self.syn = syn
-        self.fin = fin
-        self.ack = ack
-        self.upl = upl
-        self.dwl = dwl
+        self.flags = (
+            (SYN_FLAG if syn else 0)
+            | (FIN_FLAG if fin else 0)
+            | (ACK_FLAG if ack else 0)
+            | (UPL_FLAG if upl else 0)
+            | (DWL_FLAG if dwl else 0)
+        )
+
+    @property
+    def syn(self) -> bool:
+        return bool(self.flags & SYN_FLAG)
+
+    @property
+    def fin(self) -> bool:
+        return bool(self.flags & FIN_FLAG)
+
+    @property
+    def ack(self) -> bool:
+        return bool(self.flags & ACK_FLAG)
+
+    @property
+    def upl(self) -> bool:
+        return bool(self.flags & UPL_FLAG)
+
+    @property
+    def dwl(self) -> bool:
+        return bool(self.flags & DWL_FLAG)
 
     def encode(self) -> bytes:
         data: bytes = b""
@@ -62,20 +89,20 @@ class SWPacket:
         return data
 
     @staticmethod
-    def decode(data: bytes) -> "SWPacket":
+    def decode(data: bytes | memoryview) -> "SWPacket":
         seq_number: int
         ack_number: int
         syn: bool
         fin: bool
         ack: bool
 
-        idx_before_padding: int = 7
         idx_after_padding: int = 8
 
-        seq_number, ack_number, syn, fin, ack, upl, dwl = unpack(
-            "!BBBBBBB", data[:idx_before_padding:]
+        seq_number, ack_number, syn, fin, ack, upl, dwl = unpack_from(
+            "!BBBBBBB", data, 0
         )
 
-        payload: bytes = data[idx_after_padding::]
+        # The only copy: data may be a view over a reused receive buffer
+        payload: bytes = bytes(data[idx_after_padding::])
 
         return SWPacket(seq_number, ack_number, syn, fin, ack, upl, dwl, payload)
@@ -0,0 +1,78 @@
+import time
+
+from lib.arguments.constants import MAX_RTO, MAX_TIMEOUT_COUNT, MIN_RTO
+
+ALPHA: float = 1 / 8
+BETA: float = 1 / 4
+K: int = 4
+
+
+class RTTEstimator:
+    """Retransmission timeout of a session, as in RFC 6298."""
+
+    def __init__(self, initial_rto: float):
+        self.__srtt: float | None = None
+        self.__rttvar: float | None = None
+        self.__estimate: float = initial_rto  # The RTO before any backoff
+        self.__rto: float = initial_rto
+        self.__max_rto: float = max(MAX_RTO, initial_rto)
+        self.__timed_since: float | None = None
+        self.__initial_rto: float = initial_rto
+        self.__silent_since: float | None = None  # Start of the expired waits
+        self.__give_up_after: float | None = None  # Set once only the FIN is left
+
+    def rto(self) -> float:
+        """Get how long to wait for an answer before retransmitting."""
+        return self.__rto
+
+    def closing(self):
+        """Only the FIN is left, a peer that already left is not waited for long."""
+        self.__give_up_after = MAX_TIMEOUT_COUNT * self.__initial_rto
+
+    def gave_up(self) -> bool:
+        """Check if a closing peer has been silent for too long, backoff aside."""
+        return (
+            self.__give_up_after is not None
+            and self.__silent_since is not None
+            and time.monotonic() - self.__silent_since >= self.__give_up_after
+        )
+
+    def answered(self):
+        """A packet arrived, the peer is alive: the backoff no longer applies."""
+        self.__silent_since = None
+        self.__rto = self.__estimate
+
+    def sample(self, rtt: float):
+        """Update the estimate with the round trip of a packet sent only once."""
+        if self.__srtt is None:
+            self.__srtt = rtt
+            self.__rttvar = rtt / 2
+        else:
+            self.__rttvar = (1 - BETA) * self.__rttvar + BETA * abs(self.__srtt - rtt)
+            self.__srtt = (1 - ALPHA) * self.__srtt + ALPHA * rtt
+
+        self.__estimate = min(
+            max(self.__srtt + K * self.__rttvar, MIN_RTO), self.__max_rto
+        )
+        self.__rto = self.__estimate
+
+    def backoff(self):
+        """The timeout expired, wait twice as long for the next answer."""
+        if self.__silent_since is None:
+            # The wait that expired started one RTO ago
+            self.__silent_since = time.monotonic() - self.__rto
+        self.__rto = min(self.__rto * 2, self.__max_rto)
+
+    def start_timing(self):
+        """Time the packet just sent, for endpoints with one packet in flight."""
+        self.__timed_since = time.monotonic()
+
+    def cancel_timing(self):
+        """The timed packet was retransmitted, its answer is no longer a sample."""
+        self.__timed_since = None
+
+    def stop_timing(self):
+        """An answer arrived, sample the timed packet if there is one."""
+        if self.__timed_since is not None:
+            self.sample(time.monotonic() - self.__timed_since)
+            self.__timed_since = None
@@ -0,0 +1,86 @@
+import queue
+import threading
+
+from lib.packets.sack_packet import SACKPacket
+from lib.sack.segment_writer import SegmentWriter
+
+
+class AsyncWriter:
+    """Run the writes of a SegmentWriter on a thread, never blocking the caller."""
+
+    def __init__(self, writer: SegmentWriter):
+        self.__writer = writer
+        # [(packet, offset)], or (None, end_seq_number) to commit the data
+        self.__jobs: queue.SimpleQueue = queue.SimpleQueue()
+        self.__lock = threading.Lock()
+        self.__pending_bytes: int = 0
+        self.__error: BaseException | None = None  # Raised again to the protocol loop
+        self.__thread = threading.Thread(target=self.__run, daemon=True)
+        self.__thread.start()
+
+    @property
+    def pending_bytes(self) -> int:
+        """Bytes queued and not written yet, to count as used receive buffer."""
+        return self.__pending_bytes
+
+    def offset(self, packet: SACKPacket) -> int | None:
+        """Get the file offset of a data packet, None if it has none."""
+        return self.__writer.offset(packet)
+
+    def write(self, packet: SACKPacket, offset: int):
+        """Queue the payload of a packet to be written at its offset."""
+        self.__submit(packet, offset)
+
+    def append(self, packet: SACKPacket):
+        """Queue an in-order packet that had no offset, after the data written."""
+        self.__submit(packet, None)
+
+    def commit(self, end_seq_number: int):
+        """Queue committing the data in order before `end_seq_number`."""
+        self.__jobs.put((None, end_seq_number))
+
+    def __submit(self, packet: SACKPacket, offset: int | None):
+        if self.__error is not None:
+            raise self.__error
+
+        with self.__lock:
+            self.__pending_bytes += packet.length()
+
+        self.__jobs.put((packet, offset))
+
+    def __run(self):
+        while (job := self.__jobs.get()) is not None:
+            packet, offset = job
+            if packet is None:
+                self.__commit(offset)
+                continue
+
+            try:
+                if self.__error is None:
+                    if offset is None:
+                        self.__writer.append(packet)
+                    else:
+                        self.__writer.write(packet, offset)
+            except BaseException as e:
+                self.__error = e  # The next packets are dropped, not written
+            finally:
+                # Released whatever happened, or the rwnd stays closed for good
+                with self.__lock:
+                    self.__pending_bytes -= packet.length()
+
+    def __commit(self, end_seq_number: int):
+        try:
+            if self.__error is None:
+                self.__writer.commit(end_seq_number)
+        except BaseException as e:
+            self.__error = e
+
+    def close(self, end_seq_number: int | None = None):
+        """Wait for the queued writes, then close the file, cut at `end_seq_number`."""
+        self.__jobs.put(None)
+        self.__thread.join()
+        if self.__error is not None:
+            # Packets were dropped, only what was committed before is sure
+            self.__writer.abandon()
+            raise self.__error
+        self.__writer.close(end_seq_number)
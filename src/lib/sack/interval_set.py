@@ -0,0 +1,56 @@
+import heapq
+from bisect import bisect_left, bisect_right
+from itertools import count
+from typing import Iterator
+
+from lib.arguments.constants import MAX_SACK_BLOCKS
+
+
+class IntervalSet:
+    """Disjoint [start, end) intervals of received data, sorted for bisection."""
+
+    def __init__(self):
+        self.__starts: list[int] = []
+        self.__ends: list[int] = []
+        self.__stamps: list[int] = []  # When each interval last grew
+        self.__clock = count()
+
+    def __len__(self) -> int:
+        return len(self.__starts)
+
+    def __iter__(self) -> Iterator[tuple[int, int]]:
+        return zip(self.__starts, self.__ends)
+
+    def add(self, start: int, end: int):
+        """Add [start, end), merging it with the intervals it touches."""
+        # The intervals from first to last overlap or touch the new one
+        first = bisect_left(self.__ends, start)
+        last = bisect_right(self.__starts, end)
+
+        if first < last:
+            start = min(start, self.__starts[first])
+            end = max(end, self.__ends[last - 1])
+
+        self.__starts[first:last] = [start]
+        self.__ends[first:last] = [end]
+        self.__stamps[first:last] = [next(self.__clock)]
+
+    def advance(self, point: int):
+        """Forget everything before `point`, the data there was delivered."""
+        passed = bisect_right(self.__ends, point)
+        del self.__starts[:passed]
+        del self.__ends[:passed]
+        del self.__stamps[:passed]
+
+        if self.__starts and self.__starts[0] < point:
+            self.__starts[0] = point
+
+    def blocks(self, limit: int = MAX_SACK_BLOCKS) -> list[tuple[int, int]]:
+        """Get up to `limit` intervals, the most recently grown first (RFC 2018)."""
+        if len(self.__starts) <= 1:
+            return list(self)
+
+        latest = heapq.nlargest(
+            limit, range(len(self.__starts)), key=self.__stamps.__getitem__
+        )
+        return [(self.__starts[i], self.__ends[i]) for i in latest]
@@ -0,0 +1,47 @@
+import mmap
+
+from lib.arguments.constants import MAX_PAYLOAD_SIZE
+
+
+class MappedFile:
+    """A file to send, mapped read-only and read as memoryviews of the mapping."""
+
+    def __init__(self, file_path: str):
+        with open(file_path, "rb") as file:
+            self.__mapping: mmap.mmap | None = None
+            self.__view = memoryview(b"")
+            if file.seek(0, 2) > 0:  # Empty files cannot be mapped
+                self.__mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                if hasattr(mmap, "MADV_SEQUENTIAL"):
+                    self.__mapping.madvise(mmap.MADV_SEQUENTIAL)
+                self.__view = memoryview(self.__mapping)
+
+        self.__position = 0
+
+    def __len__(self) -> int:
+        return len(self.__view)
+
+    def __enter__(self) -> "MappedFile":
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def seek(self, offset: int):
+        """Move to `offset` of the file, where a resumed transfer starts."""
+        self.__position = min(offset, len(self))
+
+    def read(self, size: int = MAX_PAYLOAD_SIZE) -> memoryview:
+        """Get the next `size` bytes of the file, empty at its end."""
+        data = self.__view[self.__position : self.__position + size]
+        self.__position += len(data)
+        return data
+
+    def close(self):
+        """Unmap the file, or leave it to the payloads still referenced."""
+        self.__view.release()
+        if self.__mapping is not None:
+            try:
+                self.__mapping.close()
+            except BufferError:
+                pass
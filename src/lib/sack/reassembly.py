@@ -0,0 +1,161 @@
+from lib.arguments.constants import (
+    FIXED_HEADER_SIZE_SACK,
+    MAX_PAYLOAD_SIZE_SACK,
+    MAX_SACK_BLOCKS,
+    RECEIVE_BUFFER_SIZE_SACK,
+)
+from lib.packets.sack_packet import SACKPacket
+from lib.sack.interval_set import IntervalSet
+
+SEQUENCE_NUMBER_LIMIT = 2**32
+SLOT_SIZE = FIXED_HEADER_SIZE_SACK + MAX_PAYLOAD_SIZE_SACK  # A full data packet
+SLOTS = RECEIVE_BUFFER_SIZE_SACK // SLOT_SIZE
+
+
+class ReassemblyWindow:
+    """Out-of-order packets in a ring of full-packet slots, marked in a bitmap."""
+
+    def __init__(self, slots: int = SLOTS, slot_size: int = SLOT_SIZE):
+        self.__slot_size = slot_size
+        self.__packets: list[SACKPacket | None] = [None] * slots
+        self.__starts: list[int] = [0] * slots
+        self.__ends: list[int] = [0] * slots
+        self.__bitmap: int = 0  # Bit k set: the k-th slot past the base is filled
+        self.__head: int = 0  # Ring index of the slot at the base
+        self.__base: int = 0  # Next expected sequence number
+        self.__position: int = 0  # Bytes of the stream before the base, unwrapped
+        self.__blocks = IntervalSet()  # Data past the base, by stream position
+        self.buffered_bytes: int = 0
+
+    def __len__(self) -> int:
+        return self.__bitmap.bit_count()
+
+    @property
+    def base(self) -> int:
+        """Next expected sequence number."""
+        return self.__base
+
+    def __slot(self, k: int) -> int:
+        """Get the ring index of the k-th slot past the base."""
+        return (self.__head + k) % len(self.__packets)
+
+    def __offset(self, seq_number: int) -> int:
+        return (seq_number - self.__base) % SEQUENCE_NUMBER_LIMIT
+
+    def __stream_position(self, seq_number: int) -> int:
+        return self.__position + self.__offset(seq_number)
+
+    def __seq_number(self, stream_position: int) -> int:
+        return (self.__base + stream_position - self.__position) % SEQUENCE_NUMBER_LIMIT
+
+    def is_duplicate(self, packet: SACKPacket) -> bool:
+        """Check if the packet was already received, in order or buffered."""
+        offset = self.__offset(packet.seq_number)
+        if offset >= SEQUENCE_NUMBER_LIMIT // 2:
+            return True  # Behind the base, already delivered
+
+        k = offset // self.__slot_size
+        if k >= len(self.__packets) or not self.__bitmap >> k & 1:
+            return False
+
+        return self.__starts[self.__slot(k)] == packet.seq_number
+
+    def store(self, packet: SACKPacket) -> bool:
+        """Buffer an out-of-order packet, False if it has no free slot."""
+        return self.__receive(packet, packet)
+
+    def mark(self, packet: SACKPacket) -> bool:
+        """Like store, but keep only the range of a packet already written."""
+        return self.__receive(packet, None)
+
+    def __receive(self, packet: SACKPacket, kept: SACKPacket | None) -> bool:
+        start = packet.seq_number
+        end = (start + packet.length()) % SEQUENCE_NUMBER_LIMIT
+        # Beyond the window, or in a slot taken by another packet (a FIN right
+        # after a short packet)
+        if not self.__fill(start, end, kept):
+            return False
+
+        self.__blocks.add(
+            self.__stream_position(start),
+            self.__stream_position(start) + packet.length(),
+        )
+        return True
+
+    def __fill(self, start: int, end: int, packet: SACKPacket | None) -> bool:
+        k = self.__offset(start) // self.__slot_size
+        if k >= len(self.__packets) or self.__bitmap >> k & 1:
+            return False
+
+        slot = self.__slot(k)
+        self.__packets[slot] = packet
+        self.__starts[slot] = start
+        self.__ends[slot] = end
+        self.__bitmap |= 1 << k
+        if packet is not None:
+            self.buffered_bytes += packet.length()
+        return True
+
+    def advance(self, base: int) -> list[SACKPacket]:
+        """Move the window to `base` and past the slots then in order, if any."""
+        self.__move(base)
+
+        delivered = []
+        while self.__bitmap & 1:
+            if self.__starts[self.__head] != self.__base:
+                break  # Further into the slot, a hole remains before it
+
+            if self.__packets[self.__head] is not None:
+                delivered.append(self.__packets[self.__head])
+            self.__move(self.__ends[self.__head])
+
+        return delivered
+
+    def __move(self, base: int):
+        shift = self.__offset(base)
+        self.__position += shift
+        self.__blocks.advance(self.__position)
+        if shift % self.__slot_size != 0:
+            # After a short packet the slots no longer line up, lay them out again
+            self.__realign(base)
+            return
+
+        self.__base = base
+        self.__rotate(shift // self.__slot_size)
+
+    def __rotate(self, count: int):
+        """Drop the first `count` slots, the window moved past them."""
+        for k in range(min(count, len(self.__packets))):
+            if self.__bitmap >> k & 1:
+                self.__clear(self.__slot(k))
+
+        self.__bitmap >>= count
+        self.__head = self.__slot(count)
+
+    def __clear(self, slot: int):
+        if self.__packets[slot] is not None:
+            self.buffered_bytes -= self.__packets[slot].length()
+            self.__packets[slot] = None
+
+    def __realign(self, base: int):
+        filled = []
+        for k in range(len(self.__packets)):
+            if self.__bitmap >> k & 1:
+                slot = self.__slot(k)
+                filled.append(
+                    (self.__starts[slot], self.__ends[slot], self.__packets[slot])
+                )
+
+        self.__rotate(len(self.__packets))
+        self.__base = base
+
+        for start, end, packet in filled:
+            if self.__offset(start) < SEQUENCE_NUMBER_LIMIT // 2:
+                self.__fill(start, end, packet)
+
+    def blocks(self, limit: int = MAX_SACK_BLOCKS) -> list[tuple[int, int]]:
+        """Get up to `limit` SACK blocks, the most recently grown first."""
+        return [
+            (self.__seq_number(start), self.__seq_number(end))
+            for start, end in self.__blocks.blocks(limit)
+        ]
@@ -0,0 +1,59 @@
+import os
+from struct import calcsize, pack, unpack
+
+MARKER_SUFFIX: str = ".partial"
+MARKER_FORMAT: str = "!QQ"  # Bytes committed, size of the whole file
+
+
+def marker_path(file_path: str) -> str:
+    return file_path + MARKER_SUFFIX
+
+
+def write_marker(file_path: str, committed: int, file_size: int):
+    """Record that the first `committed` bytes of a file being received are on disk."""
+    path = marker_path(file_path)
+    with open(path + ".tmp", "wb") as marker:
+        marker.write(pack(MARKER_FORMAT, committed, file_size))
+        marker.flush()
+        os.fsync(marker.fileno())
+    os.replace(path + ".tmp", path)
+
+
+def read_marker(file_path: str) -> tuple[int, int] | None:
+    """Get the bytes committed and the size of a file left unfinished, if any."""
+    try:
+        with open(marker_path(file_path), "rb") as marker:
+            data = marker.read()
+    except FileNotFoundError:
+        return None
+
+    if len(data) != calcsize(MARKER_FORMAT):
+        return None  # Not a marker of ours
+    return unpack(MARKER_FORMAT, data)
+
+
+def remove_marker(file_path: str):
+    """The file was received whole, or dropped, there is nothing to resume."""
+    try:
+        os.remove(marker_path(file_path))
+    except FileNotFoundError:
+        pass
+
+
+def commit_file(file, file_path: str, file_size: int):
+    """Make the data appended to an open file durable, then record it."""
+    file.flush()
+    os.fsync(file.fileno())
+    write_marker(file_path, file.tell(), file_size)
+
+
+def resume_offset(file_path: str, file_size: int) -> int:
+    """Get where receiving a file resumes, the bytes its marker says are committed."""
+    marker = read_marker(file_path)
+    if marker is None or not os.path.isfile(file_path):
+        return 0
+
+    committed, size = marker
+    if size != file_size or committed > os.path.getsize(file_path):
+        return 0
+    return committed
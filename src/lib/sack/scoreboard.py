@@ -0,0 +1,148 @@
+from collections import deque
+from typing import Iterator
+
+from lib.packets.sack_packet import SACKPacket
+
+SEQUENCE_NUMBER_LIMIT = 2**32
+DUP_THRESH = 3
+
+
+def seq_before_or_at(a: int, b: int) -> bool:
+    """Check if sequence number a comes before b or is b, across wrap-arounds."""
+    return (b - a) % SEQUENCE_NUMBER_LIMIT < SEQUENCE_NUMBER_LIMIT // 2
+
+
+class Segment:
+    """An outstanding packet and what is known about it."""
+
+    __slots__ = (
+        "packet",
+        "end",
+        "sent_at",
+        "sacked",
+        "lost",
+        "retransmitted",
+        "resent",
+    )
+
+    def __init__(self, packet: SACKPacket, sent_at: float):
+        self.packet = packet
+        self.end: int = (packet.seq_number + packet.length()) % SEQUENCE_NUMBER_LIMIT
+        self.sent_at = sent_at
+        self.sacked: bool = False
+        self.lost: bool = False
+        self.retransmitted: bool = False  # A retransmission is in flight
+        self.resent: bool = False  # Ever retransmitted, so not an RTT sample
+
+    def covered_by(self, start: int, end: int) -> bool:
+        return seq_before_or_at(start, self.packet.seq_number) and seq_before_or_at(
+            self.end, end
+        )
+
+
+class Scoreboard:
+    """Outstanding segments of a SACK sender, with loss recovery as in RFC 6675."""
+
+    def __init__(self):
+        self.__segments: deque[Segment] = deque()
+        self.__pipe: int = 0
+
+    def __len__(self) -> int:
+        return len(self.__segments)
+
+    def pipe(self) -> int:
+        """Get the bytes in flight: holes not deemed lost plus retransmissions."""
+        return self.__pipe
+
+    def oldest_sent_at(self) -> float | None:
+        """Get when the first outstanding segment was (re)sent, for the RTO timer."""
+        if not self.__segments:
+            return None
+        return self.__segments[0].sent_at
+
+    def sent(self, packet: SACKPacket, sent_at: float):
+        """Track a packet sent for the first time."""
+        self.__segments.append(Segment(packet, sent_at))
+        self.__pipe += packet.length()
+
+    def retransmitted(self, segment: Segment, sent_at: float):
+        """Track the retransmission of an outstanding segment."""
+        segment.sent_at = sent_at
+        segment.retransmitted = True
+        segment.resent = True
+        self.__pipe += segment.packet.length()
+
+    def acks_new_data(self, ack_number: int) -> bool:
+        """Check if a cumulative ACK covers the first outstanding segment."""
+        return bool(self.__segments) and seq_before_or_at(
+            self.__segments[0].end, ack_number
+        )
+
+    def ack(self, ack_number: int, acked_at: float) -> float | None:
+        """Forget the segments a cumulative ACK covers, get its RTT if sampled."""
+        rtt_sample = None
+        recovered = False  # The ACK waited for a hole to be filled
+        while self.__segments and seq_before_or_at(self.__segments[0].end, ack_number):
+            segment = self.__segments.popleft()
+            recovered = recovered or segment.resent or segment.sacked
+            rtt_sample = acked_at - segment.sent_at
+
+        self.__update()
+        # Karn's rule: the ACK of a recovery times the recovery, not the path
+        return None if recovered else rtt_sample
+
+    def sack(self, block_edges: list[tuple[int]]):
+        """Mark the segments covered by the SACK blocks of an ACK."""
+        for segment in self.__segments:
+            if not segment.sacked and any(
+                segment.covered_by(start, end) for start, end in block_edges
+            ):
+                segment.sacked = True
+
+        self.__update()
+
+    def timeout(self):
+        """After a retransmission timeout every hole is lost and due again."""
+        for segment in self.__segments:
+            if not segment.sacked:
+                segment.lost = True
+                segment.retransmitted = False
+
+        self.__update()
+
+    def first_hole_lost(self):
+        """Deem the first hole lost, the receiver sent duplicate ACKs for it."""
+        for segment in self.__segments:
+            if not segment.sacked:
+                if not segment.lost:
+                    segment.lost = True
+                    self.__update()
+                return
+
+    def lost_segments(self) -> Iterator[Segment]:
+        """Iterate the holes deemed lost that were not retransmitted yet."""
+        return (
+            segment
+            for segment in self.__segments
+            if segment.lost and not segment.sacked and not segment.retransmitted
+        )
+
+    def __update(self):
+        """Apply the loss rule and recompute the pipe, from the highest segment."""
+        sacked_above = 0
+        pipe = 0
+
+        for segment in reversed(self.__segments):
+            if segment.sacked:
+                sacked_above += 1
+                continue
+
+            if sacked_above >= DUP_THRESH:
+                segment.lost = True
+
+            if not segment.lost:
+                pipe += segment.packet.length()
+            if segment.retransmitted:
+                pipe += segment.packet.length()
+
+        self.__pipe = pipe
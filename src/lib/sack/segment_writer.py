@@ -0,0 +1,114 @@
+import errno
+import os
+
+from lib.arguments.constants import MAX_PAYLOAD_SIZE_SACK
+from lib.errors.disk_full import DiskFull
+from lib.packets.sack_packet import SACKPacket
+from lib.sack.reassembly import SEQUENCE_NUMBER_LIMIT, SLOT_SIZE
+from lib.sack.resume_marker import remove_marker, write_marker
+
+# Without positional writes the file is appended to, in order
+PWRITE_SUPPORTED: bool = hasattr(os, "pwrite")
+
+
+def preallocate(fd: int, size: int):
+    """Reserve the blocks of a file up front, so a full disk is found at once."""
+    if size == 0 or not hasattr(os, "posix_fallocate"):
+        return
+
+    try:
+        os.posix_fallocate(fd, 0, size)
+    except OSError as e:
+        if e.errno in (errno.ENOSPC, errno.EFBIG, errno.EDQUOT):
+            raise DiskFull(f"No space left for a file of {size} bytes") from e
+        if e.errno not in (errno.EINVAL, errno.EOPNOTSUPP):
+            raise
+        # The file system cannot reserve blocks, the file grows as it is written
+
+
+class SegmentWriter:
+    """Write received data packets straight to their file offset, in any order."""
+
+    def __init__(
+        self, file_path: str, data_start: int, file_size: int = 0, file_offset: int = 0
+    ):
+        # Before the file changes, a stale marker could claim bytes it drops
+        write_marker(file_path, file_offset, file_size)
+        flags = os.O_WRONLY | os.O_CREAT | (0 if file_offset else os.O_TRUNC)
+        self.__fd = os.open(file_path, flags, 0o644)
+        self.__file_path = file_path
+        self.__file_size = file_size
+        self.__data_start = data_start
+        self.__file_offset = file_offset
+        self.__size = file_offset  # End of the data written furthest into the file
+        try:
+            os.ftruncate(self.__fd, file_offset)  # Drop what was past the offset
+            preallocate(self.__fd, file_size)
+        except Exception:
+            os.close(self.__fd)
+            raise
+
+    def __grid_offset(self, seq_number: int) -> int | None:
+        # Senders split the file in full packets, so the k-th packet after
+        # data_start holds the k-th MAX_PAYLOAD_SIZE_SACK bytes past file_offset
+        distance = (seq_number - self.__data_start) % SEQUENCE_NUMBER_LIMIT
+        if distance >= SEQUENCE_NUMBER_LIMIT // 2:
+            return None
+
+        index, misaligned = divmod(distance, SLOT_SIZE)
+        if misaligned:
+            return None
+
+        return self.__file_offset + index * MAX_PAYLOAD_SIZE_SACK
+
+    def offset(self, packet: SACKPacket) -> int | None:
+        """Get the file offset of a data packet, None if it has none."""
+        if not packet.payload:
+            return None
+        return self.__grid_offset(packet.seq_number)
+
+    def write(self, packet: SACKPacket, offset: int):
+        """Write the payload of a packet at its offset."""
+        data = memoryview(packet.payload)
+        while data:
+            written = os.pwrite(self.__fd, data, offset)
+            data = data[written:]
+            offset += written
+
+        self.__size = max(self.__size, offset)
+
+    def append(self, packet: SACKPacket):
+        """Write an in-order packet with no offset after the data, as all the next."""
+        self.write(packet, self.__size)
+
+    def __in_order_size(self, end_seq_number: int) -> int:
+        """Get the bytes of the file received in order before `end_seq_number`."""
+        end = self.__grid_offset(end_seq_number)
+        # Off the grid, the data was appended in order
+        return self.__size if end is None else min(self.__size, end)
+
+    def commit(self, end_seq_number: int):
+        """Make the data in order before `end_seq_number` durable, and mark it."""
+        os.fsync(self.__fd)
+        write_marker(
+            self.__file_path, self.__in_order_size(end_seq_number), self.__file_size
+        )
+
+    def abandon(self):
+        """Close the file after a failed write, as committed by the marker."""
+        os.close(self.__fd)
+
+    def close(self, end_seq_number: int | None = None):
+        """Close the file, or cut it at the data in order before `end_seq_number`."""
+        if end_seq_number is None:
+            os.ftruncate(self.__fd, self.__size)
+            os.close(self.__fd)
+            remove_marker(self.__file_path)
+            return
+
+        size = self.__in_order_size(end_seq_number)
+        try:
+            os.ftruncate(self.__fd, size)
+            self.commit(end_seq_number)
+        finally:
+            os.close(self.__fd)
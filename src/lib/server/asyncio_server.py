@@ -0,0 +1,151 @@
+import asyncio
+import os
+from lib.net.socket_buffers import size_receive_buffer
+from lib.server.server_config import ServerConfig
+from lib.server.chunk_cache import ChunkCache
+from lib.server.client_handler_factory import create_client_handler
+from lib.session import Session
+
+
+class ClientSocketProtocol(asyncio.DatagramProtocol):
+    """Forward the datagrams of a socket dedicated to one client."""
+
+    def __init__(self, route, address: tuple[str, int]):
+        self.__route = route
+        self.__address = address
+
+    def connection_made(self, transport: asyncio.DatagramTransport):
+        size_receive_buffer(transport.get_extra_info("socket"))
+
+    def datagram_received(self, data: bytes, address: tuple[str, int]):
+        self.__route(data, self.__address)
+
+    def error_received(self, exc: Exception):
+        # ICMP errors are handled like losses, the session retransmits on timeout
+        pass
+
+
+class ServerProtocol(asyncio.DatagramProtocol):
+    """Route datagrams to client sessions driven by the asyncio event loop."""
+
+    def __init__(self, config: ServerConfig):
+        self.__config = config
+        self.__transport: asyncio.DatagramTransport | None = None
+        self.__clients_handlers = {}  # {address: Session}
+        self.__timers = {}  # {address: asyncio.TimerHandle}
+        self.__clients_transports = {}  # {address: transport dedicated to the client}
+        self.__pending = {}  # {address: [datagrams received while opening its socket]}
+        self.__tasks = set()
+        # Chunks of the files sent, shared by the sessions of this process
+        self.__chunk_cache = ChunkCache(config.CACHE_SIZE * 2**20)
+
+    def __step(self, address: tuple[str, int], session: Session, resume, *args):
+        """Resume a session and arm its timer, forgetting it once it ends."""
+        timer = self.__timers.pop(address, None)
+        if timer is not None:
+            timer.cancel()
+
+        try:
+            resume(*args)
+        except Exception as e:
+            print(f"Client {address} failed: {e}")
+
+        if session.finished:
+            print("Client disconnected, ", address)
+            del self.__clients_handlers[address]
+            self.__clients_transports.pop(address).close()
+            return
+
+        loop = asyncio.get_running_loop()
+        self.__timers[address] = loop.call_at(
+            session.deadline, self.__step, address, session, session.expire
+        )
+
+    async def __handle_client(self, address: tuple[str, int]):
+        """Start handling a new client through a socket on an ephemeral port."""
+        print("Handling client, ", address)
+
+        loop = asyncio.get_running_loop()
+        try:
+            transport, _ = await loop.create_datagram_endpoint(
+                lambda: ClientSocketProtocol(self.datagram_received, address),
+                local_addr=(self.__config.HOST, 0),
+                remote_addr=address,
+            )
+        except OSError as e:
+            print(f"Client {address} failed: {e}")
+            del self.__pending[address]
+            return
+
+        self.__clients_transports[address] = transport
+        client = create_client_handler(
+            self.__config,
+            address,
+            transport,
+            transport.get_extra_info("sockname")[1],
+            self.__chunk_cache,
+        )
+        session = Session(client.handle_request())
+        self.__clients_handlers[address] = session
+        self.__step(address, session, session.start)
+
+        for data in self.__pending.pop(address):
+            if session.finished:
+                break
+
+            self.__step(address, session, session.deliver, data)
+
+    def connection_made(self, transport: asyncio.DatagramTransport):
+        self.__transport = transport
+        size_receive_buffer(transport.get_extra_info("socket"))
+
+    def datagram_received(self, data: bytes, address: tuple[str, int]):
+        if address in self.__pending:
+            self.__pending[address].append(data)
+            return
+
+        session = self.__clients_handlers.get(address)
+        if session is None:
+            self.__pending[address] = [data]
+            task = asyncio.ensure_future(self.__handle_client(address))
+            self.__tasks.add(task)
+            task.add_done_callback(self.__tasks.discard)
+            return
+
+        if not session.finished:
+            self.__step(address, session, session.deliver, data)
+
+    def error_received(self, exc: Exception):
+        # ICMP errors are handled like losses, the sessions retransmit on timeout
+        pass
+
+
+class AsyncioServer:
+    def __init__(self, config: ServerConfig):
+        self.__config = config
+
+    def __check_storage_dir(self):
+        """Check if the storage directory exists and create it if it doesn't."""
+        if not os.path.exists(self.__config.STORAGE_DIR_PATH):
+            os.makedirs(self.__config.STORAGE_DIR_PATH, exist_ok=True)
+
+    async def serve(self):
+        """Serve clients from within a running asyncio event loop."""
+        self.__check_storage_dir()
+
+        loop = asyncio.get_running_loop()
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: ServerProtocol(self.__config),
+            local_addr=(self.__config.HOST, self.__config.PORT),
+            reuse_port=self.__config.PROCESSES > 1,
+        )
+
+        try:
+            await loop.create_future()  # Serve until cancelled
+        finally:
+            transport.close()
+
+    def run(self):
+        """Main server function."""
+        print("Server started")
+        asyncio.run(self.serve())
@@ -0,0 +1,127 @@
+import os
+from collections import OrderedDict
+
+from lib.arguments.constants import CACHE_CHUNK_SIZE, MAX_PAYLOAD_SIZE
+
+
+class ChunkCache:
+    """LRU cache of the file chunks the sessions of a server process read."""
+
+    def __init__(self, capacity: int, chunk_size: int = CACHE_CHUNK_SIZE):
+        self.__capacity = capacity
+        self.__chunk_size = chunk_size
+        self.__chunks: OrderedDict[tuple[str, int, int], memoryview] = OrderedDict()
+        self.__size: int = 0  # Bytes of the chunks cached
+        self.__hits: int = 0
+        self.__misses: int = 0
+
+    def __len__(self) -> int:
+        return len(self.__chunks)
+
+    @property
+    def chunk_size(self) -> int:
+        return self.__chunk_size
+
+    @property
+    def size(self) -> int:
+        """Bytes of the chunks cached."""
+        return self.__size
+
+    @property
+    def keeps_chunks(self) -> bool:
+        """Check if a chunk read fits the cache, else files are read directly."""
+        return self.__capacity >= self.__chunk_size
+
+    @property
+    def hits(self) -> int:
+        """Chunks found in the cache."""
+        return self.__hits
+
+    @property
+    def misses(self) -> int:
+        """Chunks read from their file."""
+        return self.__misses
+
+    def chunk(self, file, path: str, mtime: int, offset: int) -> memoryview:
+        """Get the chunk of a file at `offset`, read from `file` on a miss."""
+        key = (path, mtime, offset)
+        chunk = self.__chunks.get(key)
+        if chunk is not None:
+            self.__hits += 1
+            self.__chunks.move_to_end(key)
+            return chunk
+
+        self.__misses += 1
+
+        # Immutable, the sessions sharing it cannot change it under each other
+        file.seek(offset)
+        chunk = memoryview(file.read(self.__chunk_size))
+
+        if len(chunk) <= self.__capacity:
+            self.__chunks[key] = chunk
+            self.__size += len(chunk)
+            self.__evict()
+
+        return chunk
+
+    def __evict(self):
+        """Drop the least recently used chunks until the cache fits its capacity."""
+        while self.__size > self.__capacity:
+            _, chunk = self.__chunks.popitem(last=False)
+            self.__size -= len(chunk)
+
+
+class CachedFile:
+    """A file to send, read as memoryviews of the chunks of a ChunkCache."""
+
+    def __init__(self, cache: ChunkCache, file_path: str):
+        self.__cache = cache
+        self.__path = os.path.realpath(file_path)
+        self.__file = open(file_path, "rb", buffering=0)
+        status = os.fstat(self.__file.fileno())
+        self.__mtime: int = status.st_mtime_ns
+        self.__length: int = status.st_size
+        self.__position: int = 0
+
+    def __len__(self) -> int:
+        return self.__length
+
+    def __enter__(self) -> "CachedFile":
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def seek(self, offset: int):
+        """Move to `offset` of the file, where a resumed transfer starts."""
+        self.__position = min(offset, len(self))
+
+    def read(self, size: int = MAX_PAYLOAD_SIZE) -> memoryview:
+        """Get the next `size` bytes of the file, empty at its end."""
+        if not self.__cache.keeps_chunks:
+            # A whole chunk per payload would be read only to be dropped
+            self.__file.seek(self.__position)
+            data = memoryview(self.__file.read(size))
+            self.__position += len(data)
+            return data
+
+        parts = []
+        while size > 0 and self.__position < self.__length:
+            start, skip = divmod(self.__position, self.__cache.chunk_size)
+            start *= self.__cache.chunk_size
+            chunk = self.__cache.chunk(self.__file, self.__path, self.__mtime, start)
+            data = chunk[skip : skip + size]
+            if not data:
+                break  # The file shrank since it was opened
+
+            parts.append(data)
+            self.__position += len(data)
+            size -= len(data)
+
+        if len(parts) == 1:
+            return parts[0]
+        # Across chunks, a size the chunks are not a multiple of
+        return memoryview(b"".join(parts))
+
+    def close(self):
+        self.__file.close()
@@ -0,0 +1,39 @@
+from lib.server.server_config import ServerConfig
+from lib.server.chunk_cache import ChunkCache
+from lib.server.client_handler_sw import ClientHandlerSW
+from lib.server.client_handler_sack import ClientHandlerSACK
+from lib.errors.unknown_algorithm import UnknownAlgorithm
+
+
+def create_client_handler(
+    config: ServerConfig,
+    address: tuple[str, int],
+    socket,
+    session_port: int | None = None,
+    chunk_cache: ChunkCache | None = None,
+) -> ClientHandlerSW | ClientHandlerSACK:
+    """Create the handler for a new client, sending through `socket`."""
+    match (config.ALGORITHM):
+        case "sw":
+            return ClientHandlerSW(
+                address,
+                socket,
+                config.STORAGE_DIR_PATH,
+                config.TIMEOUT,
+                session_port,
+                chunk_cache,
+            )
+
+        case "sack":
+            return ClientHandlerSACK(
+                address,
+                socket,
+                config.STORAGE_DIR_PATH,
+                config.TIMEOUT,
+                session_port,
+                config.ACK_FREQUENCY,
+                chunk_cache,
+            )
+
+        case _:
+            raise UnknownAlgorithm(f"Unknown algorithm: {config.ALGORITHM}")
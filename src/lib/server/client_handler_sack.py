@@ -1,41 +1,85 @@
 import os
-import queue
+import struct
 from collections import deque
 import time
 from lib.arguments.constants import (
+    ACK_DELAY,
+    DEFAULT_ACK_FREQUENCY,
+    FILE_WRITE_BUFFER_SIZE,
+    FIXED_HEADER_SIZE_SACK,
     MAX_PAYLOAD_SIZE,
+    MAX_RTO,
+    MAX_RWND,
     MAX_TIMEOUT_COUNT,
+    MAX_WINDOW_SCALE,
+    RECEIVE_BUFFER_SIZE_SACK,
+    RESUME_COMMIT_INTERVAL,
+    WINDOW_SCALE_SACK,
 )
 from lib.packets.sack_packet import SACKPacket
+from lib.errors.disk_full import DiskFull
 from lib.errors.invalid_file_name import InvalidFileName
+from lib.errors.transfer_aborted import TransferAborted
+from lib.packets.handshake_options import HandshakeOptions
+from lib.net.batch_io import send_batch
+from lib.rtt_estimator import RTTEstimator
+from lib.sack.reassembly import ReassemblyWindow
+from lib.sack.async_writer import AsyncWriter
+from lib.sack.resume_marker import (
+    commit_file,
+    remove_marker,
+    resume_offset,
+    write_marker,
+)
+from lib.sack.segment_writer import PWRITE_SUPPORTED, SegmentWriter, preallocate
+from lib.sack.scoreboard import Scoreboard
+from lib.server.chunk_cache import CachedFile, ChunkCache
+from lib.states.fast_recovery import FastRecovery
+from lib.states.slow_start import SlowStart
+from lib.states.state import State
 
 SEQUENCE_NUMBER_LIMIT = 2**32
 
-RWND = MAX_PAYLOAD_SIZE * 2
-
 
 class ClientHandlerSACK:
-    def __init__(self, address, socket, folder_path, timeout):
-        self.data_queue = queue.Queue()
+    def __init__(
+        self,
+        address,
+        socket,
+        folder_path,
+        timeout,
+        session_port=None,
+        ack_frequency=DEFAULT_ACK_FREQUENCY,
+        chunk_cache=None,
+    ):
         self.address = address
         self.__socket = socket
+        self.__session_port = session_port  # Port of a socket dedicated to the client
         self.__folder_path = folder_path
+        # Files sent are read through it, without one chunks are not kept
+        self.__chunk_cache = chunk_cache if chunk_cache is not None else ChunkCache(0)
         self.__last_packet_created = None
         self.__timeout_count: int = 0
-        self.__timeout = timeout / 1000
+        self.__rtt = RTTEstimator(timeout / 1000)
 
         # Reciever
         self.__in_order_packets = deque()  # [packets]
-        self.__out_of_order_packets = {}  # {seq_number: packets}
-        self.__received_blocks_edges = []  # [(start, end)]
+        self.__reassembly = ReassemblyWindow()  # out of order packets
+        self.__writer: AsyncWriter | None = None  # Writes data by file offset
         self.__last_ordered_packet_received = None
+        self.__window_scale: int = 0  # Shift of the rwnd advertised, once agreed
+        self.__ack_frequency: int = ack_frequency  # In-order data packets per ACK
+        self.__packets_to_ack: int = 0  # In-order data packets not ACKed yet
 
         # Sender
-        self.__unacked_packets = (
-            deque()
-        )  # list of unacked packets (packet, time) # noqa
+        self.__scoreboard = Scoreboard()  # unacked packets
         self.__last_packet_received = None
-        self.__in_flight_bytes = 0
+        self.__congestion_state: State = SlowStart()
+        self.__window_probes: int = 0  # Consecutive probes of a closed peer window
+        self.__peer_window_scale: int = 0  # Shift of the client's rwnd, once agreed
+        self.__file_size: int | None = None  # Offered in the SYN by newer clients
+        self.__resume_offset: int = 0  # Bytes of the file the receiver already has
+        self.__committed_seq_number: int = 0  # End of the data last made durable
 
     def __start_of_next_seq(self, packet):
         """Get the start of the next sequence number."""
@@ -57,7 +101,7 @@ class ClientHandlerSACK:
         """Get the next expected sequence number."""
         if self.__last_ordered_packet_received is None:
             return 0
-        return self.__start_of_next_seq(self.__last_ordered_packet_received)
+        return self.__reassembly.base
 
     def __last_packet_is_ordered(self):
         """Check if the last packet received is in order."""
@@ -70,110 +114,108 @@ class ClientHandlerSACK:
 
     def __time_to_first_unacked_packed_timeout(self):
         """Get the time to the first unacked packet timeout."""
-        if len(self.__unacked_packets) == 0:
+        if len(self.__scoreboard) == 0:
             return 0
 
-        elapsed_time = time.time() - self.__unacked_packets[0][1]
+        elapsed_time = time.time() - self.__scoreboard.oldest_sent_at()
 
-        if elapsed_time > self.__timeout:
+        if elapsed_time > self.__rtt.rto():
             return 0
 
-        return self.__timeout - elapsed_time
-
-    def __packet_was_acked(self, packet):
-        """Check if the packet was acked."""
-        ack_number = self.__last_packet_received.ack_number
-        end_of_packet = self.__start_of_next_seq(packet)
-
-        difference = abs(end_of_packet - ack_number)
-        if difference > SEQUENCE_NUMBER_LIMIT / 2:
-            if ack_number < end_of_packet:
-                ack_number += SEQUENCE_NUMBER_LIMIT
-            else:
-                end_of_packet += SEQUENCE_NUMBER_LIMIT
-
-        return end_of_packet <= ack_number
+        return self.__rtt.rto() - elapsed_time
 
     def __new_ack_received(self):
         """Check if the received packet acked the first unacked packet."""
-        if not self.__unacked_packets:
-            return False
-
-        first_packet = self.__unacked_packets[0][0]
-
-        return self.__packet_was_acked(first_packet)
+        return self.__scoreboard.acks_new_data(self.__last_packet_received.ack_number)
 
     def __sack_received(self):
         return (
             self.__last_packet_received.ack and self.__last_packet_received.block_edges
         )
 
-    def __reorder_blocks(self):
-        while self.__next_expected_seq_number() in self.__out_of_order_packets:
-            self.__last_ordered_packet_received = self.__out_of_order_packets.pop(
-                self.__next_expected_seq_number()
-            )
-            self.__in_order_packets.append(self.__last_ordered_packet_received)
-
-            _, first_block_end = self.__received_blocks_edges[0]
-
-            if first_block_end == self.__next_expected_seq_number():
-                self.__received_blocks_edges.pop(0)
-            else:
-                self.__received_blocks_edges[0] = (
-                    self.__next_expected_seq_number(),
-                    first_block_end,
-                )
+    def __file_offset(self, packet):
+        """Get where a data packet goes in the file, None if it must wait its turn."""
+        if self.__writer is None:
+            return None
+        return self.__writer.offset(packet)
 
     def __add_in_order_packet(self):
-        """Add the in order packet to the queue."""
-        self.__last_ordered_packet_received = self.__last_packet_received
-        self.__in_order_packets.append(self.__last_ordered_packet_received)
+        """Add the in order packet to the queue, or write it right away."""
+        packet = self.__last_packet_received
+        self.__last_ordered_packet_received = packet
+
+        offset = self.__file_offset(packet)
+        if offset is None:
+            self.__in_order_packets.append(packet)
+        else:
+            self.__writer.write(packet, offset)
+
+        # Along with the buffered packets it puts in order, the ones already
+        # written only move the window
+        end = self.__start_of_next_seq(packet)
+        for packet in self.__reassembly.advance(end):
+            self.__last_ordered_packet_received = packet
+            self.__in_order_packets.append(packet)
 
-        # Try to reorder the buffered packets
-        self.__reorder_blocks()
+    def __end_of_last_ordered_packet(self):
+        """Get the last received sequence number."""
+        if self.__last_ordered_packet_received is None:
+            return 0
+        return self.__reassembly.base
 
-    def __add_out_of_order_packet(self):
-        """Add the out of order packet to the queue."""
-        start = self.__last_packet_received.seq_number
-        end = start + self.__last_packet_received.length()
+    def __free_buffer_space(self):
+        """Get the free space of the receive buffer, with the writes queued."""
+        buffered = self.__reassembly.buffered_bytes + sum(
+            packet.length() for packet in self.__in_order_packets
+        )
+        if self.__writer is not None:
+            buffered += self.__writer.pending_bytes  # Closes as the disk falls behind
+        return max(0, RECEIVE_BUFFER_SIZE_SACK - buffered)
 
-        self.__out_of_order_packets[start] = self.__last_packet_received
+    def __fits_receive_buffer(self, packet):
+        """Check if the receive buffer has room for the data of a packet."""
+        return not packet.payload or packet.length() <= self.__free_buffer_space()
 
-        for block_index in range(len(self.__received_blocks_edges)):
-            block_start, block_end = self.__received_blocks_edges[block_index]
+    def __rwnd(self):
+        """Get the Receiver Window advertised to the peer, scaled if negotiated."""
+        return min(self.__free_buffer_space() >> self.__window_scale, MAX_RWND)
 
-            if end == block_start:
-                self.__received_blocks_edges[block_index] = (start, block_end)
-                return
+    def __peer_rwnd(self):
+        """Get the peer's receive window in bytes."""
+        return self.__last_packet_received.rwnd << self.__peer_window_scale
 
-            if start == block_end:
-                self.__received_blocks_edges[block_index] = (block_start, end)
+    def __window_allows(self, window_bytes, payload_size):
+        """Check if one more packet fits the send window, always true if idle."""
+        if window_bytes == 0:
+            return True
 
-                if block_index + 1 < len(self.__received_blocks_edges):
-                    next_block_start, _ = self.__received_blocks_edges[block_index + 1]
-                    if next_block_start == end:
-                        _, next_block_end = self.__received_blocks_edges.pop(
-                            block_index + 1
-                        )
-                        self.__received_blocks_edges[block_index] = (
-                            block_start,
-                            next_block_end,
-                        )
-                return
+        return (
+            window_bytes < self.__congestion_state.cwnd()
+            and window_bytes + FIXED_HEADER_SIZE_SACK + payload_size
+            <= self.__peer_rwnd()
+        )
 
-            if end < block_start:
-                self.__received_blocks_edges.insert(block_index, (start, end))
-                return
+    def __wait_for_window_update(self):
+        """Back off like a persist timer while the peer window is closed and idle."""
+        if self.__peer_rwnd() > 0:
+            self.__window_probes = 0
+            return
 
-        if (start, end) not in self.__received_blocks_edges:
-            self.__received_blocks_edges.append((start, end))
+        if self.__scoreboard:
+            return  # The ACK of what is in flight updates the window
 
-    def __end_of_last_ordered_packet(self):
-        """Get the last received sequence number."""
-        if self.__last_ordered_packet_received is None:
-            return 0
-        return self.__start_of_next_seq(self.__last_ordered_packet_received)
+        persist_timeout = min(
+            self.__rtt.rto() * 2**self.__window_probes,
+            max(MAX_RTO, self.__rtt.rto()),
+        )
+        self.__window_probes += 1
+
+        data = yield persist_timeout  # None when the timeout expires
+        if data is not None:
+            try:
+                self.__last_packet_received = SACKPacket.decode(data)
+            except struct.error:
+                pass  # Malformed, the probe follows all the same
 
     def __create_new_packet(self, syn, fin, ack, upl, dwl, payload):
         ack_num = (
@@ -185,121 +227,139 @@ class ClientHandlerSACK:
         packet = SACKPacket(
             self.__next_seq_number(),
             ack_num,
-            RWND,
+            self.__rwnd(),
             upl,
             dwl,
             ack,
             syn,
             fin,
-            self.__received_blocks_edges,
+            self.__reassembly.blocks(),
             payload,
         )
 
         self.__last_packet_created = packet
+        self.__packets_to_ack = 0  # Every packet carries the cumulative ACK
         return packet
 
-    def __resend_window(self):
-        """Resend all packets in the window."""
+    def __retransmit_lost(self):
+        """Retransmit the holes the scoreboard deems lost, as far as cwnd allows."""
+        segments = []
+        pipe = self.__scoreboard.pipe()
+        for segment in self.__scoreboard.lost_segments():
+            if pipe >= self.__congestion_state.cwnd():
+                break
+            segments.append(segment)
+            pipe += segment.packet.length()
+
+        if not segments:
+            return
 
-        # Maybe shrink the window size here
-        size: int = len(self.__unacked_packets)
-        for _ in range(size):
-            packet, _ = self.__unacked_packets.popleft()
-            self.__in_flight_bytes -= packet.length()
+        self.__transmit([segment.packet for segment in segments])
 
-            self.__send_packet(packet)
+        sent_at = time.time()
+        for segment in segments:
+            self.__scoreboard.retransmitted(segment, sent_at)
 
     def __get_packet(self):
-        """Get the next packet from the queue."""
+        """Wait for the next packet from the client."""
 
         timeout: float
         if self.__last_packet_received is None or self.__last_packet_received.upl:
-            timeout = self.__timeout
+            timeout = self.__rtt.rto()
         elif self.__last_packet_received.dwl:
             timeout = self.__time_to_first_unacked_packed_timeout()
 
+        data = yield timeout  # None when the timeout expires
+
         try:
-            data = self.data_queue.get(timeout=timeout)
+            if data is None:
+                raise TimeoutError("No packet received")
+
             packet = SACKPacket.decode(data)
             self.__last_packet_received = packet
             self.__timeout_count = 0
+            self.__rtt.answered()
 
-        except (queue.Empty, Exception):
+        except Exception:
             self.__timeout_count += 1
-            if self.__timeout_count >= MAX_TIMEOUT_COUNT:
+            if self.__timeout_count >= MAX_TIMEOUT_COUNT or self.__rtt.gave_up():
                 raise BrokenPipeError(
                     f"Max timeouts reached. Closing connection {self.address}"  # noqa
                 )
 
+            self.__rtt.backoff()
             if self.__last_packet_received is None or self.__last_packet_received.upl:
                 self.__send_packet(self.__last_packet_created)
             elif self.__last_packet_received.dwl:
-                self.__resend_window()
+                self.__congestion_state = self.__congestion_state.timeout_event()
+                self.__scoreboard.timeout()
+                self.__retransmit_lost()
 
-            self.__get_packet()
+            yield from self.__get_packet()
 
     def __send_packet(self, packet: SACKPacket):
         """Send a packet to the client."""
-        self.__socket.sendto(packet.encode(), self.address)
+        self.__send_packets([packet])
 
-        if self.__last_packet_received.dwl:
-            self.__unacked_packets.append((packet, time.time()))
-            self.__in_flight_bytes += packet.length()
+    def __send_packets(self, packets: list[SACKPacket]):
+        """Send a batch of new packets to the client."""
+        self.__transmit(packets)
 
-    def __handle_sack(self):
-        """
-        Handle the case when an out of order ack is received. # noqa
-        If it has a block edge, check if there is an unacked packet waiting for that block edge, # noqa
-        if so, remove it from the unacked packets. # noqa
-        """
-
-        # Use an stack to store the queue order
-        unacked_packets = []
-
-        for start, end in self.__last_packet_received.block_edges:
-            while self.__unacked_packets:
-                packet, time = self.__unacked_packets.popleft()
-
-                if packet.seq_number < start:
-                    # packet not in any block edge
-                    unacked_packets.append((packet, time))
-                    continue
+        if self.__last_packet_received.dwl:
+            sent_at = time.time()
+            for packet in packets:
+                self.__scoreboard.sent(packet, sent_at)
 
-                elif self.__start_of_next_seq(packet) > end:
-                    # packet not in this block edge, add it back and try the next one # noqa
-                    self.__unacked_packets.appendleft((packet, time))
-                    break
+    def __transmit(self, packets: list[SACKPacket]):
+        """Hand a batch of packets to the socket."""
+        try:
+            send_batch(
+                self.__socket,
+                [packet.encode_parts() for packet in packets],
+                self.address,
+            )
+        except ConnectionRefusedError:
+            # ICMP error on the dedicated socket, the client may be gone
+            pass
 
-                # packet was acked, no need to resend
-                self.__in_flight_bytes -= packet.length()
+    def __handle_ack(self):
+        """Update the congestion state, fast retransmitting on duplicate ACKs."""
+        previous_state = self.__congestion_state
+        self.__congestion_state = previous_state.ACK_event(
+            self.__last_packet_received.ack_number
+        )
 
-        while unacked_packets:
-            self.__unacked_packets.appendleft(unacked_packets.pop())
+        if isinstance(self.__congestion_state, FastRecovery) and not isinstance(
+            previous_state, FastRecovery
+        ):
+            self.__scoreboard.first_hole_lost()
 
     def __wait_for_ack(self):
         while True:
-            # TODO: follow a cumulative ack policy
-            self.__get_packet()
+            yield from self.__get_packet()
+
+            if self.__last_packet_received.fin and not self.__last_packet_received.ack:
+                # Only a receiver that gives up sends a FIN before the sender
+                raise TransferAborted("The client stopped the transfer")
+
+            if self.__last_packet_received.ack:
+                self.__handle_ack()
 
             if self.__sack_received():
-                self.__handle_sack()
+                self.__scoreboard.sack(self.__last_packet_received.block_edges)
 
             if self.__new_ack_received():
                 break
 
-            else:
-                pass
-                # TODO: Repeated ACK
-
-        # At least one packet was acked, remove all acked packets from the unacked packets # noqa
-        while self.__unacked_packets:
-            packet, time = self.__unacked_packets.popleft()
-
-            if not self.__packet_was_acked(packet):
-                self.__unacked_packets.appendleft((packet, time))
-                break
+            # Retransmit the holes found lost right away, not on the timeout
+            self.__retransmit_lost()
 
-            self.__in_flight_bytes -= packet.length()
+        # At least one packet was acked, forget every packet acked
+        rtt_sample = self.__scoreboard.ack(
+            self.__last_packet_received.ack_number, time.time()
+        )
+        if rtt_sample is not None:
+            self.__rtt.sample(rtt_sample)
 
     def __send_ack(self):
         """Send an acknowledgment to the client."""
@@ -336,46 +396,125 @@ class ClientHandlerSACK:
             self.__last_packet_received.dwl,
             b"",
         )
+        self.__rtt.closing()
         self.__send_packet(fin_packet)
-        self.__wait_for_ack()
+        yield from self.__wait_for_ack()
+
+    def __acknowledge_data(self):
+        """Count an in-order data packet, ACKing it now or leaving it to the timer."""
+        self.__packets_to_ack += 1
+
+        filled_a_hole = self.__reassembly.base != self.__start_of_next_seq(
+            self.__last_packet_received
+        )
+        if (
+            self.__packets_to_ack >= self.__ack_frequency
+            or filled_a_hole
+            or len(self.__reassembly) > 0
+        ):
+            self.__send_ack()
+
+    def __delay_ack(self):
+        """Wait up to the delayed ACK timer for a packet, then send the ACK."""
+        data = yield ACK_DELAY  # None when the timer expires
+
+        packet = None
+        if data is not None:
+            try:
+                packet = SACKPacket.decode(data)
+            except struct.error:
+                pass  # Malformed, handled as if the timer expired
+
+        if packet is None:
+            self.__send_ack()
+            yield from self.__get_packet()
+            return
+
+        self.__last_packet_received = packet
+        self.__timeout_count = 0
+        self.__rtt.answered()
 
     def __wait_for_data(self):
         """Wait for data from the client."""
         while True:
-            self.__get_packet()
-
-            if self.__last_packet_received.upl and self.__last_packet_is_ordered():
-                break
+            if self.__packets_to_ack > 0:
+                yield from self.__delay_ack()
+            else:
+                yield from self.__get_packet()
 
+            # In order or not, data the buffer has no room for is dropped
+            # unacknowledged, rather than wait for the disk
             if (
-                self.__last_packet_received.seq_number
-                >= self.__next_expected_seq_number()
+                self.__last_packet_received.upl
+                and self.__last_packet_is_ordered()
+                and self.__fits_receive_buffer(self.__last_packet_received)
             ):
-                self.__add_out_of_order_packet()
+                break
+
+            if self.__reassembly.is_duplicate(self.__last_packet_received):
+                # The ACK that covered it may have been lost
                 self.__send_sack()
+                continue
+
+            offset = self.__file_offset(self.__last_packet_received)
+            if not self.__fits_receive_buffer(self.__last_packet_received):
+                pass  # Dropped, the SACK below advertises the window left
+            elif offset is not None and self.__reassembly.mark(
+                self.__last_packet_received
+            ):
+                # Queued to be written, only its range waits for the hole before it
+                self.__writer.write(self.__last_packet_received, offset)
+            else:
+                self.__reassembly.store(self.__last_packet_received)
+            self.__send_sack()
 
         # The last packet received is ordered
         self.__add_in_order_packet()
 
-    def __save_file_data(self, file_path):
+    def __save_file_data(self, file):
         """Save file data received from the client."""
-        with open(file_path, "ab") as file:
+        if self.__writer is not None:
             while self.__in_order_packets:
-                packet = self.__in_order_packets.popleft()
-                file.write(packet.payload)
+                self.__writer.append(self.__in_order_packets.popleft())
+            return
+
+        while self.__in_order_packets:
+            packet = self.__in_order_packets.popleft()
+            file.write(packet.payload)
+
+    def __send_file_size(self, file_path):
+        """Acknowledge the file name with the size of the file, before its data."""
+        file_name_ack = self.__create_new_packet(
+            False,
+            False,
+            True,
+            False,
+            True,
+            HandshakeOptions(file_size=os.path.getsize(file_path)).encode(),
+        )
+        self.__send_packet(file_name_ack)
+        yield from self.__wait_for_ack()
 
-    def __send_file_data(self, file_path):
-        """Send file data to the client."""
+    def __send_file_data(self, file_path, ack_file_name=True):
+        """Send file data to the client, the first packet acking the file name."""
         file_length = os.path.getsize(file_path)
 
-        with open(file_path, "rb") as file:
-            data_sent = 0
+        # Payloads are slices of the shared chunks, retransmissions included
+        with CachedFile(self.__chunk_cache, file_path) as file:
+            file.seek(self.__resume_offset)
+            data_sent = self.__resume_offset
             data = file.read(MAX_PAYLOAD_SIZE)
-            is_first_packet = True
-            while len(data) > 0 or len(self.__unacked_packets) > 0:
-                while (
-                    len(data) > 0 and self.__in_flight_bytes < RWND
-                ):  # TODO: prevent to send more than the window size
+            is_first_packet = ack_file_name
+            while len(data) > 0 or len(self.__scoreboard) > 0:
+                # Holes first, then new data
+                self.__retransmit_lost()
+
+                if len(data) > 0:
+                    yield from self.__wait_for_window_update()
+
+                window = []
+                window_bytes = self.__scoreboard.pipe()
+                while len(data) > 0 and self.__window_allows(window_bytes, len(data)):
                     packet = self.__create_new_packet(
                         False,
                         False,
@@ -385,7 +524,8 @@ class ClientHandlerSACK:
                         data,
                     )
 
-                    self.__send_packet(packet)
+                    window.append(packet)
+                    window_bytes += packet.length()
                     data_sent += len(data)
 
                     print_sent_progress(data_sent, file_length)
@@ -393,43 +533,157 @@ class ClientHandlerSACK:
                     data = file.read(MAX_PAYLOAD_SIZE)
                     is_first_packet = False
 
-                self.__wait_for_ack()
+                self.__send_packets(window)
+                yield from self.__wait_for_ack()
 
     def __receive_file_data(self, file_path):
-        # To create / overwrite the file
-        with open(file_path, "wb") as _:
-            pass
-
-        self.__wait_for_data()
+        file_size = self.__file_size or 0  # Preallocated when announced
+        file = None
+        if PWRITE_SUPPORTED:
+            # Data is written by offset as it arrives, on its own thread
+            self.__writer = AsyncWriter(
+                SegmentWriter(
+                    file_path,
+                    self.__next_expected_seq_number(),
+                    file_size,
+                    self.__resume_offset,
+                )
+            )
+        else:
+            # Open once for the whole transfer, appended to in order
+            write_marker(file_path, self.__resume_offset, file_size)
+            mode = "r+b" if self.__resume_offset > 0 else "wb"
+            file = open(file_path, mode, buffering=FILE_WRITE_BUFFER_SIZE)
+            try:
+                file.truncate(self.__resume_offset)
+                file.seek(self.__resume_offset)
+                preallocate(file.fileno(), file_size)
+            except Exception:
+                file.close()
+                raise
+        self.__committed_seq_number = self.__next_expected_seq_number()
+
+        # The file name is acknowledged once there is room for the file
+        self.__send_ack()
 
-        while not self.__last_ordered_packet_received.fin:
-            self.__save_file_data(file_path)
-            self.__send_ack()
-            self.__wait_for_data()
+        try:
+            yield from self.__wait_for_data()
+
+            while not self.__last_ordered_packet_received.fin:
+                self.__save_file_data(file)
+                self.__commit_file_data(file, file_path, file_size)
+                self.__acknowledge_data()
+                yield from self.__wait_for_data()
+        finally:
+            # Closing flushes the buffered data before the FIN is acknowledged,
+            # and leaves an upload cut short with no holes, to be resumed
+            try:
+                self.__save_file_data(file)
+            finally:
+                self.__close_file(file, file_path, file_size)
 
         self.__handle_fin()
 
+    def __commit_file_data(self, file, file_path, file_size):
+        """Commit the data received in order every RESUME_COMMIT_INTERVAL bytes."""
+        end = self.__next_expected_seq_number()
+        received = (end - self.__committed_seq_number) % SEQUENCE_NUMBER_LIMIT
+        if received < RESUME_COMMIT_INTERVAL:
+            return
+
+        self.__committed_seq_number = end
+        if self.__writer is not None:
+            self.__writer.commit(end)
+        else:
+            commit_file(file, file_path, file_size)
+
+    def __close_file(self, file, file_path, file_size):
+        """Close the file received, whole or cut short and committed."""
+        whole = self.__last_ordered_packet_received.fin
+        if self.__writer is not None:
+            self.__writer.close(None if whole else self.__next_expected_seq_number())
+        if file is not None:
+            try:
+                file.truncate()  # Blocks reserved past the data, if cut short
+                if not whole:
+                    commit_file(file, file_path, file_size)
+            finally:
+                file.close()
+            if whole:
+                remove_marker(file_path)
+
+    def __resume_offset_of(self, client_options):
+        """Get where a resumed transfer starts, 0 if the file on disk differs."""
+        file_path = f"{self.__folder_path}/{client_options.file_name}"
+        if self.__last_packet_received.upl:
+            # The client asks what an upload cut short committed of the file
+            return resume_offset(file_path, self.__file_size or 0)
+
+        if not os.path.isfile(file_path):
+            return 0
+
+        # The client resumes a download of the file as it was, same size
+        size = os.path.getsize(file_path)
+        offset = client_options.resume_offset or 0
+        return offset if offset <= size == client_options.file_size else 0
+
     def __handle_syn(self):
         """Handle the initial SYN packet."""
+        syn_packet = self.__in_order_packets.popleft()  # TODO: Check if this is correct
+        client_options = HandshakeOptions.decode(syn_packet.payload)
+
+        # Windows are scaled only if both ends offer it, older clients do not
+        window_scale = None
+        if client_options.window_scale is not None:
+            window_scale = WINDOW_SCALE_SACK
+
+        # The size of an upload, or a download client asking for the size:
+        # 0, or the size of the file it resumes
+        self.__file_size = client_options.file_size
+        file_size = None if self.__file_size is None else 0
+
+        resume_offset = None
+        if client_options.file_name is not None:
+            self.__resume_offset = self.__resume_offset_of(client_options)
+            resume_offset = self.__resume_offset
+
         syn_ack_packet = self.__create_new_packet(
             True,
             False,
             True,
             self.__last_packet_received.upl,
             self.__last_packet_received.dwl,
-            b"",
+            HandshakeOptions(
+                session_port=self.__session_port,
+                window_scale=window_scale,
+                file_size=file_size,
+                resume_offset=resume_offset,
+            ).encode(),
         )
-
-        self.__in_order_packets.popleft()  # TODO: Check if this is correct
         self.__send_packet(syn_ack_packet)
 
+        # The windows of the SYN and the SYN-ACK themselves are never scaled
+        if window_scale is not None:
+            self.__window_scale = window_scale
+            self.__peer_window_scale = min(
+                client_options.window_scale, MAX_WINDOW_SCALE
+            )
+
     def __handle_upl(self, file_name):
         """Handle an upload packet."""
 
         file_path = f"{self.__folder_path}/{file_name}"
         print(f"Receiving file: {file_name}")
 
-        self.__receive_file_data(file_path)
+        try:
+            yield from self.__receive_file_data(file_path)
+        except DiskFull as e:
+            if self.__resume_offset == 0:
+                os.remove(file_path)  # Left empty, there was no room for it
+                remove_marker(file_path)
+            print("Failed with error:", e)
+            print("Sending comm fin to client")
+            yield from self.__send_fin()
 
     def __check_file_in_fs(self, file_name):
         """Check if the file exists in the file system."""
@@ -443,13 +697,24 @@ class ClientHandlerSACK:
         try:
             file_path = self.__check_file_in_fs(file_name)
             print(f"Sending file: {file_name}")
-            self.__send_file_data(file_path)
-            self.__send_fin()
+            if self.__file_size is not None:
+                # The client knows the option, the file name ACK carries the size
+                yield from self.__send_file_size(file_path)
+            yield from self.__send_file_data(file_path, self.__file_size is None)
+            yield from self.__send_fin()
         except InvalidFileName as e:
             print("Failed with error:", e)
             print("No file found with the name:", file_name)
             print("Sending comm fin to client")
-            self.__send_fin()
+            yield from self.__send_fin()
+        except TransferAborted as e:
+            print("Failed with error:", e)
+            self.__acknowledge_fin()
+
+    def __acknowledge_fin(self):
+        """ACK the FIN of a client that stopped the download, ending it."""
+        fin_ack = self.__create_new_packet(False, True, True, False, True, b"")
+        self.__transmit([fin_ack])
 
     def __handle_fin(self):
         """Handle the final FIN packet."""
@@ -463,16 +728,12 @@ class ClientHandlerSACK:
     def __wait_for_file_name(self):
         """Wait for the file name from the client."""
         while True:
-            self.__get_packet()
+            yield from self.__get_packet()
             if self.__last_packet_is_ordered() and (
                 self.__last_packet_received.upl or self.__last_packet_received.dwl
             ):
                 self.__add_in_order_packet()
-                file_name = self.__handle_file_name()
-                if self.__last_ordered_packet_received.upl:
-                    self.__send_ack()
-
-                return file_name
+                return self.__handle_file_name()
             else:
                 pass
                 # TODO: Should sum a timeout here
@@ -480,7 +741,7 @@ class ClientHandlerSACK:
     def __wait_for_syn(self):
         """Wait for the initial SYN packet."""
         while True:
-            self.__get_packet()
+            yield from self.__get_packet()
             if self.__last_packet_is_ordered() and self.__last_packet_received.syn:
                 self.__add_in_order_packet()
                 self.__handle_syn()
@@ -490,16 +751,16 @@ class ClientHandlerSACK:
                 pass
 
     def handle_request(self):
-        """Handle the client request."""
+        """Handle the client request, yielding whenever it waits for a packet."""
         try:
-            self.__wait_for_syn()
-            file_name = self.__wait_for_file_name()
+            yield from self.__wait_for_syn()
+            file_name = yield from self.__wait_for_file_name()
 
             # Handle the file data
             if self.__last_ordered_packet_received.upl:
-                self.__handle_upl(file_name)
+                yield from self.__handle_upl(file_name)
             elif self.__last_ordered_packet_received.dwl:
-                self.__handle_dwl(file_name)
+                yield from self.__handle_dwl(file_name)
 
         except BrokenPipeError as e:
             print(str(e))
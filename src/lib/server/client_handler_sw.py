@@ -1,25 +1,31 @@
-import queue
-import time
 import os
 from lib.arguments.constants import MAX_PAYLOAD_SIZE
 from lib.arguments.constants import (
+    FILE_WRITE_BUFFER_SIZE,
     MAX_PAYLOAD_SIZE,
     MAX_TIMEOUT_COUNT,
 )
 from lib.packets.sw_packet import SWPacket
+from lib.server.chunk_cache import CachedFile, ChunkCache
+from lib.rtt_estimator import RTTEstimator
 from lib.errors.invalid_file_name import InvalidFileName
+from lib.packets.handshake_options import HandshakeOptions
 
 
 class ClientHandlerSW:
-    def __init__(self, address, socket, folder_path, timeout):
-        self.data_queue = queue.Queue()
+    def __init__(
+        self, address, socket, folder_path, timeout, session_port=None, chunk_cache=None
+    ):
         self.address = address
         self.__socket = socket
+        self.__session_port = session_port  # Port of a socket dedicated to the client
         self.__folder_path = folder_path
+        # Files sent are read through it, without one chunks are not kept
+        self.__chunk_cache = chunk_cache if chunk_cache is not None else ChunkCache(0)
         self.__last_packet_received = None
         self.__last_packet_sent = None
         self.__timeout_count: int = 0
-        self.__timeout = timeout / 1000
+        self.__rtt = RTTEstimator(timeout / 1000)
 
     def __next_seq_number(self):
         """Get the next sequence number."""
@@ -60,26 +66,43 @@ class ClientHandlerSW:
         )
 
     def __get_packet(self):
-        """Get the next packet from the queue."""
+        """Wait for the next packet from the client."""
+        data = yield self.__rtt.rto()  # None when the timeout expires
+
         try:
-            data = self.data_queue.get(timeout=self.__timeout)
+            if data is None:
+                raise TimeoutError("No packet received")
+
             packet = SWPacket.decode(data)
             self.__last_packet_received = packet
             self.__timeout_count = 0
+            self.__rtt.answered()
+            self.__rtt.stop_timing()
 
-        except (queue.Empty, Exception):
+        except Exception:
             self.__timeout_count += 1
-            if self.__timeout_count >= MAX_TIMEOUT_COUNT:
+            if self.__timeout_count >= MAX_TIMEOUT_COUNT or self.__rtt.gave_up():
                 raise BrokenPipeError(
                     f"Max timeouts reached. Closing connection {self.address}"  # noqa
                 )
 
+            self.__rtt.backoff()
             self.__send_packet(self.__last_packet_sent)
-            self.__get_packet()
+            yield from self.__get_packet()
 
     def __send_packet(self, packet):
         """Send a packet to the client."""
-        self.__socket.sendto(packet.encode(), self.address)
+        if packet is self.__last_packet_sent:
+            # Karn's rule: the answer could belong to either copy
+            self.__rtt.cancel_timing()
+        else:
+            self.__rtt.start_timing()
+
+        try:
+            self.__socket.sendto(packet.encode(), self.address)
+        except ConnectionRefusedError:
+            # ICMP error on the dedicated socket, the client may be gone
+            pass
         self.__last_packet_sent = packet
 
     def __send_ack(self):
@@ -96,19 +119,19 @@ class ClientHandlerSW:
 
     def __wait_for_ack(self):
         """Wait for an appropriate acknowledgment from the client."""
-        self.__get_packet()
+        yield from self.__get_packet()
 
         while not self.__last_packet_sent_was_ack():
             self.__send_packet(self.__last_packet_sent)
-            self.__get_packet()
+            yield from self.__get_packet()
 
     def __wait_for_data(self):
         """Wait for data from the client."""
-        self.__get_packet()
+        yield from self.__get_packet()
 
         while not (self.__last_packet_received.upl and self.__last_packet_is_new()):
             self.__send_packet(self.__last_packet_sent)
-            self.__get_packet()
+            yield from self.__get_packet()
 
     def __send_fin(self):
         """Send the final FIN packet."""
@@ -120,17 +143,17 @@ class ClientHandlerSW:
             self.__last_packet_received.dwl,
             b"",
         )
+        self.__rtt.closing()
         self.__send_packet(fin_packet)
-        self.__wait_for_ack()
+        yield from self.__wait_for_ack()
 
-    def __save_file_data(self, file_path):
+    def __save_file_data(self, file):
         """Save file data received from the client."""
-        with open(file_path, "ab") as file:
-            file.write(self.__last_packet_received.payload)
+        file.write(self.__last_packet_received.payload)
 
     def __send_file_data(self, file_path):
         """Send file data to the client."""
-        with open(file_path, "rb") as file:
+        with CachedFile(self.__chunk_cache, file_path) as file:
             data = file.read(MAX_PAYLOAD_SIZE)
             is_first_packet = True
             while len(data) > 0:
@@ -143,22 +166,20 @@ class ClientHandlerSW:
                     data,
                 )
                 self.__send_packet(data_packet)
-                self.__wait_for_ack()
+                yield from self.__wait_for_ack()
 
                 data = file.read(MAX_PAYLOAD_SIZE)
                 is_first_packet = False
 
     def __receive_file_data(self, file_path):
-        # To create / overwrite the file
-        with open(file_path, "wb") as _:
-            pass
+        # Open once for the whole transfer, closing flushes it before the FIN ack
+        with open(file_path, "wb", buffering=FILE_WRITE_BUFFER_SIZE) as file:
+            yield from self.__wait_for_data()
 
-        self.__wait_for_data()
-
-        while not self.__last_packet_received.fin:
-            self.__save_file_data(file_path)
-            self.__send_ack()
-            self.__wait_for_data()
+            while not self.__last_packet_received.fin:
+                self.__save_file_data(file)
+                self.__send_ack()
+                yield from self.__wait_for_data()
 
         self.__handle_fin()
 
@@ -170,7 +191,7 @@ class ClientHandlerSW:
             True,
             self.__last_packet_received.upl,
             self.__last_packet_received.dwl,
-            b"",
+            HandshakeOptions(session_port=self.__session_port).encode(),
         )
 
         self.__send_packet(syn_ack_packet)
@@ -181,7 +202,7 @@ class ClientHandlerSW:
         file_path = f"{self.__folder_path}/{file_name}"
         print(f"Receiving file: {file_name}")
 
-        self.__receive_file_data(file_path)
+        yield from self.__receive_file_data(file_path)
 
     def __check_file_in_fs(self, file_name):
         """Check if the file exists in the file system."""
@@ -195,13 +216,13 @@ class ClientHandlerSW:
         try:
             file_path = self.__check_file_in_fs(file_name)
             print(f"Sending file: {file_name}")
-            self.__send_file_data(file_path)
-            self.__send_fin()
+            yield from self.__send_file_data(file_path)
+            yield from self.__send_fin()
         except InvalidFileName as e:
             print("Failed with error:", e)
             print("No file found with the name:", file_name)
             print("Sending comm fin to client")
-            self.__send_fin()
+            yield from self.__send_fin()
 
     def __handle_fin(self):
         """Handle the final FIN packet."""
@@ -214,7 +235,7 @@ class ClientHandlerSW:
 
     def __wait_for_syn(self):
         while True:
-            self.__get_packet()
+            yield from self.__get_packet()
             # Handle the initial SYN packet
             if self.__last_packet_received.syn:
                 self.__handle_syn()
@@ -226,7 +247,7 @@ class ClientHandlerSW:
 
     def __wait_for_file_name(self):
         while True:
-            self.__get_packet()
+            yield from self.__get_packet()
 
             if self.__last_packet_is_new() and (
                 self.__last_packet_received.upl or self.__last_packet_received.dwl
@@ -241,16 +262,16 @@ class ClientHandlerSW:
                 pass
 
     def handle_request(self):
-        """Handle the client request."""
+        """Handle the client request, yielding whenever it waits for a packet."""
         try:
-            self.__wait_for_syn()
-            file_name = self.__wait_for_file_name()
+            yield from self.__wait_for_syn()
+            file_name = yield from self.__wait_for_file_name()
 
             # Handle the file data
             if self.__last_packet_received.upl:
-                self.__handle_upl(file_name)
+                yield from self.__handle_upl(file_name)
             elif self.__last_packet_received.dwl:
-                self.__handle_dwl(file_name)
+                yield from self.__handle_dwl(file_name)
 
         except BrokenPipeError as e:
             print(str(e))
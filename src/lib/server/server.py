@@ -1,78 +1,165 @@
-from concurrent.futures import ThreadPoolExecutor
+import heapq
+import itertools
 import os
+import selectors
+import time
 from lib.server.server_config import ServerConfig
 from lib.arguments.constants import MAX_PACKET_SIZE_SACK, MAX_PACKET_SIZE_SW
 import socket
 
-from lib.server.client_handler_sw import ClientHandlerSW
-from lib.server.client_handler_sack import ClientHandlerSACK
-from lib.errors.unknown_algorithm import UnknownAlgorithm
-
-WORKERS = max(os.cpu_count(), 4)
+from lib.server.chunk_cache import ChunkCache
+from lib.server.client_handler_factory import create_client_handler
+from lib.session import Session
+from lib.net.batch_io import BatchReceiver
+from lib.net.socket_buffers import size_receive_buffer
 
 
 class Server:
     def __init__(self, config: ServerConfig):
         self.__config = config
-        self.__pool = ThreadPoolExecutor(max_workers=WORKERS)
+        self.__selector = selectors.DefaultSelector()
         self.__socket: socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        if config.PROCESSES > 1:
+            # Every worker binds the port, the kernel shards clients among them
+            self.__socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        size_receive_buffer(self.__socket)
         self.__socket.bind((config.HOST, config.PORT))
-        self.__clients_handlers = {}
-
-    def __create_client(
-        self, address: tuple[str, int]
-    ) -> ClientHandlerSW | ClientHandlerSACK:
-        match (self.__config.ALGORITHM):
-            case "sw":
-                return ClientHandlerSW(
-                    address,
-                    self.__socket,
-                    self.__config.STORAGE_DIR_PATH,
-                    self.__config.TIMEOUT,
-                )
-
-            case "sack":
-                return ClientHandlerSACK(
-                    address,
-                    self.__socket,
-                    self.__config.STORAGE_DIR_PATH,
-                    self.__config.TIMEOUT,
-                )
-
-            case _:
-                raise UnknownAlgorithm(f"Unknown algorithm: {self.__config.ALGORITHM}")
+        self.__selector.register(self.__socket, selectors.EVENT_READ)
+        self.__clients_handlers = {}  # {address: Session}
+        self.__clients_sockets = {}  # {address: socket dedicated to the client}
+        self.__timers = []  # heap of (deadline, tiebreaker, address)
+        self.__tiebreaker = itertools.count()
+        # Chunks of the files sent, shared by the sessions of this process
+        self.__chunk_cache = ChunkCache(config.CACHE_SIZE * 2**20)
 
-    def __listener(self):
-        """Listen for packets and route them to the correct client handler."""
         MAX_EXPECTED_PACKET_SIZE = (
-            MAX_PACKET_SIZE_SW
-            if self.__config.ALGORITHM == "sw"
-            else MAX_PACKET_SIZE_SACK
+            MAX_PACKET_SIZE_SW if config.ALGORITHM == "sw" else MAX_PACKET_SIZE_SACK
         )
+        self.__receiver = BatchReceiver(MAX_EXPECTED_PACKET_SIZE)
 
-        while True:
-            data, address = self.__socket.recvfrom(MAX_EXPECTED_PACKET_SIZE)
-            if address not in self.__clients_handlers:
-                client = self.__create_client(address)
-                self.__clients_handlers[address] = client
-                self.__pool.submit(self.__handle_client, client)
+    def __schedule(self, address: tuple[str, int], session: Session):
+        """Arm the session timer, or forget the session if it finished."""
+        if session.finished:
+            print("Client disconnected, ", address)
+            del self.__clients_handlers[address]
+            self.__close_client_socket(address)
+            return
+
+        heapq.heappush(
+            self.__timers, (session.deadline, next(self.__tiebreaker), address)
+        )
+
+    def __step(self, address: tuple[str, int], session: Session, resume, *args):
+        """Resume a session, isolating the server from its failures."""
+        try:
+            resume(*args)
+        except Exception as e:
+            print(f"Client {address} failed: {e}")
+
+        self.__schedule(address, session)
 
-            self.__clients_handlers[address].data_queue.put(data)
+    def __open_client_socket(self, address: tuple[str, int]) -> socket:
+        """Open a socket connected to the client on an ephemeral port."""
+        client_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        size_receive_buffer(client_socket)
+        client_socket.bind((self.__config.HOST, 0))
+        client_socket.connect(address)
 
-    def __handle_client(self, client: ClientHandlerSW):
-        """Handle the client."""
-        address = client.address
+        self.__selector.register(client_socket, selectors.EVENT_READ, address)
+        self.__clients_sockets[address] = client_socket
+        return client_socket
+
+    def __close_client_socket(self, address: tuple[str, int]):
+        """Close the socket dedicated to a client."""
+        client_socket = self.__clients_sockets.pop(address)
+        self.__selector.unregister(client_socket)
+        client_socket.close()
+
+    def __handle_client(self, address: tuple[str, int]) -> Session:
+        """Start handling a new client."""
         print("Handling client, ", address)
 
-        client.handle_request()
+        client_socket = self.__open_client_socket(address)
+        client = create_client_handler(
+            self.__config,
+            address,
+            client_socket,
+            client_socket.getsockname()[1],
+            self.__chunk_cache,
+        )
+        session = Session(client.handle_request())
+        self.__clients_handlers[address] = session
+        self.__step(address, session, session.start)
+
+        return session
+
+    def __route(self, data: bytes, address: tuple[str, int]):
+        """Route a packet to the correct client handler."""
+        session = self.__clients_handlers.get(address)
+        if session is None:
+            session = self.__handle_client(address)
+
+        if not session.finished:
+            self.__step(address, session, session.deliver, data)
+
+    def __drain_socket(self, sock: socket):
+        """Read every datagram already queued in the socket, a batch at a time."""
+        while True:
+            try:
+                datagrams = self.__receiver.receive(sock)
+            except ConnectionRefusedError:
+                # ICMP error on a dedicated socket, the client may be gone
+                continue
+
+            if not datagrams:
+                return
+
+            for data, address in datagrams:
+                self.__route(data, address)
+
+                if sock.fileno() == -1:
+                    return  # The session ended and closed its socket
+
+    def __expire_timers(self):
+        """Resume the sessions whose wait has timed out."""
+        now = time.monotonic()
+
+        while self.__timers and self.__timers[0][0] <= now:
+            deadline, _, address = heapq.heappop(self.__timers)
+            session = self.__clients_handlers.get(address)
+
+            # Stale entry: the session was resumed or replaced meanwhile
+            if session is None or session.deadline != deadline:
+                continue
+
+            self.__step(address, session, session.expire)
+
+    def __time_to_next_timer(self) -> float | None:
+        """Get how long the event loop may block waiting for packets."""
+        if not self.__timers:
+            return None
+
+        return max(self.__timers[0][0] - time.monotonic(), 0)
+
+    def __listener(self):
+        """Listen for packets and drive every client session."""
+        while True:
+            for key, _ in self.__selector.select(self.__time_to_next_timer()):
+                address = key.data
+
+                # Skip sockets closed by a session that ended meanwhile
+                if (
+                    address is None
+                    or self.__clients_sockets.get(address) is key.fileobj
+                ):
+                    self.__drain_socket(key.fileobj)
 
-        print("Client disconnected, ", address)
-        del self.__clients_handlers[address]
+            self.__expire_timers()
 
     def __check_storage_dir(self):
         """Check if the storage directory exists and create it if it doesn't."""
         if not os.path.exists(self.__config.STORAGE_DIR_PATH):
-            os.makedirs(self.__config.STORAGE_DIR_PATH)
+            os.makedirs(self.__config.STORAGE_DIR_PATH, exist_ok=True)
 
     def run(self):
         """Main server function."""
@@ -1,11 +1,20 @@
 from lib.config import Config
 
-STORAGE_DIR_PATH_INDEX = 5
+STORAGE_DIR_PATH_INDEX = 6
+PROCESSES_INDEX = 7
+ACK_FREQUENCY_INDEX = 8
+CACHE_SIZE_INDEX = 9
 
 
 class ServerConfig(Config):
     STORAGE_DIR_PATH: str
+    PROCESSES: int
+    ACK_FREQUENCY: int
+    CACHE_SIZE: int  # MB
 
     def __init__(self, args: list):
         super().__init__(args)
         self.STORAGE_DIR_PATH = args[STORAGE_DIR_PATH_INDEX]
+        self.PROCESSES = args[PROCESSES_INDEX]
+        self.ACK_FREQUENCY = args[ACK_FREQUENCY_INDEX]
+        self.CACHE_SIZE = args[CACHE_SIZE_INDEX]
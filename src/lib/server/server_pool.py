@@ -0,0 +1,59 @@
+import os
+import signal
+import sys
+from typing import Callable
+from lib.server.server_config import ServerConfig
+
+
+class ServerPool:
+    """Fork one server per worker process, all bound to one port with SO_REUSEPORT."""
+
+    def __init__(self, config: ServerConfig, create_server: Callable):
+        self.__config = config
+        self.__create_server = create_server
+        self.__workers: list[int] = []
+
+    def __spawn_worker(self) -> int:
+        """Fork a worker process running its own server."""
+        pid = os.fork()
+        if pid != 0:
+            return pid
+
+        exit_code = 0
+        try:
+            self.__create_server(self.__config).run()
+        except KeyboardInterrupt:
+            pass
+        except Exception as e:
+            print(f"Worker {os.getpid()} failed: {e}")
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+
+    def __stop_workers(self):
+        """Terminate every worker still alive."""
+        for pid in self.__workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self):
+        """Main server function."""
+        print(f"Starting {self.__config.PROCESSES} server workers")
+
+        # Unwind through the finally below (and the workers' own) on SIGTERM
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit())
+
+        try:
+            for _ in range(self.__config.PROCESSES):
+                self.__workers.append(self.__spawn_worker())
+
+            for pid in self.__workers:
+                os.waitpid(pid, 0)
+
+        except KeyboardInterrupt:
+            pass
+
+        finally:
+            self.__stop_workers()
@@ -0,0 +1,74 @@
+import select
+import time
+from typing import Generator
+from lib.net.batch_io import BatchReceiver
+
+# A flow yields how many seconds it is willing to wait for the next datagram
+# and is resumed with that datagram, or with None once the wait expires.
+Flow = Generator[float, bytes | None, None]
+
+
+class Session:
+    """Drive a protocol flow as a non-blocking state machine."""
+
+    def __init__(self, flow: Flow):
+        self.__flow = flow
+        self.finished: bool = False
+        self.deadline: float | None = None
+
+    def __resume(self, data: bytes | None):
+        """Run the flow until it waits for another datagram or finishes."""
+        try:
+            timeout = self.__flow.send(data)
+            self.deadline = time.monotonic() + max(timeout, 0)
+
+        except StopIteration:
+            self.finished = True
+            self.deadline = None
+
+        except Exception:
+            self.finished = True
+            self.deadline = None
+            raise
+
+    def start(self):
+        """Run the flow up to its first wait."""
+        self.__resume(None)
+
+    def deliver(self, data: bytes):
+        """Resume the flow with a received datagram."""
+        if not self.finished:
+            self.__resume(data)
+
+    def expire(self):
+        """Resume the flow signaling that its wait timed out."""
+        if not self.finished:
+            self.__resume(None)
+
+    def close(self):
+        """Abort the flow."""
+        self.__flow.close()
+        self.finished = True
+        self.deadline = None
+
+
+def run_blocking(flow: Flow, socket, max_packet_size: int):
+    """Drive a flow to completion over a socket, draining it a batch at a time."""
+    receiver = BatchReceiver(max_packet_size)
+    session = Session(flow)
+    session.start()
+
+    while not session.finished:
+        datagrams = receiver.receive(socket)
+
+        if not datagrams:
+            timeout = max(session.deadline - time.monotonic(), 0)
+            readable, _, _ = select.select([socket], [], [], timeout)
+            if not readable:
+                session.expire()
+            continue
+
+        for data, _ in datagrams:
+            session.deliver(data)
+            if session.finished:
+                break
@@ -3,18 +3,60 @@ from abc import abstractmethod
 from lib.arguments.constants import MAX_PAYLOAD_SIZE
 
 MSS = MAX_PAYLOAD_SIZE  # Packet payload bytes
+INITIAL_CWND = 2 * MSS
+MIN_SSTHRESH = 2 * MSS
+DUP_ACK_THRESHOLD = 3
 
 
 class State:
+    """Congestion control state of a SACK sender, following RFC 5681."""
+
     _dupACKcount: int
     _lastACKnumber: int
     _cwnd: int
     _ssthresh: int | None = None
 
-    @abstractmethod
-    def timeout_event(self):
-        pass
+    def __init__(self, cwnd: int, ssthresh: int | None, lastACK: int):
+        self._cwnd = cwnd
+        self._ssthresh = ssthresh
+        self._dupACKcount = 0
+        self._lastACKnumber = lastACK
+
+    def cwnd(self) -> int:
+        """Get how many bytes the sender may have in flight."""
+        return self._cwnd
+
+    def _grow(self, increment: int):
+        # Unbounded, the peer's rwnd limits what is in flight
+        self._cwnd += increment
+
+    def timeout_event(self) -> "State":
+        """The retransmission timer expired: halve ssthresh, restart from one MSS."""
+        from lib.states.slow_start import SlowStart
+
+        return SlowStart(MSS, max(self._cwnd // 2, MIN_SSTHRESH), self._lastACKnumber)
+
+    def ACK_event(self, ACKnumber: int) -> "State":
+        """An ACK arrived, new or repeating the last ACK number."""
+        if ACKnumber == self._lastACKnumber:
+            self._dupACKcount += 1
+            return self._duplicate_ACK_event()
+
+        self._dupACKcount = 0
+        self._lastACKnumber = ACKnumber
+        return self._new_ACK_event()
+
+    def _duplicate_ACK_event(self) -> "State":
+        if self._dupACKcount == DUP_ACK_THRESHOLD:
+            from lib.states.fast_recovery import FastRecovery
+
+            ssthresh = max(self._cwnd // 2, MIN_SSTHRESH)
+            return FastRecovery(
+                ssthresh + DUP_ACK_THRESHOLD * MSS, ssthresh, self._lastACKnumber
+            )
+
+        return self
 
     @abstractmethod
-    def ACK_event(self, ACKnumber: int):
+    def _new_ACK_event(self) -> "State":
         pass
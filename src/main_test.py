@@ -2,6 +2,22 @@ import unittest
 from test.args_parser_test import ArgsParserTest  # noqa: F401
 from test.sw_packet_test import SWPacketTest  # noqa: F401
 from test.sack_packet_test import SACKPacketTest  # noqa: F401
+from test.session_test import SessionTest  # noqa: F401
+from test.handshake_options_test import HandshakeOptionsTest  # noqa: F401
+from test.batch_io_test import BatchIOTest  # noqa: F401
+from test.congestion_states_test import CongestionStatesTest  # noqa: F401
+from test.rtt_estimator_test import RTTEstimatorTest  # noqa: F401
+from test.scoreboard_test import ScoreboardTest  # noqa: F401
+from test.interval_set_test import IntervalSetTest  # noqa: F401
+from test.reassembly_test import ReassemblyWindowTest  # noqa: F401
+from test.segment_writer_test import SegmentWriterTest  # noqa: F401
+from test.resume_marker_test import ResumeMarkerTest  # noqa: F401
+from test.async_writer_test import AsyncWriterTest  # noqa: F401
+from test.mapped_file_test import MappedFileTest  # noqa: F401
+from test.chunk_cache_test import ChunkCacheTest  # noqa: F401
+from test.upload_client_sack_test import UploadClientSACKTest  # noqa: F401
+from test.client_handler_sack_test import ClientHandlerSACKTest  # noqa: F401
+from test.download_client_sack_test import DownloadClientSACKTest  # noqa: F401
 
 if __name__ == "__main__":
     unittest.main()
@@ -2,12 +2,27 @@ from lib.arguments.args_parser import ArgsParser
 from lib.server.server_config import ServerConfig
 from sys import argv
 from lib.server.server import Server
+from lib.server.asyncio_server import AsyncioServer
+from lib.server.server_pool import ServerPool
 
 
 def main():
     parser = ArgsParser()
     config: ServerConfig = parser.load_args(argv)
-    sv: Server = Server(config)
+
+    server_class: type[Server] | type[AsyncioServer]
+    match config.ENGINE:
+        case "selector":
+            server_class = Server
+        case "asyncio":
+            server_class = AsyncioServer
+
+    sv: Server | AsyncioServer | ServerPool
+    if config.PROCESSES > 1:
+        sv = ServerPool(config, server_class)
+    else:
+        sv = server_class(config)
+
     sv.run()
 
 
@@ -78,3 +78,76 @@ class ArgsParserTest(unittest.TestCase):
         self.assertEqual(config.ALGORITHM, "sw")
         self.assertEqual(config.DESTINATION_PATH, "dev/null")
         self.assertEqual(config.FILE_NAME, "dog")
+
+    def test_load_engine_args(self):
+        parser = ArgsParser()
+        argv = [
+            "start-server.py",
+            "-s",
+            "~/Documents",
+            "-e",
+            "asyncio",
+        ]
+
+        config: ServerConfig = parser.load_args(argv)
+
+        self.assertEqual(config.ENGINE, "asyncio")
+        self.assertEqual(config.STORAGE_DIR_PATH, "~/Documents")
+
+    def test_default_engine(self):
+        parser = ArgsParser()
+        argv = ["upload.py", "-s", "dev/null", "-n", "cat"]
+
+        config: UploadConfig = parser.load_args(argv)
+
+        self.assertEqual(config.ENGINE, "selector")
+        self.assertEqual(config.SOURCE_PATH, "dev/null")
+
+    def test_load_processes_args(self):
+        parser = ArgsParser()
+        argv = ["start-server.py", "-P", "4"]
+
+        config: ServerConfig = parser.load_args(argv)
+
+        self.assertEqual(config.PROCESSES, 4)
+
+    def test_load_ack_frequency_args(self):
+        parser = ArgsParser()
+        argv = ["download.py", "-n", "dog", "-f", "4"]
+
+        config: DownloadConfig = parser.load_args(argv)
+
+        self.assertEqual(config.ACK_FREQUENCY, 4)
+
+    def test_default_ack_frequency(self):
+        parser = ArgsParser()
+        argv = ["start-server.py"]
+
+        config: ServerConfig = parser.load_args(argv)
+
+        self.assertEqual(config.ACK_FREQUENCY, 2)
+
+    def test_load_cache_size_args(self):
+        parser = ArgsParser()
+        argv = ["start-server.py", "-c", "0"]
+
+        config: ServerConfig = parser.load_args(argv)
+
+        self.assertEqual(config.CACHE_SIZE, 0)
+
+    def test_default_cache_size(self):
+        parser = ArgsParser()
+        argv = ["start-server.py"]
+
+        config: ServerConfig = parser.load_args(argv)
+
+        self.assertEqual(config.CACHE_SIZE, 64)
+
+    def test_load_resume_args(self):
+        parser = ArgsParser()
+
+        upload: UploadConfig = parser.load_args(["upload.py", "-n", "dog", "-r"])
+        download: DownloadConfig = parser.load_args(["download.py", "-n", "dog"])
+
+        self.assertTrue(upload.RESUME)
+        self.assertFalse(download.RESUME)
@@ -0,0 +1,123 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from lib.arguments.constants import MAX_PAYLOAD_SIZE_SACK
+from lib.packets.sack_packet import SACKPacket
+from lib.sack.async_writer import AsyncWriter
+from lib.sack.reassembly import SLOT_SIZE
+from lib.sack.segment_writer import PWRITE_SUPPORTED, SegmentWriter
+
+DATA_START: int = 1000
+
+
+def data_packet(index: int, payload: bytes) -> SACKPacket:
+    seq_number = DATA_START + index * SLOT_SIZE
+    return SACKPacket(seq_number, 0, 0, True, False, False, False, False, [], payload)
+
+
+class BlockedWriter(SegmentWriter):
+    """Segment writer whose writes wait until the disk is released."""
+
+    def __init__(self, file_path: str, data_start: int):
+        super().__init__(file_path, data_start)
+        self.released = threading.Event()
+
+    def write(self, packet: SACKPacket, offset: int):
+        self.released.wait()
+        super().write(packet, offset)
+
+
+class FailingWriter(SegmentWriter):
+    def write(self, packet: SACKPacket, offset: int):
+        raise OSError("disk full")
+
+
+class BuggyWriter(SegmentWriter):
+    def write(self, packet: SACKPacket, offset: int):
+        raise ValueError("not an I/O error")
+
+
+@unittest.skipUnless(PWRITE_SUPPORTED, "no positional writes")
+class AsyncWriterTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.directory.name, "file")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def read_file(self) -> bytes:
+        with open(self.file_path, "rb") as file:
+            return file.read()
+
+    def test_queued_packets_written_on_close(self):
+        writer = AsyncWriter(SegmentWriter(self.file_path, DATA_START))
+        first = bytes([1]) * MAX_PAYLOAD_SIZE_SACK
+        second = bytes([2]) * MAX_PAYLOAD_SIZE_SACK
+
+        packet = data_packet(1, second)
+        writer.write(packet, writer.offset(packet))
+        packet = data_packet(0, first)
+        writer.write(packet, writer.offset(packet))
+        writer.append(data_packet(2, b"end"))
+        writer.close()
+
+        self.assertEqual(first + second + b"end", self.read_file())
+        self.assertEqual(0, writer.pending_bytes)
+
+    def test_pending_bytes_count_the_packets_not_written(self):
+        segment_writer = BlockedWriter(self.file_path, DATA_START)
+        writer = AsyncWriter(segment_writer)
+        packets = [data_packet(k, b"data") for k in range(3)]
+
+        for packet in packets:
+            writer.write(packet, writer.offset(packet))
+
+        self.assertEqual(
+            sum(packet.length() for packet in packets), writer.pending_bytes
+        )
+
+        segment_writer.released.set()
+        writer.close()
+        self.assertEqual(0, writer.pending_bytes)
+
+    def test_write_never_waits_for_the_disk(self):
+        segment_writer = BlockedWriter(self.file_path, DATA_START)
+        writer = AsyncWriter(segment_writer)
+        packets = [data_packet(k, bytes(MAX_PAYLOAD_SIZE_SACK)) for k in range(1000)]
+
+        # Well past any receive buffer, the disk taking none of it
+        for packet in packets:
+            writer.write(packet, writer.offset(packet))
+
+        self.assertEqual(
+            sum(packet.length() for packet in packets), writer.pending_bytes
+        )
+        segment_writer.released.set()
+        writer.close()
+
+    def test_write_error_raised_to_the_caller(self):
+        writer = AsyncWriter(FailingWriter(self.file_path, DATA_START))
+        packet = data_packet(0, b"data")
+        writer.write(packet, writer.offset(packet))
+
+        with self.assertRaises(OSError):
+            writer.close()
+
+    def test_any_write_error_releases_the_queue(self):
+        first, second = data_packet(0, b"first"), data_packet(1, b"second")
+        writer = AsyncWriter(BuggyWriter(self.file_path, DATA_START))
+        writer.write(first, writer.offset(first))
+
+        deadline = time.monotonic() + 1.0
+        while writer.pending_bytes and time.monotonic() < deadline:
+            time.sleep(0.001)
+        self.assertEqual(0, writer.pending_bytes)
+
+        # The next write gets the error of the failed one
+        with self.assertRaises(ValueError):
+            writer.write(second, writer.offset(second))
+        with self.assertRaises(ValueError):
+            writer.close()
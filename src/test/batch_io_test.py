@@ -0,0 +1,86 @@
+import socket
+import unittest
+from lib.net.batch_io import BatchReceiver, send_batch
+
+
+class BatchIOTest(unittest.TestCase):
+    def setUp(self):
+        self.receiver_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.receiver_socket.bind(("127.0.0.1", 0))
+        self.sender_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sender_socket.bind(("127.0.0.1", 0))
+
+    def tearDown(self):
+        self.receiver_socket.close()
+        self.sender_socket.close()
+
+    def test_receive_empty_socket(self):
+        receiver = BatchReceiver(16)
+
+        self.assertEqual([], receiver.receive(self.receiver_socket))
+
+    def test_send_and_receive_batch(self):
+        datagrams = [b"first", b"second", b"third"]
+        send_batch(
+            self.sender_socket,
+            [[data] for data in datagrams],
+            self.receiver_socket.getsockname(),
+        )
+
+        received = BatchReceiver(16).receive(self.receiver_socket)
+
+        self.assertEqual(datagrams, [bytes(data) for data, _ in received])
+        for _, address in received:
+            self.assertEqual(self.sender_socket.getsockname(), address)
+
+    def test_send_gathers_datagram_parts(self):
+        send_batch(
+            self.sender_socket,
+            [[b"header", b"payload"], [b"ack", b""]],
+            self.receiver_socket.getsockname(),
+        )
+
+        received = BatchReceiver(16).receive(self.receiver_socket)
+
+        self.assertEqual([b"headerpayload", b"ack"], [bytes(d) for d, _ in received])
+
+    def test_send_memoryview_parts(self):
+        payload = memoryview(bytearray(b"--payload--"))[2:-2]
+        send_batch(
+            self.sender_socket,
+            [[b"header", payload], [b"header", payload[:3]]],
+            self.receiver_socket.getsockname(),
+        )
+
+        received = BatchReceiver(16).receive(self.receiver_socket)
+
+        self.assertEqual(
+            [b"headerpayload", b"headerpay"], [bytes(d) for d, _ in received]
+        )
+
+    def test_send_read_only_parts(self):
+        payload = memoryview(b"--payload--")[2:-2]
+        self.assertTrue(payload.readonly)
+
+        send_batch(
+            self.sender_socket,
+            [[b"header", payload], [b"header", payload[:3]]],
+            self.receiver_socket.getsockname(),
+        )
+
+        received = BatchReceiver(16).receive(self.receiver_socket)
+
+        self.assertEqual(
+            [b"headerpayload", b"headerpay"], [bytes(d) for d, _ in received]
+        )
+
+    def test_receive_reuses_buffers(self):
+        receiver = BatchReceiver(16)
+        address = self.receiver_socket.getsockname()
+
+        send_batch(self.sender_socket, [[b"old"]], address)
+        ((first, _),) = receiver.receive(self.receiver_socket)
+        send_batch(self.sender_socket, [[b"new"]], address)
+        receiver.receive(self.receiver_socket)
+
+        self.assertEqual(b"new", bytes(first))
@@ -0,0 +1,115 @@
+import os
+import tempfile
+import unittest
+from lib.server.chunk_cache import CachedFile, ChunkCache
+
+CHUNK_SIZE: int = 4
+
+
+class CountingFile:
+    """Binary file that counts the reads that reach it."""
+
+    def __init__(self, file_path: str):
+        self.file = open(file_path, "rb", buffering=0)
+        self.reads = 0
+
+    def seek(self, offset: int):
+        self.file.seek(offset)
+
+    def read(self, size: int) -> bytes:
+        self.reads += 1
+        return self.file.read(size)
+
+    def close(self):
+        self.file.close()
+
+
+class ChunkCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.directory.name, "file")
+        with open(self.file_path, "wb") as file:
+            file.write(b"0123456789")
+        self.file = CountingFile(self.file_path)
+
+    def tearDown(self):
+        self.file.close()
+        self.directory.cleanup()
+
+    def test_chunk_read_once(self):
+        cache = ChunkCache(100, CHUNK_SIZE)
+
+        first = cache.chunk(self.file, self.file_path, 0, 4)
+        second = cache.chunk(self.file, self.file_path, 0, 4)
+
+        self.assertEqual(b"4567", bytes(first))
+        self.assertIs(first, second)
+        self.assertEqual(1, self.file.reads)
+
+    def test_cached_chunks_are_read_only(self):
+        cache = ChunkCache(100, CHUNK_SIZE)
+
+        chunk = cache.chunk(self.file, self.file_path, 0, 0)
+
+        self.assertTrue(chunk.readonly)
+
+    def test_changed_file_read_again(self):
+        cache = ChunkCache(100, CHUNK_SIZE)
+
+        cache.chunk(self.file, self.file_path, 0, 0)
+        cache.chunk(self.file, self.file_path, 1, 0)
+
+        self.assertEqual(2, self.file.reads)
+
+    def test_least_recently_used_evicted(self):
+        cache = ChunkCache(2 * CHUNK_SIZE, CHUNK_SIZE)
+
+        cache.chunk(self.file, self.file_path, 0, 0)
+        cache.chunk(self.file, self.file_path, 0, 4)
+        cache.chunk(self.file, self.file_path, 0, 0)
+        cache.chunk(self.file, self.file_path, 0, 8)  # Evicts the chunk at 4
+        cache.chunk(self.file, self.file_path, 0, 0)
+        cache.chunk(self.file, self.file_path, 0, 4)
+
+        self.assertEqual(4, self.file.reads)
+        self.assertEqual(2, len(cache))
+        self.assertLessEqual(cache.size, 2 * CHUNK_SIZE)
+
+    def test_no_capacity_caches_nothing(self):
+        cache = ChunkCache(0, CHUNK_SIZE)
+
+        cache.chunk(self.file, self.file_path, 0, 0)
+        cache.chunk(self.file, self.file_path, 0, 0)
+
+        self.assertEqual(2, self.file.reads)
+        self.assertEqual(0, len(cache))
+
+    def test_cached_file_reads(self):
+        cache = ChunkCache(100, CHUNK_SIZE)
+
+        with CachedFile(cache, self.file_path) as file:
+            chunks = [bytes(file.read(2)) for _ in range(6)]
+        with CachedFile(cache, self.file_path) as file:
+            across = [bytes(file.read(3)) for _ in range(4)]
+
+        self.assertEqual([b"01", b"23", b"45", b"67", b"89", b""], chunks)
+        self.assertEqual([b"012", b"345", b"678", b"9"], across)
+        self.assertEqual(3, len(cache))
+
+    def test_cached_file_without_room_reads_the_payloads_only(self):
+        cache = ChunkCache(CHUNK_SIZE - 1, CHUNK_SIZE)
+
+        with CachedFile(cache, self.file_path) as file:
+            parts = [bytes(file.read(3)) for _ in range(5)]
+
+        self.assertEqual([b"012", b"345", b"678", b"9", b""], parts)
+        self.assertEqual(0, cache.misses)
+
+    def test_hits_and_misses_counted(self):
+        cache = ChunkCache(100, CHUNK_SIZE)
+
+        cache.chunk(self.file, self.file_path, 0, 0)
+        cache.chunk(self.file, self.file_path, 0, 0)
+
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(1, cache.misses)
@@ -0,0 +1,202 @@
+import contextlib
+import io
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+from lib.arguments.constants import (
+    MAX_PAYLOAD_SIZE,
+    MAX_PAYLOAD_SIZE_SACK,
+    MAX_RWND,
+    RECEIVE_BUFFER_SIZE_SACK,
+)
+from lib.packets.handshake_options import HandshakeOptions
+from lib.packets.sack_packet import SACKPacket
+from lib.server.chunk_cache import ChunkCache
+from lib.sack.segment_writer import PWRITE_SUPPORTED, SegmentWriter
+from lib.server.client_handler_sack import ClientHandlerSACK
+from lib.session import Session
+
+TIMEOUT: int = 1000  # miliseconds
+SEQUENCE_NUMBER_LIMIT = 2**32
+
+
+def end_of(packet: SACKPacket) -> int:
+    return (packet.seq_number + packet.length()) % SEQUENCE_NUMBER_LIMIT
+
+
+class FakeDownloadClient:
+    """The client end of a download, ACKing each packet of the handler at once."""
+
+    def __init__(self):
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind(("127.0.0.1", 0))
+        self.socket.settimeout(1.0)
+        self.__seq_number = 0
+
+    @property
+    def seq_number(self) -> int:
+        """Next sequence number, past the last packet sent."""
+        return self.__seq_number
+
+    def close(self):
+        self.socket.close()
+
+    def __send(self, session: Session, ack_number: int, **flags) -> SACKPacket:
+        upload = flags.get("upl", False)
+        packet = SACKPacket(
+            self.__seq_number,
+            ack_number,
+            MAX_RWND,
+            upload,
+            not upload,
+            flags.get("ack", False),
+            flags.get("syn", False),
+            flags.get("fin", False),
+            [],
+            flags.get("payload", b""),
+        )
+        self.__seq_number = end_of(packet)
+        session.deliver(packet.encode())
+        return packet
+
+    def download(
+        self, handler: ClientHandlerSACK, file_name: str, abort: bool = False
+    ) -> bytes:
+        """Download a file, returning its data. `abort` answers the data with a FIN."""
+        session = Session(handler.handle_request())
+        session.start()
+
+        options = HandshakeOptions(file_size=0).encode()
+        self.__send(session, 0, syn=True, payload=options)
+        self.__send(session, 0, syn=True, payload=file_name.encode())
+
+        data = b""
+        while not session.finished:
+            packet = SACKPacket.decode(self.socket.recv(2**16))
+            if packet.syn:
+                continue  # The SYN-ACK, answered by the file name
+
+            if not (packet.ack or packet.fin):
+                data += packet.payload
+                if abort:
+                    self.__send(session, end_of(packet), fin=True)
+                    continue
+            self.__send(session, end_of(packet), ack=True, fin=packet.fin)
+
+        return data
+
+    def upload(self, handler: ClientHandlerSACK, file_name: str, packets: int):
+        """
+        Start uploading `packets` full packets to the handler, all in order and
+        none ever retransmitted. Returns the session, still receiving.
+        """
+        session = Session(handler.handle_request())
+        session.start()
+
+        options = HandshakeOptions(file_size=packets * MAX_PAYLOAD_SIZE_SACK)
+        self.__send(session, 0, upl=True, syn=True, payload=options.encode())
+        self.__send(session, 0, upl=True, syn=True, payload=file_name.encode())
+
+        for _ in range(packets):
+            payload = bytes(MAX_PAYLOAD_SIZE_SACK)
+            self.__send(session, 0, upl=True, payload=payload)
+        return session
+
+    def last_ack_number(self) -> int:
+        """Get the highest ACK the handler sent, reading all it sent so far."""
+        self.socket.settimeout(0)
+        ack_number = 0
+        with contextlib.suppress(BlockingIOError):
+            while True:
+                packet = SACKPacket.decode(self.socket.recv(2**16))
+                if (packet.ack_number - ack_number) % SEQUENCE_NUMBER_LIMIT < 2**31:
+                    ack_number = packet.ack_number
+        return ack_number
+
+
+class ClientHandlerSACKTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.data = os.urandom(3 * MAX_PAYLOAD_SIZE)
+        with open(os.path.join(self.directory.name, "file"), "wb") as file:
+            file.write(self.data)
+
+        self.handler_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.handler_socket.bind(("127.0.0.1", 0))
+        self.client = FakeDownloadClient()
+        self.client.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 2**22)
+
+    def tearDown(self):
+        self.client.close()
+        self.handler_socket.close()
+        self.directory.cleanup()
+
+    def handler(self, chunk_cache: ChunkCache) -> ClientHandlerSACK:
+        return ClientHandlerSACK(
+            self.client.socket.getsockname(),
+            self.handler_socket,
+            self.directory.name,
+            TIMEOUT,
+            chunk_cache=chunk_cache,
+        )
+
+    def test_sessions_share_the_chunk_cache(self):
+        chunk_cache = ChunkCache(2**20)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            first = self.client.download(self.handler(chunk_cache), "file")
+            misses = chunk_cache.misses
+            second = self.client.download(self.handler(chunk_cache), "file")
+
+        self.assertEqual(self.data, first)
+        self.assertEqual(self.data, second)
+        self.assertGreater(misses, 0)
+        # The second session found the chunks the first one read
+        self.assertEqual(misses, chunk_cache.misses)
+        self.assertGreater(chunk_cache.hits, 0)
+
+    def test_download_stopped_by_the_client(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            data = self.client.download(self.handler(ChunkCache(0)), "file", True)
+
+        # The handler stopped sending and acknowledged the FIN
+        self.client.socket.settimeout(0)
+        packets = []
+        with contextlib.suppress(BlockingIOError):
+            while True:
+                packets.append(SACKPacket.decode(self.client.socket.recv(2**16)))
+
+        self.assertLess(len(data), len(self.data))
+        self.assertTrue(packets[-1].ack and packets[-1].fin)
+        self.assertEqual(self.client.seq_number, packets[-1].ack_number)
+
+    @unittest.skipUnless(PWRITE_SUPPORTED, "no positional writes")
+    def test_stalled_disk_does_not_block_the_loop(self):
+        released = threading.Event()
+        write = SegmentWriter.write
+
+        def stalled_write(writer, packet, offset):
+            released.wait()
+            write(writer, packet, offset)
+
+        packets = 2 * RECEIVE_BUFFER_SIZE_SACK // MAX_PAYLOAD_SIZE_SACK
+        with mock.patch.object(SegmentWriter, "write", stalled_write):
+            with contextlib.redirect_stdout(io.StringIO()):
+                handler = self.handler(ChunkCache(0))
+                started = time.monotonic()
+                try:
+                    session = self.client.upload(handler, "up", packets)
+                    delivered = time.monotonic() - started
+                    ack_number = self.client.last_ack_number()
+                finally:
+                    released.set()
+                session.close()
+
+        # What the buffer had no room for was dropped unacknowledged
+        self.assertLess(delivered, 1.0)
+        self.assertLess(ack_number, self.client.seq_number)
+        self.assertGreater(ack_number, RECEIVE_BUFFER_SIZE_SACK // 2)
@@ -0,0 +1,70 @@
+import unittest
+from lib.states.congestion_avoidance import CongestionAvoidance
+from lib.states.fast_recovery import FastRecovery
+from lib.states.slow_start import SlowStart
+from lib.states.state import INITIAL_CWND, MSS
+
+
+class CongestionStatesTest(unittest.TestCase):
+    def test_slow_start_grows_one_mss_per_ack(self):
+        state = SlowStart()
+
+        state = state.ACK_event(1)
+        state = state.ACK_event(2)
+
+        self.assertIsInstance(state, SlowStart)
+        self.assertEqual(INITIAL_CWND + 2 * MSS, state.cwnd())
+
+    def test_slow_start_reaches_ssthresh(self):
+        state = SlowStart(2 * MSS, 3 * MSS, 0)
+
+        state = state.ACK_event(1)
+
+        self.assertIsInstance(state, CongestionAvoidance)
+        self.assertEqual(3 * MSS, state.cwnd())
+
+    def test_congestion_avoidance_grows_one_mss_per_window(self):
+        state = CongestionAvoidance(4 * MSS, 4 * MSS, 0)
+
+        for ack_number in range(1, 5):
+            state = state.ACK_event(ack_number)
+
+        self.assertGreater(state.cwnd(), 4 * MSS + MSS // 2)
+        self.assertLessEqual(state.cwnd(), 5 * MSS)
+
+    def test_triple_duplicate_ack_halves_the_window(self):
+        state = CongestionAvoidance(8 * MSS, 4 * MSS, 10)
+
+        for _ in range(3):
+            state = state.ACK_event(10)
+
+        self.assertIsInstance(state, FastRecovery)
+        self.assertEqual(4 * MSS + 3 * MSS, state.cwnd())
+
+        state = state.ACK_event(10)
+        self.assertEqual(8 * MSS, state.cwnd())
+
+        state = state.ACK_event(20)
+        self.assertIsInstance(state, CongestionAvoidance)
+        self.assertEqual(4 * MSS, state.cwnd())
+
+    def test_timeout_collapses_the_window(self):
+        state = CongestionAvoidance(8 * MSS, 4 * MSS, 10)
+
+        state = state.timeout_event()
+
+        self.assertIsInstance(state, SlowStart)
+        self.assertEqual(MSS, state.cwnd())
+
+        for ack_number in range(11, 14):
+            state = state.ACK_event(ack_number)
+        self.assertIsInstance(state, CongestionAvoidance)
+
+    def test_window_is_not_capped(self):
+        state = SlowStart()
+
+        for ack_number in range(1, 100):
+            state = state.ACK_event(ack_number)
+
+        # The peer's rwnd bounds what is in flight, not a fixed limit
+        self.assertEqual(INITIAL_CWND + 99 * MSS, state.cwnd())
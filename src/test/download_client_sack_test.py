@@ -0,0 +1,111 @@
+import contextlib
+import io
+import os
+import socket
+import tempfile
+import threading
+import unittest
+from lib.arguments.constants import DEFAULT_ACK_FREQUENCY, MAX_RWND
+from lib.client.download_client_sack import DownloadClientSACK
+from lib.client.download_config import DownloadConfig
+from lib.packets.handshake_options import HandshakeOptions
+from lib.packets.sack_packet import SACKPacket
+from lib.verbose import Verbose
+
+TIMEOUT: int = 20  # miliseconds
+SEQUENCE_NUMBER_LIMIT = 2**32
+
+
+def end_of(packet: SACKPacket) -> int:
+    return (packet.seq_number + packet.length()) % SEQUENCE_NUMBER_LIMIT
+
+
+class FakeServer:
+    """The server end of a download, answering the client packet by packet."""
+
+    def __init__(self):
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind(("127.0.0.1", 0))
+        self.socket.settimeout(1.0)
+        self.client_address = None
+        self.__seq_number = 0
+
+    def close(self):
+        self.socket.close()
+
+    def receive(self) -> SACKPacket:
+        data, self.client_address = self.socket.recvfrom(2**16)
+        return SACKPacket.decode(data)
+
+    def acknowledge(self, packet: SACKPacket, payload: bytes = b""):
+        """ACK a packet of the client, with a payload of options if any."""
+        ack = SACKPacket(
+            self.__seq_number,
+            end_of(packet),
+            MAX_RWND,
+            False,
+            True,
+            True,
+            packet.syn,
+            packet.fin,
+            [],
+            payload,
+        )
+        self.__seq_number = end_of(ack)
+        self.socket.sendto(ack.encode(), self.client_address)
+
+
+class DownloadClientSACKTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.server = FakeServer()
+
+    def tearDown(self):
+        self.server.close()
+        self.directory.cleanup()
+
+    def start_download(self) -> threading.Thread:
+        """Download a file from the fake server, on a thread."""
+        config = DownloadConfig(
+            [
+                Verbose.QUIET,
+                "127.0.0.1",
+                self.server.socket.getsockname()[1],
+                "sack",
+                TIMEOUT,
+                "selector",
+                self.directory.name,
+                "file",
+                DEFAULT_ACK_FREQUENCY,
+                False,
+            ]
+        )
+        client = DownloadClientSACK(config)
+
+        def download():
+            with contextlib.redirect_stdout(io.StringIO()):
+                client.run()
+
+        download_thread = threading.Thread(target=download, daemon=True)
+        download_thread.start()
+        return download_thread
+
+    @unittest.skipUnless(hasattr(os, "posix_fallocate"), "no preallocation")
+    def test_no_room_for_the_file_stops_the_server(self):
+        download = self.start_download()
+
+        syn = self.server.receive()
+        self.server.acknowledge(syn, HandshakeOptions(file_size=0).encode())
+        file_name = self.server.receive()
+        self.server.acknowledge(file_name, HandshakeOptions(file_size=2**62).encode())
+
+        # The client cannot take the file and tells the server at once
+        fin = self.server.receive()
+        self.assertTrue(fin.fin)
+        self.assertFalse(fin.ack)
+        self.server.acknowledge(fin)
+
+        download.join(10)
+
+        self.assertFalse(download.is_alive())
+        self.assertFalse(os.path.exists(os.path.join(self.directory.name, "file")))
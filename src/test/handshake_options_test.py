@@ -0,0 +1,65 @@
+import unittest
+from lib.packets.handshake_options import HandshakeOptions
+
+
+class HandshakeOptionsTest(unittest.TestCase):
+    def test_encode_session_port(self):
+        options = HandshakeOptions(session_port=0x1F90)
+
+        self.assertEqual(b"\x01\x02\x1f\x90", options.encode())
+
+    def test_encode_without_options(self):
+        self.assertEqual(b"", HandshakeOptions().encode())
+
+    def test_decode_session_port(self):
+        options = HandshakeOptions.decode(b"\x01\x02\x1f\x90")
+
+        self.assertEqual(0x1F90, options.session_port)
+
+    def test_decode_skips_unknown_options(self):
+        options = HandshakeOptions.decode(b"\xff\x03abc" + b"\x01\x02\x00\x50")
+
+        self.assertEqual(80, options.session_port)
+
+    def test_decode_empty_payload(self):
+        self.assertIsNone(HandshakeOptions.decode(b"").session_port)
+
+    def test_encode_window_scale(self):
+        options = HandshakeOptions(session_port=0x1F90, window_scale=5)
+
+        self.assertEqual(b"\x01\x02\x1f\x90\x02\x01\x05", options.encode())
+
+    def test_decode_window_scale(self):
+        options = HandshakeOptions.decode(b"\x02\x01\x07")
+
+        self.assertEqual(7, options.window_scale)
+        self.assertIsNone(options.session_port)
+
+    def test_decode_without_window_scale(self):
+        self.assertIsNone(HandshakeOptions.decode(b"\x01\x02\x1f\x90").window_scale)
+
+    def test_encode_file_size(self):
+        options = HandshakeOptions(file_size=2**32)
+
+        self.assertEqual(b"\x03\x08\x00\x00\x00\x01\x00\x00\x00\x00", options.encode())
+
+    def test_decode_file_size(self):
+        options = HandshakeOptions.decode(
+            b"\x02\x01\x05\x03\x08\x00\x00\x00\x00\x00\x00\x14\x00"
+        )
+
+        self.assertEqual(5, options.window_scale)
+        self.assertEqual(5120, options.file_size)
+        self.assertIsNone(HandshakeOptions.decode(b"\x02\x01\x05").file_size)
+
+    def test_encode_and_decode_resume(self):
+        data = HandshakeOptions(resume_offset=5120, file_name="dog.png").encode()
+
+        options = HandshakeOptions.decode(data)
+
+        self.assertEqual(5120, options.resume_offset)
+        self.assertEqual("dog.png", options.file_name)
+
+    def test_encode_file_name_too_long(self):
+        with self.assertRaises(ValueError):
+            HandshakeOptions(file_name="a" * 256).encode()
@@ -0,0 +1,62 @@
+import unittest
+from lib.sack.interval_set import IntervalSet
+
+
+class IntervalSetTest(unittest.TestCase):
+    def setUp(self):
+        self.intervals = IntervalSet()
+
+    def test_disjoint_intervals_stay_sorted(self):
+        self.intervals.add(300, 400)
+        self.intervals.add(100, 200)
+
+        self.assertEqual([(100, 200), (300, 400)], list(self.intervals))
+
+    def test_touching_intervals_merge(self):
+        self.intervals.add(100, 200)
+        self.intervals.add(300, 400)
+
+        self.intervals.add(200, 300)
+
+        self.assertEqual([(100, 400)], list(self.intervals))
+
+    def test_overlapping_intervals_merge(self):
+        self.intervals.add(100, 200)
+        self.intervals.add(300, 400)
+        self.intervals.add(500, 600)
+
+        self.intervals.add(150, 550)
+
+        self.assertEqual([(100, 600)], list(self.intervals))
+
+    def test_duplicate_interval_is_ignored(self):
+        self.intervals.add(100, 200)
+        self.intervals.add(100, 200)
+
+        self.assertEqual([(100, 200)], list(self.intervals))
+
+    def test_advance_drops_and_trims(self):
+        self.intervals.add(100, 200)
+        self.intervals.add(300, 400)
+
+        self.intervals.advance(350)
+
+        self.assertEqual([(350, 400)], list(self.intervals))
+
+        self.intervals.advance(400)
+
+        self.assertEqual(0, len(self.intervals))
+
+    def test_blocks_most_recent_first(self):
+        self.intervals.add(500, 600)
+        self.intervals.add(100, 200)
+        self.intervals.add(300, 400)
+        self.intervals.add(600, 700)
+
+        self.assertEqual([(500, 700), (300, 400), (100, 200)], self.intervals.blocks())
+
+    def test_blocks_are_capped(self):
+        for start in range(0, 1000, 200):
+            self.intervals.add(start, start + 100)
+
+        self.assertEqual([(800, 900), (600, 700)], self.intervals.blocks(2))
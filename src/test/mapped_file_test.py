@@ -0,0 +1,49 @@
+import os
+import tempfile
+import unittest
+from lib.sack.mapped_file import MappedFile
+
+
+class MappedFileTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.directory.name, "file")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write_file(self, data: bytes):
+        with open(self.file_path, "wb") as file:
+            file.write(data)
+
+    def test_read_in_chunks(self):
+        self.write_file(b"0123456789")
+
+        with MappedFile(self.file_path) as file:
+            chunks = [bytes(file.read(4)) for _ in range(4)]
+
+        self.assertEqual([b"0123", b"4567", b"89", b""], chunks)
+
+    def test_empty_file(self):
+        self.write_file(b"")
+
+        with MappedFile(self.file_path) as file:
+            self.assertEqual(0, len(file))
+            self.assertEqual(b"", bytes(file.read(4)))
+
+    def test_payloads_outlive_the_close(self):
+        self.write_file(b"payload")
+
+        with MappedFile(self.file_path) as file:
+            payload = file.read(7)
+
+        self.assertEqual(b"payload", bytes(payload))
+
+    def test_payloads_are_read_only(self):
+        self.write_file(b"payload")
+
+        with MappedFile(self.file_path) as file:
+            payload = file.read(7)
+
+        # Views of the page cache, never private copies of the pages
+        self.assertTrue(payload.readonly)
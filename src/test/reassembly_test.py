@@ -0,0 +1,79 @@
+import unittest
+from lib.packets.sack_packet import SACKPacket
+from lib.sack.reassembly import SEQUENCE_NUMBER_LIMIT, ReassemblyWindow
+
+PAYLOAD: bytes = bytes(84)  # 100 B packets, one per slot
+
+
+def data_packet(seq_number: int, payload: bytes = PAYLOAD) -> SACKPacket:
+    return SACKPacket(seq_number, 0, 0, True, False, False, False, False, [], payload)
+
+
+class ReassemblyWindowTest(unittest.TestCase):
+    def setUp(self):
+        self.window = ReassemblyWindow(slots=8, slot_size=100)
+        self.window.advance(100)
+
+    def test_store_out_of_order_packets(self):
+        self.assertTrue(self.window.store(data_packet(300)))
+        self.assertTrue(self.window.store(data_packet(500)))
+
+        self.assertEqual(2, len(self.window))
+        self.assertEqual(200, self.window.buffered_bytes)
+
+    def test_duplicates(self):
+        self.window.store(data_packet(300))
+
+        self.assertTrue(self.window.is_duplicate(data_packet(0)))
+        self.assertTrue(self.window.is_duplicate(data_packet(300)))
+        self.assertFalse(self.window.is_duplicate(data_packet(100)))
+        self.assertFalse(self.window.is_duplicate(data_packet(400)))
+
+    def test_packets_beyond_the_window_are_refused(self):
+        self.assertFalse(self.window.store(data_packet(900)))
+        self.assertEqual(0, len(self.window))
+
+    def test_advance_delivers_the_packets_put_in_order(self):
+        self.window.store(data_packet(300))
+        self.window.store(data_packet(200))
+        self.window.store(data_packet(500))
+
+        delivered = self.window.advance(200)
+
+        self.assertEqual([200, 300], [packet.seq_number for packet in delivered])
+        self.assertEqual(1, len(self.window))
+        self.assertEqual([(500, 600)], self.window.blocks())
+
+    def test_blocks_most_recent_first(self):
+        self.window.store(data_packet(500))
+        self.window.store(data_packet(200))
+        self.window.store(data_packet(700))
+        self.window.store(data_packet(600))
+
+        self.assertEqual([(500, 800), (200, 300)], self.window.blocks())
+
+    def test_blocks_are_capped(self):
+        for seq_number in range(200, 900, 200):
+            self.window.store(data_packet(seq_number))
+
+        self.assertEqual([(800, 900), (600, 700)], self.window.blocks(2))
+
+    def test_short_packet_realigns_the_slots(self):
+        self.window.store(data_packet(250))
+
+        delivered = self.window.advance(150)  # A 50 B packet was delivered
+
+        self.assertEqual([], delivered)
+        self.assertEqual([(250, 350)], self.window.blocks())
+        self.assertEqual(
+            [250], [packet.seq_number for packet in self.window.advance(250)]
+        )
+
+    def test_sequence_numbers_wrap_around(self):
+        window = ReassemblyWindow(slots=8, slot_size=100)
+        window.advance(SEQUENCE_NUMBER_LIMIT - 100)
+
+        window.store(data_packet(0))
+
+        self.assertFalse(window.is_duplicate(data_packet(SEQUENCE_NUMBER_LIMIT - 100)))
+        self.assertEqual([0], [p.seq_number for p in window.advance(0)])
@@ -0,0 +1,96 @@
+import os
+import tempfile
+import unittest
+from lib.arguments.constants import MAX_PAYLOAD_SIZE_SACK
+from lib.packets.sack_packet import SACKPacket
+from lib.sack.reassembly import SLOT_SIZE
+from lib.sack.resume_marker import (
+    marker_path,
+    read_marker,
+    resume_offset,
+    write_marker,
+)
+from lib.sack.segment_writer import PWRITE_SUPPORTED, SegmentWriter
+
+DATA_START: int = 1000
+FILE_SIZE: int = 10 * MAX_PAYLOAD_SIZE_SACK
+
+
+def data_packet(index: int) -> SACKPacket:
+    seq_number = DATA_START + index * SLOT_SIZE
+    payload = bytes([index + 1]) * MAX_PAYLOAD_SIZE_SACK
+    return SACKPacket(seq_number, 0, 0, True, False, False, False, False, [], payload)
+
+
+class ResumeMarkerTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.directory.name, "file")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_file_with_no_marker_starts_over(self):
+        with open(self.file_path, "wb") as file:
+            file.write(b"a file of the same name")
+
+        self.assertEqual(0, resume_offset(self.file_path, FILE_SIZE))
+
+    def test_marker_of_a_file_of_another_size_starts_over(self):
+        with open(self.file_path, "wb") as file:
+            file.write(b"kept")
+        write_marker(self.file_path, 4, FILE_SIZE)
+
+        self.assertEqual(4, resume_offset(self.file_path, FILE_SIZE))
+        self.assertEqual(0, resume_offset(self.file_path, FILE_SIZE + 1))
+
+    def test_marker_past_the_data_on_disk_starts_over(self):
+        with open(self.file_path, "wb") as file:
+            file.write(b"kept")
+        write_marker(self.file_path, 5, FILE_SIZE)
+
+        self.assertEqual(0, resume_offset(self.file_path, FILE_SIZE))
+
+    @unittest.skipUnless(PWRITE_SUPPORTED, "no positional writes")
+    def test_preallocated_file_of_a_killed_receiver_resumes_at_the_commit(self):
+        writer = SegmentWriter(self.file_path, DATA_START, FILE_SIZE)
+        for index in (0, 1, 3):
+            packet = data_packet(index)
+            writer.write(packet, writer.offset(packet))
+        writer.commit(DATA_START + 2 * SLOT_SIZE)
+        packet = data_packet(2)
+        writer.write(packet, writer.offset(packet))
+
+        # Killed before closing: the file keeps its preallocated size
+        writer.abandon()
+
+        if hasattr(os, "posix_fallocate"):
+            self.assertEqual(FILE_SIZE, os.path.getsize(self.file_path))
+        self.assertEqual(
+            2 * MAX_PAYLOAD_SIZE_SACK, resume_offset(self.file_path, FILE_SIZE)
+        )
+
+    @unittest.skipUnless(PWRITE_SUPPORTED, "no positional writes")
+    def test_file_cut_short_resumes_at_the_data_in_order(self):
+        writer = SegmentWriter(self.file_path, DATA_START, FILE_SIZE)
+        for index in (0, 2):
+            packet = data_packet(index)
+            writer.write(packet, writer.offset(packet))
+
+        writer.close(DATA_START + SLOT_SIZE)
+
+        self.assertEqual(
+            MAX_PAYLOAD_SIZE_SACK, resume_offset(self.file_path, FILE_SIZE)
+        )
+
+    @unittest.skipUnless(PWRITE_SUPPORTED, "no positional writes")
+    def test_file_received_whole_has_no_marker(self):
+        writer = SegmentWriter(self.file_path, DATA_START, FILE_SIZE)
+        self.assertEqual((0, FILE_SIZE), read_marker(self.file_path))
+
+        packet = data_packet(0)
+        writer.write(packet, writer.offset(packet))
+        writer.close()
+
+        self.assertFalse(os.path.exists(marker_path(self.file_path)))
+        self.assertEqual(0, resume_offset(self.file_path, FILE_SIZE))
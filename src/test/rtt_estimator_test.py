@@ -0,0 +1,100 @@
+import time
+import unittest
+from lib.arguments.constants import MAX_RTO, MAX_TIMEOUT_COUNT, MIN_RTO
+from lib.rtt_estimator import RTTEstimator
+
+
+class RTTEstimatorTest(unittest.TestCase):
+    def test_initial_rto(self):
+        self.assertEqual(1.0, RTTEstimator(1.0).rto())
+
+    def test_first_sample(self):
+        estimator = RTTEstimator(1.0)
+
+        estimator.sample(0.1)
+
+        # srtt = 0.1, rttvar = 0.05
+        self.assertAlmostEqual(0.3, estimator.rto())
+
+    def test_following_samples_are_smoothed(self):
+        estimator = RTTEstimator(1.0)
+
+        estimator.sample(0.1)
+        estimator.sample(0.2)
+
+        # rttvar = 3/4 * 0.05 + 1/4 * 0.1, srtt = 7/8 * 0.1 + 1/8 * 0.2
+        self.assertAlmostEqual(0.1125 + 4 * 0.0625, estimator.rto())
+
+    def test_rto_lower_bound(self):
+        estimator = RTTEstimator(1.0)
+
+        estimator.sample(0.0001)
+
+        self.assertEqual(MIN_RTO, estimator.rto())
+
+    def test_backoff_doubles_up_to_the_limit(self):
+        estimator = RTTEstimator(0.5)
+
+        estimator.backoff()
+        self.assertEqual(1.0, estimator.rto())
+
+        for _ in range(10):
+            estimator.backoff()
+        self.assertEqual(MAX_RTO, estimator.rto())
+
+    def test_backoff_limit_keeps_a_longer_initial_timeout(self):
+        estimator = RTTEstimator(MAX_RTO * 2)
+
+        estimator.backoff()
+
+        self.assertEqual(MAX_RTO * 2, estimator.rto())
+
+    def test_sample_resets_the_backoff(self):
+        estimator = RTTEstimator(1.0)
+        estimator.sample(0.1)
+
+        estimator.backoff()
+        estimator.sample(0.1)
+
+        self.assertLess(estimator.rto(), 0.6)
+
+    def test_cancelled_timing_is_not_sampled(self):
+        estimator = RTTEstimator(1.0)
+
+        estimator.start_timing()
+        estimator.cancel_timing()
+        estimator.stop_timing()
+
+        self.assertEqual(1.0, estimator.rto())
+
+    def test_timing_is_sampled(self):
+        estimator = RTTEstimator(1.0)
+
+        estimator.start_timing()
+        estimator.stop_timing()
+
+        self.assertLess(estimator.rto(), 1.0)
+
+    def test_answer_resets_the_backoff(self):
+        estimator = RTTEstimator(1.0)
+        estimator.sample(0.1)
+        rto = estimator.rto()
+
+        estimator.backoff()
+        estimator.answered()
+
+        self.assertEqual(rto, estimator.rto())
+
+    def test_gives_up_on_a_silent_closing_peer(self):
+        estimator = RTTEstimator(0.001)
+
+        estimator.backoff()
+        time.sleep(MAX_TIMEOUT_COUNT * 0.001)
+        # Mid-transfer only the count of expired timeouts gives up
+        self.assertFalse(estimator.gave_up())
+
+        estimator.closing()
+        self.assertTrue(estimator.gave_up())
+
+        estimator.answered()
+        self.assertFalse(estimator.gave_up())
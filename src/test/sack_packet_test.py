@@ -90,6 +90,74 @@ class SACKPacketTest(unittest.TestCase):
 
         self.assertEqual(expected_bytes, res)
 
+    def test_decode_sack_packet_from_memoryview(self):
+        buffer = bytearray(64)
+        data: bytes = (
+            b"\x00\x00\x00\x07"
+            + b"\x00\x00\x00\x03"
+            + b"\x00\x10"
+            + b"\x00"
+            + b"\x01"
+            + b"\x00"
+            + b"\x00"
+            + b"\x00"
+            + b"\x01"
+            + b"\x00\x00\x00\x01\x00\x00\x00\x02"
+            + b"\xFF\xEF"
+        )
+        buffer[: len(data)] = data
+
+        res: SACKPacket = SACKPacket.decode(memoryview(buffer)[: len(data)])
+        buffer[:] = bytes(len(buffer))  # The buffer is reused by the next read
+
+        self.assertEqual(7, res.seq_number)
+        self.assertEqual(3, res.ack_number)
+        self.assertEqual(16, res.rwnd)
+        self.assertEqual([(1, 2)], res.block_edges)
+        self.assertEqual(b"\xFF\xEF", res.payload)
+
+    def test_encode_parts_sack_packet(self):
+        packet: SACKPacket = SACKPacket(
+            1, 2, 3, False, True, True, False, False, [(4, 5)], b"\xFF\xEF"
+        )
+
+        header, payload = packet.encode_parts()
+
+        self.assertEqual(packet.encode(), header + payload)
+        self.assertEqual(24, len(header))
+        self.assertIs(packet.payload, payload)
+
+    def test_length_sack_packet(self):
+        packet: SACKPacket = SACKPacket(
+            1, 2, 3, False, True, True, False, False, [(4, 5), (6, 7)], b"\xFF\xEF"
+        )
+
+        self.assertEqual(len(packet.encode()), packet.length())
+
+    def test_block_edges_are_snapshotted(self):
+        block_edges: list[tuple[int]] = [(4, 5)]
+        packet: SACKPacket = SACKPacket(
+            1, 2, 3, False, True, True, False, False, block_edges, b""
+        )
+        expected_bytes: bytes = packet.encode()
+
+        block_edges.append((6, 7))
+
+        self.assertEqual([(4, 5)], packet.block_edges)
+        self.assertEqual(expected_bytes, packet.encode())
+        self.assertEqual(len(expected_bytes), packet.length())
+
+    def test_flags_sack_packet(self):
+        packet: SACKPacket = SACKPacket(
+            1, 2, 3, True, False, True, False, True, [], b""
+        )
+
+        self.assertEqual(
+            (True, False, True, False, True),
+            (packet.upl, packet.dwl, packet.ack, packet.syn, packet.fin),
+        )
+        self.assertFalse(hasattr(packet, "__dict__"))
+
     def test_max_seq(self):
 
         # ack_number = self.__last_packet_received.ack_number
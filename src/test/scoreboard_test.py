@@ -0,0 +1,101 @@
+import unittest
+from lib.packets.sack_packet import SACKPacket
+from lib.sack.scoreboard import SEQUENCE_NUMBER_LIMIT, Scoreboard
+
+PAYLOAD: bytes = bytes(84)  # 100 B packets
+
+
+def data_packet(seq_number: int) -> SACKPacket:
+    return SACKPacket(seq_number, 0, 0, True, False, False, False, False, [], PAYLOAD)
+
+
+class ScoreboardTest(unittest.TestCase):
+    def setUp(self):
+        self.scoreboard = Scoreboard()
+        for seq_number in range(0, 600, 100):
+            self.scoreboard.sent(data_packet(seq_number), 1.0)
+
+    def test_pipe_counts_sent_packets(self):
+        self.assertEqual(600, self.scoreboard.pipe())
+
+    def test_cumulative_ack(self):
+        self.assertTrue(self.scoreboard.acks_new_data(200))
+
+        rtt_sample = self.scoreboard.ack(200, 1.5)
+
+        self.assertEqual(0.5, rtt_sample)
+        self.assertEqual(4, len(self.scoreboard))
+        self.assertFalse(self.scoreboard.acks_new_data(200))
+
+    def test_sacked_packets_leave_the_pipe(self):
+        self.scoreboard.sack([(300, 500)])
+
+        self.assertEqual(400, self.scoreboard.pipe())
+        self.assertEqual([], list(self.scoreboard.lost_segments()))
+
+    def test_hole_is_lost_after_three_sacked_packets(self):
+        self.scoreboard.sack([(100, 400)])
+
+        lost = [
+            segment.packet.seq_number for segment in self.scoreboard.lost_segments()
+        ]
+        self.assertEqual([0], lost)
+        # Three sacked and one lost packet are out of the pipe
+        self.assertEqual(200, self.scoreboard.pipe())
+
+    def test_retransmission_is_not_sampled(self):
+        self.scoreboard.sack([(100, 400)])
+        (segment,) = self.scoreboard.lost_segments()
+
+        self.scoreboard.retransmitted(segment, 2.0)
+
+        self.assertEqual([], list(self.scoreboard.lost_segments()))
+        self.assertEqual(300, self.scoreboard.pipe())
+        self.assertIsNone(self.scoreboard.ack(100, 3.0))
+
+    def test_ack_filling_a_hole_is_not_sampled(self):
+        self.scoreboard.sack([(100, 400)])
+        (segment,) = self.scoreboard.lost_segments()
+        self.scoreboard.retransmitted(segment, 2.0)
+
+        # The segments after the hole were sent once, but waited for it
+        self.assertIsNone(self.scoreboard.ack(500, 3.0))
+        self.assertEqual(0.5, self.scoreboard.ack(600, 1.5))
+
+    def test_ack_covering_sacked_packets_is_not_sampled(self):
+        self.scoreboard.sack([(100, 200)])
+
+        self.assertIsNone(self.scoreboard.ack(300, 2.0))
+
+    def test_duplicate_acks_mark_the_first_hole_lost(self):
+        self.scoreboard.ack(100, 1.5)
+
+        self.scoreboard.first_hole_lost()
+
+        lost = [
+            segment.packet.seq_number for segment in self.scoreboard.lost_segments()
+        ]
+        self.assertEqual([100], lost)
+        self.assertEqual(400, self.scoreboard.pipe())
+
+    def test_timeout_marks_every_hole_lost(self):
+        self.scoreboard.sack([(200, 300)])
+
+        self.scoreboard.timeout()
+
+        lost = [
+            segment.packet.seq_number for segment in self.scoreboard.lost_segments()
+        ]
+        self.assertEqual([0, 100, 300, 400, 500], lost)
+        self.assertEqual(0, self.scoreboard.pipe())
+
+    def test_sequence_numbers_wrap_around(self):
+        scoreboard = Scoreboard()
+        scoreboard.sent(data_packet(SEQUENCE_NUMBER_LIMIT - 100), 1.0)
+        scoreboard.sent(data_packet(0), 1.0)
+
+        scoreboard.sack([(0, 100)])
+        scoreboard.ack(0, 2.0)
+
+        self.assertEqual(1, len(scoreboard))
+        self.assertEqual(0, scoreboard.pipe())
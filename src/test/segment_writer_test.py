@@ -0,0 +1,103 @@
+import os
+import tempfile
+import unittest
+from lib.arguments.constants import MAX_PAYLOAD_SIZE_SACK
+from lib.packets.sack_packet import SACKPacket
+from lib.errors.disk_full import DiskFull
+from lib.sack.reassembly import SLOT_SIZE
+from lib.sack.segment_writer import PWRITE_SUPPORTED, SegmentWriter
+
+DATA_START: int = 1000
+
+
+def data_packet(index: int, payload: bytes) -> SACKPacket:
+    seq_number = DATA_START + index * SLOT_SIZE
+    return SACKPacket(seq_number, 0, 0, True, False, False, False, False, [], payload)
+
+
+@unittest.skipUnless(PWRITE_SUPPORTED, "no positional writes")
+class SegmentWriterTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.directory.name, "file")
+        self.writer = SegmentWriter(self.file_path, DATA_START)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def read_file(self) -> bytes:
+        self.writer.close()
+        with open(self.file_path, "rb") as file:
+            return file.read()
+
+    def test_packets_written_out_of_order(self):
+        first = bytes([1]) * MAX_PAYLOAD_SIZE_SACK
+        second = bytes([2]) * MAX_PAYLOAD_SIZE_SACK
+        last = b"end"
+
+        for packet in (data_packet(2, last), data_packet(0, first)):
+            self.writer.write(packet, self.writer.offset(packet))
+        packet = data_packet(1, second)
+        self.writer.write(packet, self.writer.offset(packet))
+
+        self.assertEqual(first + second + last, self.read_file())
+
+    def test_packets_off_the_grid_have_no_offset(self):
+        packet = SACKPacket(
+            DATA_START + 100, 0, 0, True, False, False, False, False, [], b"x"
+        )
+        fin = SACKPacket(DATA_START, 0, 0, False, False, False, False, True, [], b"")
+        duplicate = data_packet(-1, b"old")
+
+        self.assertIsNone(self.writer.offset(packet))
+        self.assertIsNone(self.writer.offset(fin))
+        self.assertIsNone(self.writer.offset(duplicate))
+
+    def test_append_after_the_data_written(self):
+        packet = data_packet(0, b"placed")
+        self.writer.write(packet, self.writer.offset(packet))
+
+        self.writer.append(data_packet(0, b" appended"))
+
+        self.assertEqual(b"placed appended", self.read_file())
+
+    @unittest.skipUnless(hasattr(os, "posix_fallocate"), "no preallocation")
+    def test_file_preallocated_then_cut_to_the_data(self):
+        self.writer.close()
+        self.writer = SegmentWriter(self.file_path, DATA_START, 10 * SLOT_SIZE)
+
+        self.assertEqual(10 * SLOT_SIZE, os.path.getsize(self.file_path))
+
+        packet = data_packet(0, b"partial")
+        self.writer.write(packet, self.writer.offset(packet))
+
+        self.assertEqual(b"partial", self.read_file())
+
+    @unittest.skipUnless(hasattr(os, "posix_fallocate"), "no preallocation")
+    def test_no_room_for_the_file(self):
+        with self.assertRaises(DiskFull):
+            SegmentWriter(self.file_path, DATA_START, 2**62)
+
+    def test_resumed_file_keeps_the_data_before_the_offset(self):
+        self.writer.close()
+        with open(self.file_path, "wb") as file:
+            file.write(b"kept|dropped")
+
+        self.writer = SegmentWriter(self.file_path, DATA_START, file_offset=5)
+        packet = data_packet(0, b"resumed")
+        self.writer.write(packet, self.writer.offset(packet))
+
+        self.assertEqual(5, self.writer.offset(packet))
+        self.assertEqual(b"kept|resumed", self.read_file())
+
+    def test_close_cuts_the_data_after_a_hole(self):
+        first = bytes([1]) * MAX_PAYLOAD_SIZE_SACK
+        packet = data_packet(0, first)
+        self.writer.write(packet, self.writer.offset(packet))
+        packet = data_packet(2, b"past the hole")
+        self.writer.write(packet, self.writer.offset(packet))
+
+        self.writer.close(DATA_START + SLOT_SIZE)
+
+        with open(self.file_path, "rb") as file:
+            self.assertEqual(first, file.read())
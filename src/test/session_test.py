@@ -0,0 +1,39 @@
+import unittest
+from lib.session import Session
+
+
+def echo_flow(received: list):
+    while True:
+        data = yield 1.0
+        if data is None:
+            return
+        received.append(data)
+
+
+class SessionTest(unittest.TestCase):
+    def test_start_waits_for_first_packet(self):
+        session = Session(echo_flow([]))
+
+        session.start()
+
+        self.assertFalse(session.finished)
+        self.assertIsNotNone(session.deadline)
+
+    def test_deliver_resumes_flow(self):
+        received = []
+        session = Session(echo_flow(received))
+
+        session.start()
+        session.deliver(b"\x01")
+        session.deliver(b"\x02")
+
+        self.assertEqual([b"\x01", b"\x02"], received)
+
+    def test_expire_finishes_flow(self):
+        session = Session(echo_flow([]))
+
+        session.start()
+        session.expire()
+
+        self.assertTrue(session.finished)
+        self.assertIsNone(session.deadline)
@@ -43,3 +43,24 @@ class SWPacketTest(unittest.TestCase):
         self.assertEqual(expected_upl, res.upl)
         self.assertEqual(expected_dwl, res.dwl)
         self.assertEqual(expected_payload, res.payload)
+
+    def test_decode_sw_packet_from_memoryview(self):
+        buffer = bytearray(32)
+        data: bytes = b"\x01\x00\x00\x01\x00\x00\x00\x00\xff\xef"
+        buffer[: len(data)] = data
+
+        res: SWPacket = SWPacket.decode(memoryview(buffer)[: len(data)])
+        buffer[:] = bytes(len(buffer))  # The buffer is reused by the next read
+
+        self.assertEqual(1, res.seq_number)
+        self.assertEqual(True, res.fin)
+        self.assertEqual(b"\xff\xef", res.payload)
+
+    def test_flags_sw_packet(self):
+        packet: SWPacket = SWPacket(0, 1, True, False, True, False, True, b"")
+
+        self.assertEqual(
+            (True, False, True, False, True),
+            (packet.syn, packet.fin, packet.ack, packet.upl, packet.dwl),
+        )
+        self.assertFalse(hasattr(packet, "__dict__"))
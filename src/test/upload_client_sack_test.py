@@ -0,0 +1,188 @@
+import contextlib
+import io
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest
+from lib.arguments.constants import (
+    MAX_PAYLOAD_SIZE,
+    MAX_RWND,
+    MAX_TIMEOUT_COUNT,
+    RECEIVE_BUFFER_SIZE_SACK,
+    WINDOW_SCALE_SACK,
+)
+from lib.client.upload_client_sack import UploadClientSACK
+from lib.client.upload_config import UploadConfig
+from lib.packets.handshake_options import HandshakeOptions
+from lib.packets.sack_packet import SACKPacket
+from lib.verbose import Verbose
+
+TIMEOUT: int = 20  # miliseconds
+SEQUENCE_NUMBER_LIMIT = 2**32
+
+
+class FakeServer:
+    """The server end of an upload, answering the client packet by packet."""
+
+    def __init__(self):
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind(("127.0.0.1", 0))
+        self.client_address = None
+
+    def close(self):
+        self.socket.close()
+
+    def receive(self, timeout: float) -> SACKPacket | None:
+        """Get the next packet of the client, None if it sent none in time."""
+        self.socket.settimeout(timeout)
+        try:
+            data, self.client_address = self.socket.recvfrom(2**16)
+        except socket.timeout:
+            return None
+        return SACKPacket.decode(data)
+
+    def acknowledge(self, packet: SACKPacket, rwnd: int, payload: bytes = b""):
+        """ACK everything up to the end of a packet."""
+        ack_number = (packet.seq_number + packet.length()) % SEQUENCE_NUMBER_LIMIT
+        ack = SACKPacket(
+            0, ack_number, rwnd, True, False, True, packet.syn, False, [], payload
+        )
+        self.socket.sendto(ack.encode(), self.client_address)
+
+
+class UploadClientSACKTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.server = FakeServer()
+        self.error = None
+
+    def tearDown(self):
+        self.server.close()
+        self.directory.cleanup()
+
+    def start_upload(self, file_size: int) -> threading.Thread:
+        """Upload a file of `file_size` bytes to the fake server, on a thread."""
+        source_path = os.path.join(self.directory.name, "file")
+        with open(source_path, "wb") as file:
+            file.write(os.urandom(file_size))
+
+        config = UploadConfig(
+            [
+                Verbose.QUIET,
+                "127.0.0.1",
+                self.server.socket.getsockname()[1],
+                "sack",
+                TIMEOUT,
+                "selector",
+                source_path,
+                "file",
+                False,
+            ]
+        )
+        client = UploadClientSACK(config)
+
+        def upload():
+            with contextlib.redirect_stdout(io.StringIO()):
+                try:
+                    client.run()
+                except BrokenPipeError as e:
+                    self.error = e  # The client gave up on the server
+
+        upload_thread = threading.Thread(target=upload, daemon=True)
+        upload_thread.start()
+        return upload_thread
+
+    def test_lost_final_ack_gives_up_in_bounded_time(self):
+        upload = self.start_upload(3 * MAX_PAYLOAD_SIZE)
+
+        # Every packet is ACKed but the FIN, as if its ACK got lost
+        while not (packet := self.server.receive(1.0)).fin:
+            self.server.acknowledge(packet, 2**16 - 1)
+        silent_since = time.monotonic()
+
+        upload.join(10)
+
+        self.assertFalse(upload.is_alive())
+        self.assertIsInstance(self.error, BrokenPipeError)
+        # The backoff stretches the timeouts, not how long the peer is waited for
+        self.assertLess(
+            time.monotonic() - silent_since, 2 * MAX_TIMEOUT_COUNT * TIMEOUT / 1000
+        )
+
+    def test_silent_peer_gets_every_retry_mid_transfer(self):
+        upload = self.start_upload(3 * MAX_PAYLOAD_SIZE)
+
+        syn = self.server.receive(1.0)
+        self.server.acknowledge(syn, MAX_RWND)
+
+        # Silent for longer than MAX_TIMEOUT_COUNT initial timeouts, but the
+        # backoff leaves the client far from MAX_TIMEOUT_COUNT retries
+        silent_until = time.monotonic() + 1.5 * MAX_TIMEOUT_COUNT * TIMEOUT / 1000
+        while time.monotonic() < silent_until:
+            self.server.receive(silent_until - time.monotonic())
+
+        # The client retransmits and finishes, it did not give up
+        while not (packet := self.server.receive(5.0)).fin:
+            self.server.acknowledge(packet, MAX_RWND)
+        self.server.acknowledge(packet, MAX_RWND)
+
+        upload.join(10)
+
+        self.assertFalse(upload.is_alive())
+        self.assertIsNone(self.error)
+
+    def test_scaled_window_lets_more_than_64_kb_in_flight(self):
+        upload = self.start_upload(200 * MAX_PAYLOAD_SIZE)
+        scaled_rwnd = RECEIVE_BUFFER_SIZE_SACK >> WINDOW_SCALE_SACK
+
+        syn = self.server.receive(1.0)
+        options = HandshakeOptions(window_scale=WINDOW_SCALE_SACK, file_size=0)
+        self.server.acknowledge(syn, MAX_RWND, options.encode())
+
+        # Each round takes what the client sends until it stops, then ACKs it
+        # packet by packet, which opens cwnd by one MSS per ACK
+        max_in_flight = 0
+        acked = end = (syn.seq_number + syn.length()) % SEQUENCE_NUMBER_LIMIT
+        fin = None
+        while fin is None:
+            packets = []
+            while (packet := self.server.receive(0.05)) is not None:
+                packets.append(packet)
+                end = max(end, packet.seq_number + packet.length())
+            self.assertTrue(packets)
+
+            max_in_flight = max(max_in_flight, end - acked)
+            for packet in packets:
+                self.server.acknowledge(packet, scaled_rwnd)
+                fin = packet if packet.fin else fin
+            acked = end
+
+        upload.join(10)
+
+        self.assertFalse(upload.is_alive())
+        self.assertIsNone(self.error)
+        self.assertGreater(max_in_flight, 2 * (MAX_RWND + 1))
+
+    def test_malformed_packets_are_ignored(self):
+        upload = self.start_upload(3 * MAX_PAYLOAD_SIZE)
+
+        syn = self.server.receive(1.0)
+        self.server.acknowledge(syn, MAX_RWND)
+        file_name = self.server.receive(1.0)
+        self.server.acknowledge(file_name, 0)
+
+        # Garbage while the client waits for the closed window to open
+        self.server.socket.sendto(b"\x00", self.server.client_address)
+
+        while not (packet := self.server.receive(1.0)).fin:
+            # Garbage while it waits for the ACK
+            self.server.socket.sendto(b"\x00", self.server.client_address)
+            self.server.acknowledge(packet, MAX_RWND)
+        self.server.acknowledge(packet, MAX_RWND)
+
+        upload.join(10)
+
+        self.assertFalse(upload.is_alive())
+        self.assertIsNone(self.error)